@@ -1,12 +1,32 @@
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file, make_response
-import io
+import base64
+import binascii
+import os
+from flask import Flask, Response, request, jsonify, make_response
 from services import (
     FileService,
     ValidatorService,
     TransformationService,
     ConverterService,
+    ConversionOptions,
+    SchemaService,
+    SerializerService,
+    QueryService,
+    FlattenService,
+    ProfileService,
+    SortService,
+    DedupeService,
+    AggregateService,
+    JoinService,
+    DiffService,
+    DatasetService,
+    ConversionResult,
 )
+from services.serializer_service import MIME_TYPES, ORIENTS
+from services.transformation_service import ENRICHED_FIELDS
+
+# Formatos de entrada que se pueden leer como registros
+DATA_SUFFIXES = (".csv", ".json", ".ndjson", ".jsonl")
 
 
 def create_app(config: dict = None) -> Flask:
@@ -17,6 +37,29 @@ def create_app(config: dict = None) -> Flask:
         {
             "UPLOAD_FOLDER": "uploads",
             "MAX_CONTENT_LENGTH": 16 * 1024 * 1024,  # 16MB max-limit
+            # La validación no guarda ni convierte el archivo: admite más
+            "MAX_VALIDATION_CONTENT_LENGTH": 512 * 1024 * 1024,
+            "VALIDATION_MAX_ERRORS": 100,
+            "INSPECT_SAMPLE_ROWS": 10,
+            "INSPECT_MAX_SAMPLE_ROWS": 1000,
+            # Registros por tramo ordenado en memoria antes de ir a disco
+            "SORT_RUN_SIZE": 50000,
+            # Claves exactas en memoria antes de volcarlas a disco
+            "DEDUPE_MAX_KEYS": 1000000,
+            # Filas y tasa de falsos positivos del modo aproximado (bloom)
+            "DEDUPE_BLOOM_CAPACITY": 10000000,
+            "DEDUPE_BLOOM_ERROR_RATE": 0.001,
+            # Grupos en memoria antes de repartir el resto en particiones
+            "AGGREGATE_MAX_GROUPS": 100000,
+            # Filas del lado pequeño de un join antes de particionar a disco
+            "JOIN_MAX_BUILD_ROWS": 100000,
+            # Filas de la versión antigua que se comparan en memoria
+            "DIFF_MAX_ROWS": 100000,
+            # Filas por fragmento al reconvertir versiones de un dataset
+            "INCREMENTAL_CHUNK_ROWS": 1000,
+            "UPLOAD_TTL": 15 * 60,  # segundos que se conserva una subida
+            "PAGE_SIZE": 100,
+            "MAX_WORKERS": os.cpu_count() or 1,
         }
     )
 
@@ -28,14 +71,663 @@ def create_app(config: dict = None) -> Flask:
     validator_service = ValidatorService()
     file_service = FileService(upload_path)
     transformation_service = TransformationService()
+    schema_service = SchemaService()
+    serializer_service = SerializerService()
+    query_service = QueryService()
+    flatten_service = FlattenService()
+    profile_service = ProfileService()
+    sort_service = SortService(file_service, app.config["SORT_RUN_SIZE"])
+    dedupe_service = DedupeService(
+        file_service,
+        app.config["DEDUPE_MAX_KEYS"],
+        app.config["DEDUPE_BLOOM_CAPACITY"],
+        app.config["DEDUPE_BLOOM_ERROR_RATE"],
+    )
+    aggregate_service = AggregateService(
+        file_service, app.config["AGGREGATE_MAX_GROUPS"]
+    )
+    join_service = JoinService(file_service, app.config["JOIN_MAX_BUILD_ROWS"])
+    diff_service = DiffService(file_service, app.config["DIFF_MAX_ROWS"])
     converter_service = ConverterService(
-        validator_service, file_service, transformation_service
+        validator_service,
+        file_service,
+        transformation_service,
+        schema_service,
+        query_service,
+        flatten_service,
+        sort_service,
+        dedupe_service,
+        serializer_service,
+        max_workers=app.config["MAX_WORKERS"],
     )
+    dataset_service = DatasetService(
+        upload_path, converter_service, app.config["INCREMENTAL_CHUNK_ROWS"]
+    )
+
+    def flag(name: str) -> bool:
+        return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+    def positive_int(name: str, default: int = None) -> int:
+        value = request.args.get(name, default, type=int)
+        if value is not None and value < 1:
+            raise ValueError(f"{name} must be a positive integer")
+        return value
+
+    def column_list(name: str) -> list:
+        value = request.args.get(name, "")
+        columns = (column.strip() for column in value.split(","))
+        return [column for column in columns if column]
+
+    def column_order() -> str:
+        order = request.args.get("column_order", "first_seen")
+        if order not in ("first_seen", "sorted"):
+            raise ValueError(f"Unsupported column_order: {order}")
+        return order
+
+    def conversion_options() -> ConversionOptions:
+        return ConversionOptions(
+            batch_size=positive_int("batch_size"),
+            infer_types=flag("infer_types"),
+            sample_size=positive_int("sample_size", 100),
+            columns=column_list("columns") or None,
+            where=[
+                query_service.parse_predicate(expression)
+                for expression in request.args.getlist("where")
+            ],
+            workers=min(positive_int("workers", 1), app.config["MAX_WORKERS"]),
+            union_columns=flag("union"),
+            column_order=column_order(),
+            flatten=flag("flatten"),
+            array_mode=request.args.get("arrays", "join"),
+            unflatten=flag("unflatten"),
+            encoding=request.args.get("encoding"),
+            delimiter=request.args.get("delimiter"),
+            quotechar=request.args.get("quotechar"),
+            escapechar=request.args.get("escapechar"),
+            max_errors=(
+                None if flag("all_errors") else positive_int("max_errors", 1)
+            ),
+            lenient=flag("lenient"),
+            schema_id=request.args.get("schema_id"),
+            sample_rows=positive_int("sample"),
+            seed=request.args.get("seed", type=int),
+            sort_by=sort_service.parse_sort(request.args.get("sort", ""))
+            or None,
+            dedupe=dedupe_mode(),
+            dedupe_on=column_list("dedupe_on") or None,
+        )
+
+    def dedupe_mode() -> str:
+        # dedupe=true equivale al modo exacto; dedupe_on lo activa también
+        mode = request.args.get("dedupe", "").lower()
+        if mode in ("1", "true", "yes"):
+            return "exact"
+        if not mode and "dedupe_on" in request.args:
+            return "exact"
+        return mode or None
+
+    def rejects_summary(rejects) -> dict:
+        # Los rechazos se conservan como descarga durante UPLOAD_TTL
+        rejects_id = None
+        if rejects.path:
+            rejects_id = file_service.retain_artifact(
+                rejects.path, app.config["UPLOAD_TTL"]
+            ).artifact_id
+        return {
+            "accepted_rows": rejects.accepted_rows,
+            "rejected_rows": rejects.rejected_rows,
+            "rejects_id": rejects_id,
+        }
+
+    def removed_duplicates(results):
+        # Total descartado al leer las entradas; se conoce al agotarlas
+        deduplicated = [r.duplicates for r in results if r.duplicates]
+        if not deduplicated:
+            return None
+        return lambda: sum(d.removed for d in deduplicated)
+
+    def rejects_headers(summary: dict) -> dict:
+        headers = {
+            "X-Accepted-Rows": str(summary["accepted_rows"]),
+            "X-Rejected-Rows": str(summary["rejected_rows"]),
+        }
+        if summary["rejects_id"]:
+            headers["X-Rejects-Id"] = summary["rejects_id"]
+        return headers
+
+    def encode_cursor(upload_id: str, offset: int, limit: int) -> str:
+        token = f"{upload_id}:{offset}:{limit}".encode()
+        return base64.urlsafe_b64encode(token).decode()
+
+    def decode_cursor(upload_id: str, cursor: str) -> tuple:
+        try:
+            token = base64.urlsafe_b64decode(cursor.encode()).decode()
+            cursor_upload, offset, limit = token.split(":")
+            offset, limit = int(offset), int(limit)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError("Invalid cursor") from None
+        if cursor_upload != upload_id or offset < 0 or limit < 1:
+            raise ValueError("Invalid cursor")
+        return offset, limit
+
+    def json_orient() -> str:
+        orient = request.args.get("orient")
+        if orient:
+            return orient
+        accept = request.headers.get("Accept", "")
+        if "ndjson" in accept or "jsonl" in accept:
+            return "ndjson"
+        if "orient=split" in accept.replace(" ", ""):
+            return "split"
+        return "records"
+
+    def remove_when_done(
+        response: Response, *paths: Path, cleanup=()
+    ) -> Response:
+        # La subida se lee mientras se envía la respuesta: se borra al
+        # terminar. call_on_close cubre las respuestas que se cierran sin
+        # haberse empezado a recorrer, cuyo finally no llega a ejecutarse
+        chunks = response.response
+        done = False
+
+        def remove() -> None:
+            nonlocal done
+            if done:
+                return
+            done = True
+            # Primero se cierran los lectores (necesario en Windows)
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+            # Se cierra antes lo que lee de los demás resultados
+            for close in cleanup:
+                close()
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+        def stream():
+            try:
+                yield from chunks
+            finally:
+                remove()
+
+        response.response = stream()
+        response.call_on_close(remove)
+        return response
+
+    def json_response(result, headers: dict = None, **extra) -> Response:
+        orient = json_orient()
+        if orient not in ORIENTS:
+            raise ValueError(f"Unsupported orient: {orient}")
+        if result.schema:
+            extra["schema"] = result.schema
+        if result.duplicates:
+            # Se conoce al terminar de recorrer los registros
+            extra["duplicates_removed"] = lambda: result.duplicates.removed
+        return Response(
+            serializer_service.iter_json(
+                result.records, orient, result.columns, **extra
+            ),
+            mimetype=MIME_TYPES[orient],
+            headers=headers,
+        )
 
     @app.route("/health")
     def health_check():
         return jsonify({"status": "healthy"})
 
+    @app.route("/api/v1/schemas", methods=["POST"])
+    def register_schema():
+        definition = request.get_json(silent=True)
+        try:
+            schema = schema_service.register_schema(definition)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return (
+            jsonify({"schema_id": schema.schema_id, **schema.definition}),
+            201,
+        )
+
+    @app.route("/api/v1/schemas/<schema_id>")
+    def get_schema(schema_id: str):
+        try:
+            schema = schema_service.get_schema(schema_id)
+        except KeyError:
+            return jsonify({"error": "Schema not found"}), 404
+        return jsonify({"schema_id": schema.schema_id, **schema.definition})
+
+    def validate_upload(suffixes: tuple):
+        # Debe fijarse antes de leer el formulario de la petición
+        request.max_content_length = app.config[
+            "MAX_VALIDATION_CONTENT_LENGTH"
+        ]
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(suffixes):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        try:
+            options = conversion_options()
+            if "max_errors" not in request.args and not flag("all_errors"):
+                options.max_errors = app.config["VALIDATION_MAX_ERRORS"]
+            result = converter_service.validate_upload(
+                file.stream, file.filename, options
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(
+            {
+                "valid": result.is_valid,
+                "errors": result.errors,
+                "row_count": result.row_count,
+                "column_count": result.column_count,
+            }
+        )
+
+    @app.route("/api/v1/validate/csv", methods=["POST"])
+    def validate_csv():
+        return validate_upload((".csv",))
+
+    @app.route("/api/v1/validate/json", methods=["POST"])
+    def validate_json():
+        return validate_upload((".json", ".ndjson", ".jsonl"))
+
+    @app.route("/api/v1/inspect", methods=["POST"])
+    def inspect_csv():
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(".csv"):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        try:
+            options = conversion_options()
+            sample_rows = min(
+                positive_int("rows", app.config["INSPECT_SAMPLE_ROWS"]),
+                app.config["INSPECT_MAX_SAMPLE_ROWS"],
+            )
+            file_path = file_service.save_file(file.read(), file.filename)
+            inspection = converter_service.inspect_csv(
+                file_path, sample_rows, options
+            )
+            info = file_service.get_file_info(file_path)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if "file_path" in locals():
+                file_path.unlink(missing_ok=True)
+        return Response(
+            serializer_service.dumps(
+                {
+                    "headers": inspection.headers,
+                    "sample": inspection.sample,
+                    "row_count": inspection.row_count,
+                    "encoding": inspection.encoding,
+                    "dialect": {
+                        "delimiter": inspection.dialect.delimiter,
+                        "quotechar": inspection.dialect.quotechar,
+                        "escapechar": inspection.dialect.escapechar,
+                    },
+                    "file": {
+                        "size": info.size,
+                        "created_at": info.created_at.isoformat(),
+                        "mime_type": info.mime_type,
+                    },
+                }
+            ),
+            mimetype="application/json",
+        )
+
+    @app.route("/api/v1/profile", methods=["POST"])
+    def profile_upload():
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(DATA_SUFFIXES):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        try:
+            options = conversion_options()
+            top_k = positive_int("top_k", 10)
+            file_path = file_service.save_file(file.read(), file.filename)
+            result = converter_service.read_records(file_path, options)
+            # Los campos que añade el enriquecimiento de JSON no son datos
+            exclude = ENRICHED_FIELDS
+            if file_path.suffix.lower() == ".csv":
+                exclude = ()
+            profile = profile_service.profile(result.records, top_k, exclude)
+            if result.rejects:
+                profile.update(rejects_summary(result.rejects))
+            if result.duplicates:
+                profile["duplicates_removed"] = result.duplicates.removed
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if "result" in locals():
+                result.close()
+            if "file_path" in locals():
+                file_path.unlink(missing_ok=True)
+        return Response(
+            serializer_service.dumps(profile), mimetype="application/json"
+        )
+
+    @app.route("/api/v1/aggregate", methods=["POST"])
+    def aggregate_upload():
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(DATA_SUFFIXES):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        streaming = False
+        try:
+            options = conversion_options()
+            # sort ordena los grupos de la salida, no los registros leídos
+            sort_by, options.sort_by = options.sort_by, None
+            group_by = column_list("group_by")
+            aggregates = aggregate_service.parse_aggregates(
+                request.args.getlist("agg")
+            )
+            output = request.args.get("format", "json")
+            if output not in ("json", "csv"):
+                raise ValueError(f"Unsupported format: {output}")
+            file_path = file_service.save_file(file.read(), file.filename)
+            result = converter_service.read_records(file_path, options)
+            headers = {}
+            extra = {}
+            if result.rejects:
+                # Se conservan ya: el archivo de rechazos no se pierde si la
+                # agregación falla
+                extra = rejects_summary(result.rejects)
+                headers = rejects_headers(extra)
+            groups = aggregate_service.aggregate(
+                result.records, group_by, aggregates, result.columns
+            )
+            columns = group_by + [aggregate.name for aggregate in aggregates]
+            if sort_by:
+                groups = sort_service.sort(groups, sort_by, columns)
+            if output == "csv":
+                headers["Content-Disposition"] = (
+                    "attachment; filename=aggregated.csv"
+                )
+                if result.duplicates:
+                    # La agregación ya ha leído toda la entrada
+                    headers["X-Duplicates-Removed"] = str(
+                        result.duplicates.removed
+                    )
+                response = Response(
+                    serializer_service.iter_csv(groups, columns),
+                    mimetype="text/csv",
+                    headers=headers,
+                )
+            else:
+                response = json_response(
+                    ConversionResult(
+                        groups, columns=columns, duplicates=result.duplicates
+                    ),
+                    headers,
+                    **extra,
+                )
+            streaming = True
+            return remove_when_done(
+                response, file_path, cleanup=[result.close]
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if "result" in locals() and not streaming:
+                result.close()
+            if "file_path" in locals() and not streaming:
+                file_path.unlink(missing_ok=True)
+
+    @app.route("/api/v1/join", methods=["POST"])
+    def join_uploads():
+        files = [request.files.get(name) for name in ("left", "right")]
+        if not all(files):
+            return (
+                jsonify({"error": "Two files (left, right) are required"}),
+                400,
+            )
+
+        if not all(file.filename for file in files):
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not all(file.filename.endswith(DATA_SUFFIXES) for file in files):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        paths = []
+        results = []
+        streaming = False
+        try:
+            options = conversion_options()
+            if options.lenient:
+                raise ValueError("lenient is not supported for joins")
+            # sort ordena el resultado del join, no cada archivo
+            sort_by, options.sort_by = options.sort_by, None
+            left_on = column_list("left_on") or column_list("on")
+            right_on = column_list("right_on") or column_list("on")
+            how = request.args.get("how", "inner")
+            output = request.args.get("format", "json")
+            if output not in ("json", "csv"):
+                raise ValueError(f"Unsupported format: {output}")
+            for file in files:
+                paths.append(
+                    file_service.save_file(file.read(), file.filename)
+                )
+            for path in paths:
+                results.append(converter_service.read_records(path, options))
+            left, right = results
+            # La tabla hash se construye con el archivo más pequeño
+            sizes = [file_service.get_file_info(path).size for path in paths]
+            joined = join_service.join(
+                left.records,
+                right.records,
+                left_on,
+                right_on,
+                how,
+                "left" if sizes[0] < sizes[1] else "right",
+                left.columns,
+                right.columns,
+            )
+            columns = None
+            if left.columns is not None and right.columns is not None:
+                columns = join_service.output_columns(
+                    left.columns, right.columns, left_on, right_on
+                )
+            if sort_by:
+                joined = sort_service.sort(joined, sort_by, columns)
+            cleanup = [result.close for result in results]
+            removed = removed_duplicates(results)
+            if output == "csv":
+                # Con dedupe el join se recorre antes de responder para
+                # enviar el total de duplicados en la cabecera
+                csv_result = converter_service.records_to_csv(
+                    joined, columns, buffered=removed is not None
+                )
+                cleanup.insert(0, csv_result.close)
+                headers = {
+                    "Content-Disposition": "attachment; filename=joined.csv"
+                }
+                if removed:
+                    headers["X-Duplicates-Removed"] = str(removed())
+                response = Response(
+                    csv_result.chunks, mimetype="text/csv", headers=headers
+                )
+            else:
+                extra = {"duplicates_removed": removed} if removed else {}
+                response = json_response(
+                    ConversionResult(joined, columns=columns), **extra
+                )
+            streaming = True
+            return remove_when_done(response, *paths, cleanup=cleanup)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if not streaming:
+                for result in results:
+                    result.close()
+                for path in paths:
+                    path.unlink(missing_ok=True)
+
+    @app.route("/api/v1/diff", methods=["POST"])
+    def diff_uploads():
+        files = [request.files.get(name) for name in ("old", "new")]
+        if not all(files):
+            return jsonify({"error": "Two files (old, new) are required"}), 400
+
+        if not all(file.filename for file in files):
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not all(file.filename.endswith(DATA_SUFFIXES) for file in files):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        paths = []
+        results = []
+        streaming = False
+        try:
+            options = conversion_options()
+            if options.lenient:
+                raise ValueError("lenient is not supported for diffs")
+            # sort ordena los cambios, no cada versión
+            sort_by, options.sort_by = options.sort_by, None
+            key = column_list("key")
+            output = request.args.get("format", "json")
+            if output not in ("json", "csv"):
+                raise ValueError(f"Unsupported format: {output}")
+            for file in files:
+                paths.append(
+                    file_service.save_file(file.read(), file.filename)
+                )
+            for path in paths:
+                results.append(converter_service.read_records(path, options))
+            old, new = results
+            diff = diff_service.diff(
+                old.records, new.records, key, old.columns, new.columns
+            )
+            changes = iter(diff)
+            if sort_by:
+                changes = sort_service.sort(changes, sort_by)
+            cleanup = [result.close for result in results]
+            removed = removed_duplicates(results)
+            if output == "csv":
+                # Las columnas se reúnen en una pasada previa: al responder
+                # ya se conocen los totales
+                csv_result = converter_service.records_to_csv(changes)
+                cleanup.insert(0, csv_result.close)
+                headers = {
+                    "Content-Disposition": "attachment; filename=diff.csv"
+                }
+                for change_type, count in diff.summary.items():
+                    name = change_type.capitalize()
+                    headers[f"X-{name}-Rows"] = str(count)
+                if removed:
+                    headers["X-Duplicates-Removed"] = str(removed())
+                response = Response(
+                    csv_result.chunks, mimetype="text/csv", headers=headers
+                )
+            else:
+                extra = {"duplicates_removed": removed} if removed else {}
+                response = json_response(
+                    ConversionResult(changes),
+                    summary=lambda: diff.summary,
+                    **extra,
+                )
+            streaming = True
+            return remove_when_done(response, *paths, cleanup=cleanup)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if not streaming:
+                for result in results:
+                    result.close()
+                for path in paths:
+                    path.unlink(missing_ok=True)
+
+    def version_summary(version) -> dict:
+        return {
+            "version": version.version,
+            "created_at": version.created_at.isoformat(),
+            "chunks": version.chunks,
+            "reused_chunks": version.reused_chunks,
+            "converted_chunks": version.converted_chunks,
+        }
+
+    @app.route("/api/v1/datasets/<dataset_id>/versions", methods=["POST"])
+    def convert_dataset_version(dataset_id: str):
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(".csv"):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        streaming = False
+        try:
+            options = conversion_options()
+            # Los fragmentos guardados son de registros: no hay otra salida
+            orient = json_orient()
+            if orient != "records":
+                raise ValueError(
+                    f"Unsupported orient for dataset versions: {orient}"
+                )
+            file_path = file_service.save_file(file.read(), file.filename)
+            conversion = dataset_service.convert_version(
+                dataset_id, file_path, options
+            )
+            extra = {}
+            if conversion.result.schema:
+                extra["schema"] = conversion.result.schema
+            # La versión se registra al terminar de enviar los datos
+            extra["dataset"] = lambda: {
+                "dataset_id": dataset_id,
+                **version_summary(conversion.version),
+            }
+            response = Response(
+                serializer_service.iter_json_fragments(conversion, **extra),
+                status=201,
+                mimetype="application/json",
+            )
+            streaming = True
+            return remove_when_done(response, file_path)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            if "file_path" in locals() and not streaming:
+                file_path.unlink(missing_ok=True)
+
+    @app.route("/api/v1/datasets/<dataset_id>")
+    def get_dataset(dataset_id: str):
+        try:
+            versions = dataset_service.get_versions(dataset_id)
+        except KeyError:
+            return jsonify({"error": "Dataset not found"}), 404
+        return jsonify(
+            {
+                "dataset_id": dataset_id,
+                "versions": [version_summary(v) for v in versions],
+            }
+        )
+
     @app.route("/api/v1/convert/csv-to-json", methods=["POST"])
     def convert_csv_to_json():
         if "file" not in request.files:
@@ -48,18 +740,101 @@ def create_app(config: dict = None) -> Flask:
         if not file.filename.endswith(".csv"):
             return jsonify({"error": "Unsupported file type"}), 400
 
+        streaming = False
         try:
+            options = conversion_options()
             file_path = file_service.save_file(file.read(), file.filename)
-            result = converter_service.csv_to_json(file_path)
-            return jsonify(
-                {"data": result, "message": "Conversion successful"}
+            result = converter_service.convert_csv(file_path, options)
+            extra, headers = {}, None
+            if result.rejects:
+                extra = rejects_summary(result.rejects)
+                headers = rejects_headers(extra)
+            response = json_response(
+                result, headers, message="Conversion successful", **extra
             )
+            streaming = True
+            return remove_when_done(response, file_path)
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
         finally:
-            if "file_path" in locals():
+            if "file_path" in locals() and not streaming:
                 file_path.unlink(missing_ok=True)
 
+    @app.route("/api/v1/uploads", methods=["POST"])
+    def retain_upload():
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files["file"]
+        if not file.filename:
+            return jsonify({"error": "Empty filename"}), 400
+
+        if not file.filename.endswith(".csv"):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        try:
+            retained = converter_service.retain_csv(
+                file.stream,
+                file.filename,
+                app.config["UPLOAD_TTL"],
+                conversion_options(),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return (
+            jsonify(
+                {
+                    "upload_id": retained.upload_id,
+                    "row_count": retained.index.row_count,
+                    "expires_at": retained.expires_at.isoformat(),
+                }
+            ),
+            201,
+        )
+
+    @app.route("/api/v1/uploads/<upload_id>/csv-to-json")
+    def convert_retained_csv_to_json(upload_id: str):
+        try:
+            retained = file_service.get_retained(upload_id)
+        except KeyError:
+            return jsonify({"error": "Upload not found or expired"}), 404
+
+        try:
+            if "cursor" in request.args:
+                offset, limit = decode_cursor(
+                    upload_id, request.args["cursor"]
+                )
+            else:
+                offset = request.args.get("offset", 0, type=int)
+                limit = positive_int("limit", app.config["PAGE_SIZE"])
+                if offset < 0:
+                    raise ValueError("offset must not be negative")
+            options = conversion_options()
+            result = converter_service.convert_csv_window(
+                retained, offset, limit, options
+            )
+            total_rows = retained.index.row_count
+            next_offset = offset + limit
+            next_cursor = (
+                encode_cursor(upload_id, next_offset, limit)
+                if next_offset < total_rows
+                else None
+            )
+            headers = {"X-Total-Rows": str(total_rows)}
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            return json_response(
+                result,
+                headers,
+                offset=offset,
+                limit=limit,
+                total_rows=total_rows,
+                next_cursor=next_cursor,
+                message="Conversion successful",
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
     @app.route("/api/v1/convert/json-to-csv", methods=["POST"])
     def convert_json_to_csv():
         if "file" not in request.files:
@@ -69,26 +844,72 @@ def create_app(config: dict = None) -> Flask:
         if not file.filename:
             return jsonify({"error": "Empty filename"}), 400
 
-        if not file.filename.endswith(".json"):
+        if not file.filename.endswith((".json", ".ndjson", ".jsonl")):
             return jsonify({"error": "Unsupported file type"}), 400
 
+        streaming = False
         try:
+            options = conversion_options()
             file_path = file_service.save_file(file.read(), file.filename)
-            result = converter_service.json_to_csv(file_path)
-
-            output = io.BytesIO(result.encode("utf-8"))
-
-            return send_file(
-                output,
-                mimetype="text/csv",
-                as_attachment=True,
-                download_name="converted.csv",
+            if flag("tables"):
+                tables = converter_service.json_to_tables(file_path, options)
+                headers = {
+                    "Content-Disposition": "attachment; filename=converted.zip"
+                }
+                if tables.rejects:
+                    headers.update(
+                        rejects_headers(rejects_summary(tables.rejects))
+                    )
+                if tables.duplicates:
+                    headers["X-Duplicates-Removed"] = str(
+                        tables.duplicates.removed
+                    )
+                response = Response(
+                    file_service.iter_file(tables.path),
+                    mimetype="application/zip",
+                    headers=headers,
+                )
+                streaming = True
+                return remove_when_done(response, tables.path)
+            result = converter_service.convert_json_to_csv(file_path, options)
+            headers = {
+                "Content-Disposition": "attachment; filename=converted.csv"
+            }
+            if result.rejects:
+                headers.update(
+                    rejects_headers(rejects_summary(result.rejects))
+                )
+            if result.duplicates:
+                headers["X-Duplicates-Removed"] = str(
+                    result.duplicates.removed
+                )
+            response = Response(
+                result.chunks, mimetype="text/csv", headers=headers
             )
+            streaming = True
+            return remove_when_done(response, cleanup=[result.close])
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
         finally:
+            # El JSON ya se ha leído entero: la subida se borra ya
             if "file_path" in locals():
                 file_path.unlink(missing_ok=True)
+            if "result" in locals() and not streaming:
+                result.close()
+
+    @app.route("/api/v1/rejects/<rejects_id>")
+    def download_rejects(rejects_id: str):
+        try:
+            artifact = file_service.get_artifact(rejects_id)
+        except KeyError:
+            return jsonify({"error": "Rejects not found or expired"}), 404
+        return Response(
+            file_service.iter_file(artifact.path),
+            mimetype="application/x-ndjson",
+            headers={
+                "Content-Disposition": "attachment; filename=rejects.ndjson"
+            },
+        )
 
     return app
 
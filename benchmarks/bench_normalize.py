@@ -0,0 +1,48 @@
+"""Compara el bucle por filas de csv_to_json con el modo por lotes.
+
+Uso: python benchmarks/bench_normalize.py [filas] [batch_size]
+"""
+
+import csv
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import TransformationService  # noqa: E402
+from services.transformation_service import np  # noqa: E402
+
+
+def make_lines(count: int):
+    lines = ["name,age,city,country,state"]
+    lines.extend(
+        f"  person {i} , {20 + i % 50} , new york ,usa , ny"
+        for i in range(count)
+    )
+    return lines
+
+
+def main() -> None:
+    rows_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    lines = make_lines(rows_count)
+    service = TransformationService()
+
+    def loop():
+        service.normalize_csv_data(list(csv.DictReader(lines)))
+
+    def batches():
+        reader = csv.reader(lines)
+        headers = next(reader)
+        for _ in service.normalize_csv_batches(headers, reader, batch_size):
+            pass
+
+    print(f"rows={rows_count} batch_size={batch_size} numpy={np is not None}")
+    for name, func in (("loop", loop), ("batches", batches)):
+        best = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"{name:>8}: {best:.3f}s ({rows_count / best:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
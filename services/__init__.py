@@ -1,4 +1,29 @@
-from .validator_service import ValidatorService
-from .file_service import FileService
+from .validator_service import RejectedRow, ValidatorService
+from .file_service import (
+    CsvDialect,
+    FileService,
+    RetainedFile,
+    RowIndex,
+    SpillPartition,
+)
 from .transformation_service import TransformationService
-from .converter_service import ConverterService
+from .schema_service import CompiledSchema, SchemaService
+from .serializer_service import SerializerService
+from .query_service import QueryService, Predicate
+from .flatten_service import FlattenService
+from .profile_service import ProfileService
+from .sort_service import SortService
+from .dedupe_service import DedupeService
+from .aggregate_service import Aggregate, AggregateService
+from .join_service import JoinService
+from .diff_service import DiffService
+from .converter_service import (
+    ConverterService,
+    ConversionOptions,
+    ConversionResult,
+    CsvInspection,
+    CsvResult,
+    RejectsReport,
+    TablesResult,
+)
+from .dataset_service import DatasetService, DatasetVersion
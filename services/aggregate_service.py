@@ -0,0 +1,244 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .file_service import FileService, SpillPartition
+from .schema_service import FLOAT_PATTERN, INT_PATTERN
+
+AGGREGATES = ("count", "sum", "min", "max", "mean")
+# Grupos que se acumulan en memoria antes de repartir el resto a disco
+MAX_GROUPS = 100000
+SPILL_PARTITIONS = 16
+
+# Clave del grupo y valores de las columnas agregadas de un registro
+Row = Tuple[tuple, list]
+
+
+@dataclass
+class Aggregate:
+    function: str
+    column: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self.column is None:
+            return self.function
+        return f"{self.function}_{self.column}"
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if INT_PATTERN.fullmatch(value):
+            return int(value)
+        if FLOAT_PATTERN.fullmatch(value):
+            return float(value)
+    return None
+
+
+def _group_value(value: Any) -> Any:
+    # Objetos y listas no son hashables: se agrupan por su JSON
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+class AggregateService:
+    def __init__(
+        self,
+        file_service: FileService,
+        max_groups: int = MAX_GROUPS,
+        partitions: int = SPILL_PARTITIONS,
+    ):
+        self.file_service = file_service
+        self.max_groups = max_groups
+        self.partitions = partitions
+
+    def parse_aggregates(self, expressions: Iterable[str]) -> List[Aggregate]:
+        """Convierte "count", "sum:amount"... en agregados.
+
+        count sin columna cuenta filas; con columna, valores no nulos. Sin
+        ninguna expresión se cuentan las filas.
+        """
+        aggregates = []
+        for expression in expressions:
+            for part in expression.split(","):
+                function, _, column = part.strip().partition(":")
+                if not function:
+                    continue
+                if function not in AGGREGATES:
+                    raise ValueError(f"Unsupported aggregate: {function}")
+                column = column.strip() or None
+                if column is None and function != "count":
+                    raise ValueError(f"Aggregate {function} needs a column")
+                aggregates.append(Aggregate(function, column))
+        return aggregates or [Aggregate("count")]
+
+    def aggregate(
+        self,
+        records: Iterable[Dict],
+        group_by: List[str],
+        aggregates: List[Aggregate],
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """Agrupa los registros y calcula los agregados de cada grupo.
+
+        Es una agregación hash en streaming: se acumula un estado por grupo
+        y, cuando hay más de max_groups grupos, las filas de grupos nuevos
+        se reparten por hash en archivos temporales que se agregan después,
+        uno a uno. Los grupos salen en orden de aparición dentro de cada
+        partición. sum, min, max y mean usan solo los valores numéricos.
+        La entrada se agrega entera al llamar, así que sus errores y los
+        totales de la lectura (duplicados, por ejemplo) se conocen antes de
+        devolver. Sin columnas (JSON) se desconocen las que no aparecen en
+        ningún registro.
+        """
+        aggregates = aggregates or [Aggregate("count")]
+        needed = group_by + [a.column for a in aggregates if a.column]
+        if columns is not None:
+            for column in needed:
+                if column not in columns:
+                    raise ValueError(f"Unknown column: {column}")
+        else:
+            records = self._check_seen(records, needed)
+        rows = (
+            (
+                tuple(_group_value(record.get(c)) for c in group_by),
+                [record.get(a.column) for a in aggregates if a.column],
+            )
+            for record in records
+        )
+        groups = self._hash_aggregate(rows, group_by, aggregates, 0)
+        primed = self._primed(groups)
+        next(primed)
+        return primed
+
+    def _primed(self, groups: Iterator[Dict]) -> Iterator[Dict]:
+        # La agregación lee toda la entrada antes del primer grupo: se pide
+        # al llamar para que los errores salgan antes de responder
+        try:
+            first = next(groups, None)
+            yield
+            if first is not None:
+                yield first
+            yield from groups
+        finally:
+            groups.close()
+
+    def _check_seen(
+        self, records: Iterable[Dict], columns: List[str]
+    ) -> Iterator[Dict]:
+        missing = set(columns)
+        seen = False
+        for record in records:
+            seen = True
+            if missing:
+                missing.difference_update(record.keys())
+            yield record
+        # Sin registros no hay forma de saber qué columnas existen
+        if seen and missing:
+            column = next(c for c in columns if c in missing)
+            raise ValueError(f"Unknown column: {column}")
+
+    def _hash_aggregate(
+        self,
+        rows: Iterable[Row],
+        group_by: List[str],
+        aggregates: List[Aggregate],
+        level: int,
+    ) -> Iterator[Dict]:
+        groups: Dict[tuple, list] = {}
+        partitions: List[SpillPartition] = []
+        try:
+            for key, values in rows:
+                state = groups.get(key)
+                if state is None:
+                    if len(groups) >= self.max_groups:
+                        if not partitions:
+                            partitions = self.file_service.create_partitions(
+                                self.partitions, ".agg"
+                            )
+                        # El nivel cambia el reparto en cada recursión
+                        index = hash((level, key)) % self.partitions
+                        partitions[index].write((key, values))
+                        continue
+                    state = groups[key] = self._initial(aggregates)
+                self._update(state, values, aggregates)
+            for key, state in groups.items():
+                yield self._result(key, state, group_by, aggregates)
+            groups.clear()
+            for partition in partitions:
+                partition.close()
+                reader = partition.read()
+                try:
+                    yield from self._hash_aggregate(
+                        reader, group_by, aggregates, level + 1
+                    )
+                finally:
+                    # Se cierra antes de borrar (necesario en Windows)
+                    reader.close()
+                partition.discard()
+        finally:
+            for partition in partitions:
+                partition.discard()
+
+    def _initial(self, aggregates: List[Aggregate]) -> list:
+        state = []
+        for aggregate in aggregates:
+            if aggregate.function == "count":
+                state.append(0)
+            elif aggregate.function == "mean":
+                state.append([0, 0])
+            else:
+                state.append(None)
+        return state
+
+    def _update(
+        self, state: list, values: list, aggregates: List[Aggregate]
+    ) -> None:
+        position = 0
+        for i, aggregate in enumerate(aggregates):
+            if aggregate.column is None:
+                state[i] += 1
+                continue
+            value = values[position]
+            position += 1
+            function = aggregate.function
+            if function == "count":
+                if value is not None and value != "":
+                    state[i] += 1
+                continue
+            number = _number(value)
+            if number is None:
+                continue
+            current = state[i]
+            if function == "mean":
+                current[0] += number
+                current[1] += 1
+            elif current is None:
+                state[i] = number
+            elif function == "sum":
+                state[i] = current + number
+            elif function == "min":
+                if number < current:
+                    state[i] = number
+            elif number > current:
+                state[i] = number
+
+    def _result(
+        self,
+        key: tuple,
+        state: list,
+        group_by: List[str],
+        aggregates: List[Aggregate],
+    ) -> Dict:
+        result = dict(zip(group_by, key))
+        for aggregate, value in zip(aggregates, state):
+            if aggregate.function == "mean":
+                total, count = value
+                value = total / count if count else None
+            result[aggregate.name] = value
+        return result
@@ -1,11 +1,175 @@
 from pathlib import Path
+from collections import deque
+import atexit
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import csv
+import hashlib
 import json
 import io
-from typing import Dict, List
-from .validator_service import ValidatorService
-from .file_service import FileService
-from .transformation_service import TransformationService
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from itertools import chain, islice
+import zipfile
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+from werkzeug.utils import secure_filename
+from .validator_service import (
+    RejectedRow,
+    ValidationResult,
+    ValidatorService,
+)
+from .file_service import (
+    DIALECT_SAMPLE_SIZE,
+    ENCODING_SAMPLE_SIZE,
+    CsvDialect,
+    FileService,
+    RetainedFile,
+)
+from .transformation_service import ENRICHED_FIELDS, TransformationService
+from .schema_service import CompiledSchema, SchemaService
+from .query_service import Predicate, QueryService
+from .flatten_service import FlattenService
+from .sort_service import SortService
+from .dedupe_service import DIGEST_SIZE, DedupeService, Deduplicated, digest
+from .serializer_service import SerializerService
+
+# Filas que se normalizan juntas en el modo por filas
+CHUNK_SIZE = 1000
+# Líneas JSON Lines que se decodifican juntas (y por proceso, en paralelo)
+JSON_LINES_BLOCK = 5000
+JSON_LINES_SUFFIXES = (".ndjson", ".jsonl")
+# Errores de línea que se incluyen en el mensaje, salvo con all_errors
+MAX_REPORTED_ERRORS = 20
+# Tabla de los registros de primer nivel en la salida relacional
+PARENT_TABLE = "records"
+# Columna de cada tabla hija con el record_id de su registro padre
+LINK_COLUMN = "record_id"
+# Nombre del archivo de filas rechazadas dentro del zip de tablas
+REJECTS_NAME = "rejects.ndjson"
+# Filas por fragmento, aproximadas, en la conversión incremental
+INCREMENTAL_CHUNK_ROWS = 1000
+# Bytes que se copian de cada vez al conservar una subida
+RETAIN_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class ConversionOptions:
+    batch_size: Optional[int] = None
+    infer_types: bool = False
+    sample_size: int = 100
+    columns: Optional[List[str]] = None
+    where: List[Predicate] = field(default_factory=list)
+    workers: Optional[int] = None
+    union_columns: bool = False
+    column_order: str = "first_seen"
+    flatten: bool = False
+    array_mode: str = "join"
+    unflatten: bool = False
+    encoding: Optional[str] = None
+    delimiter: Optional[str] = None
+    quotechar: Optional[str] = None
+    escapechar: Optional[str] = None
+    max_errors: Optional[int] = 1
+    lenient: bool = False
+    schema_id: Optional[str] = None
+    sample_rows: Optional[int] = None
+    seed: Optional[int] = None
+    sort_by: Optional[List[str]] = None
+    dedupe: Optional[str] = None
+    dedupe_on: Optional[List[str]] = None
+
+
+@dataclass
+class RejectsReport:
+    """Recuento del modo tolerante; path es None si no hubo rechazos."""
+
+    accepted_rows: int
+    rejected_rows: int
+    path: Optional[Path] = None
+
+
+@dataclass
+class ConversionResult:
+    records: Iterator[Dict]
+    schema: Optional[Dict[str, str]] = None
+    columns: Optional[List[str]] = None
+    rejects: Optional[RejectsReport] = None
+    duplicates: Optional[Deduplicated] = None
+    # Archivos temporales que se leen al recorrer records
+    spill_paths: List[Path] = field(default_factory=list)
+
+    def close(self) -> None:
+        """Deja de leer records y borra sus archivos temporales."""
+        close = getattr(self.records, "close", None)
+        if close:
+            close()
+        for path in self.spill_paths:
+            path.unlink(missing_ok=True)
+
+
+@dataclass
+class TablesResult:
+    # Zip con las tablas; el llamante debe borrarlo
+    path: Path
+    rejects: Optional[RejectsReport] = None
+    duplicates: Optional[Deduplicated] = None
+
+
+@dataclass
+class CsvInspection:
+    headers: List[str]
+    sample: List[Dict]
+    row_count: int
+    encoding: str
+    dialect: CsvDialect
+
+
+@dataclass
+class IncrementalResult:
+    # JSON de los registros de cada fragmento, sin los corchetes
+    fragments: Iterator[str]
+    schema: Optional[Dict[str, str]] = None
+
+
+class ChunkStore(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def put(self, key: str, fragment: str) -> None: ...
+
+
+@dataclass
+class CsvResult:
+    chunks: Iterator[str]
+    rejects: Optional[RejectsReport] = None
+    duplicates: Optional[Deduplicated] = None
+    # Archivos temporales que se leen al recorrer chunks
+    spill_paths: List[Path] = field(default_factory=list)
+
+    def close(self) -> None:
+        """Deja de leer chunks y borra sus archivos temporales.
+
+        Los generadores borran lo suyo al terminar, pero si chunks no se
+        llega a recorrer su finally nunca se ejecuta.
+        """
+        close = getattr(self.chunks, "close", None)
+        if close:
+            close()
+        for path in self.spill_paths:
+            path.unlink(missing_ok=True)
 
 
 class ConverterService:
@@ -14,35 +178,1054 @@ class ConverterService:
         validator_service: ValidatorService,
         file_service: FileService,
         transformation_service: TransformationService,
+        schema_service: Optional[SchemaService] = None,
+        query_service: Optional[QueryService] = None,
+        flatten_service: Optional[FlattenService] = None,
+        sort_service: Optional[SortService] = None,
+        dedupe_service: Optional[DedupeService] = None,
+        serializer_service: Optional[SerializerService] = None,
+        max_workers: Optional[int] = None,
     ):
         self.validator_service = validator_service
         self.file_service = file_service
         self.transformation_service = transformation_service
+        self.schema_service = schema_service or SchemaService()
+        self.query_service = query_service or QueryService()
+        self.flatten_service = flatten_service or FlattenService()
+        self.sort_service = sort_service or SortService(file_service)
+        self.dedupe_service = dedupe_service or DedupeService(file_service)
+        self.serializer_service = serializer_service or SerializerService()
+        # Procesos compartidos por todas las conversiones con workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        """Detiene los procesos de decodificación, si se llegaron a crear."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            atexit.unregister(self.shutdown)
+            executor.shutdown()
+
+    def csv_to_json(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> List[Dict]:
+        return list(self.convert_csv(file_path, options).records)
+
+    def convert_csv(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> ConversionResult:
+        """Valida el CSV y devuelve sus registros normalizados bajo demanda.
+
+        En modo tolerante las filas con otro número de columnas no detienen
+        la conversión: se escriben, con su línea y motivo, en un archivo de
+        rechazos (JSON Lines) que el llamante debe borrar.
+        """
+        options = options or ConversionOptions()
+        schema = self._registered_schema(options)
+        rejects = self._rejects_file() if options.lenient else None
+        try:
+            headers, rows, validation = self._validated_csv(
+                file_path, options, rejects
+            )
+        except BaseException:
+            if rejects:
+                rejects.discard()
+            raise
+
+        if rejects:
+            # Las mismas filas que el validador ha pasado a rechazos
+            check_row = schema.bind(headers) if schema else None
+            rows = (
+                row
+                for row in rows
+                if not row
+                or len(row) == len(headers)
+                and not (check_row and check_row(row))
+            )
+            rejects.accepted = validation.row_count - rejects.count
+        try:
+            result = self._convert_rows(headers, rows, options)
+        except BaseException:
+            if rejects:
+                rejects.discard()
+            raise
+        if rejects:
+            result.rejects = rejects.report()
+        return result
+
+    def convert_csv_incremental(
+        self,
+        file_path: Path,
+        store: ChunkStore,
+        options: Optional[ConversionOptions] = None,
+        chunk_rows: int = INCREMENTAL_CHUNK_ROWS,
+    ) -> IncrementalResult:
+        """Convierte un CSV por fragmentos reutilizando los ya convertidos.
+
+        Las filas se cortan en fragmentos según su contenido y cada uno se
+        identifica por el hash de sus filas y de las opciones; si `store`
+        ya tiene su salida se reutiliza sin normalizarlo ni convertirlo.
+        Solo admite las opciones que actúan fila a fila: con infer_types el
+        esquema se infiere una vez, con las primeras filas del archivo.
+        """
+        options = options or ConversionOptions()
+        for name in ("lenient", "sample_rows", "sort_by", "dedupe"):
+            if getattr(options, name):
+                raise ValueError(
+                    f"{name} is not supported for incremental conversion"
+                )
+        headers, rows, _ = self._validated_csv(file_path, options)
+        schema = None
+        if options.infer_types and not options.schema_id:
+            sample = list(islice(rows, options.sample_size))
+            schema = self._convert_rows(headers, sample, options).schema
+            rows = chain(sample, rows)
+        # Sin filas: compila where, columns y unflatten para que sus errores
+        # salgan al llamar y, con schema_id, da los tipos registrados para
+        # la respuesta y la huella
+        types = self._convert_rows(headers, [], options, schema).schema
+        # El paralelismo no cambia la salida: no invalida lo ya convertido
+        settings = replace(options, workers=None, batch_size=None)
+        fingerprint = digest((headers, types, repr(settings))).hex()
+
+        def fragments() -> Iterator[str]:
+            for chunk_hash, chunk in _content_chunks(rows, chunk_rows):
+                key = f"{fingerprint}-{chunk_hash}"
+                fragment = store.get(key)
+                if fragment is None:
+                    result = self._convert_rows(
+                        headers, chunk, options, schema
+                    )
+                    fragment = self.serializer_service.dumps(
+                        list(result.records)
+                    )[1:-1]
+                    store.put(key, fragment)
+                if fragment:
+                    yield fragment
+
+        return IncrementalResult(fragments(), types)
 
-    def csv_to_json(self, file_path: Path) -> List[Dict]:
-        content = file_path.read_text()
-        validation = self.validator_service.validate_csv_structure(content)
+    def _validated_csv(
+        self,
+        file_path: Path,
+        options: ConversionOptions,
+        rejects: Optional["_RejectsFile"] = None,
+    ) -> Tuple[List[str], Iterator[List[str]], ValidationResult]:
+        # Valida el archivo entero y devuelve las filas para una segunda
+        # lectura, ya con la codificación y el dialecto detectados
+        encoding = self.file_service.resolve_encoding(
+            file_path, options.encoding
+        )
+        dialect = self.file_service.detect_dialect(
+            file_path,
+            encoding,
+            options.delimiter,
+            options.quotechar,
+            options.escapechar,
+        )
+        with self.file_service.open_text(file_path, encoding) as text:
+            validation = self.validator_service.validate_csv_rows(
+                dialect.reader(text),
+                options.max_errors,
+                rejects.write if rejects else None,
+                self._registered_schema(options),
+            )
         if not validation.is_valid:
-            raise ValueError(validation.errors[0])
+            raise ValueError(
+                _error_message(validation.errors, options.max_errors)
+            )
+        headers, rows = self._read_csv(file_path, encoding, dialect)
+        return headers, rows, validation
+
+    def _read_csv(
+        self, file_path: Path, encoding: str, dialect: CsvDialect
+    ) -> Tuple[List[str], Iterator[List[str]]]:
+        """Lee la cabecera y devuelve un iterador perezoso de filas.
+
+        El archivo se decodifica por bloques. Las filas lo vuelven a abrir
+        al empezar a recorrerse y lo cierran al agotarse, de modo que no
+        queda abierto si no se llegan a leer.
+        """
+        with self.file_service.open_text(file_path, encoding) as text:
+            headers = next((row for row in dialect.reader(text) if row), [])
+
+        def rows() -> Iterator[List[str]]:
+            with self.file_service.open_text(file_path, encoding) as text:
+                reader = dialect.reader(text)
+                # La cabecera ya se ha leído
+                next((row for row in reader if row), None)
+                yield from reader
+
+        return headers, rows()
+
+    def inspect_csv(
+        self,
+        file_path: Path,
+        sample_rows: int,
+        options: Optional[ConversionOptions] = None,
+    ) -> CsvInspection:
+        """Lee la cabecera y las primeras filas sin validar ni convertir todo.
+
+        Las filas de muestra pasan por la misma conversión que csv-to-json;
+        el número de filas se obtiene contando sobre un mmap del archivo.
+        """
+        options = options or ConversionOptions()
+        encoding = self.file_service.resolve_encoding(
+            file_path, options.encoding
+        )
+        dialect = self.file_service.detect_dialect(
+            file_path,
+            encoding,
+            options.delimiter,
+            options.quotechar,
+            options.escapechar,
+        )
+        with self.file_service.open_text(file_path, encoding) as text:
+            reader = dialect.reader(text)
+            try:
+                headers = next((row for row in reader if row), [])
+                result = self._convert_rows(
+                    headers, islice(reader, sample_rows), options
+                )
+                sample = list(result.records)
+            except csv.Error as e:
+                raise ValueError(str(e)) from None
+        row_count = self.file_service.count_rows(
+            file_path, dialect, encoding=encoding
+        )
+        return CsvInspection(headers, sample, row_count, encoding, dialect)
+
+    def retain_csv(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        ttl_seconds: int,
+        options: Optional[ConversionOptions] = None,
+    ) -> RetainedFile:
+        """Valida y conserva un CSV para convertirlo luego por ventanas.
+
+        El archivo conservado se guarda siempre en UTF-8, de modo que el
+        índice de filas pueda buscar saltos de línea byte a byte; el
+        dialecto detectado se conserva para leer cada ventana. Como en
+        validate_upload, el stream se recorre por bloques y debe poder
+        volver al principio.
+        """
+        options = options or ConversionOptions()
+        if options.encoding:
+            encoding = self.file_service.normalize_encoding(options.encoding)
+        else:
+            encoding = self.file_service.detect_sample_encoding(
+                stream.read(ENCODING_SAMPLE_SIZE)
+            )
+            stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+        try:
+            dialect = self._sniff_stream(text, options)
+            validation = self.validator_service.validate_csv_rows(
+                dialect.reader(text),
+                options.max_errors,
+                schema=self._registered_schema(options),
+            )
+        finally:
+            text.detach()
+        if not validation.is_valid:
+            raise ValueError(
+                _error_message(validation.errors, options.max_errors)
+            )
+        stream.seek(0)
+        blocks = iter(lambda: stream.read(RETAIN_BLOCK_SIZE), b"")
+        if codecs.lookup(encoding).name != "utf-8":
+            blocks = (
+                chunk.encode("utf-8")
+                for chunk in codecs.iterdecode(blocks, encoding)
+            )
+        return self.file_service.retain_file(
+            blocks, filename, ttl_seconds, dialect
+        )
+
+    def convert_csv_window(
+        self,
+        retained: RetainedFile,
+        offset: int,
+        limit: int,
+        options: Optional[ConversionOptions] = None,
+    ) -> ConversionResult:
+        """Convierte solo las filas [offset, offset + limit) del CSV.
+
+        El índice de filas permite saltar directamente al byte de la fila
+        más cercana, sin leer ni convertir lo anterior.
+        """
+        options = options or ConversionOptions()
+        index = retained.index
+        dialect = retained.dialect
+        with retained.path.open("rb") as file:
+            header = file.read(index.header_end).decode("utf-8")
+        header_rows = dialect.reader(io.StringIO(header, newline=""))
+        headers = next((row for row in header_rows if row), [])
+        position, skip = index.locate(offset)
+
+        def window_rows() -> Iterator[List[str]]:
+            with retained.path.open("rb") as file:
+                file.seek(position)
+                text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+                rows = (row for row in dialect.reader(text) if row)
+                yield from islice(rows, skip, skip + limit)
+
+        return self._convert_rows(headers, window_rows(), options)
+
+    def validate_upload(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        options: Optional[ConversionOptions] = None,
+    ) -> ValidationResult:
+        """Valida una subida leyéndola del stream, sin guardarla ni convertirla.
+
+        El stream debe poder volver al principio: se leen unas muestras para
+        detectar la codificación y el dialecto y luego se valida de una sola
+        pasada, decodificando por bloques.
+        """
+        options = options or ConversionOptions()
+        if options.encoding:
+            encoding = self.file_service.normalize_encoding(options.encoding)
+        else:
+            encoding = self.file_service.detect_sample_encoding(
+                stream.read(ENCODING_SAMPLE_SIZE)
+            )
+            stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+        try:
+            suffix = Path(filename).suffix.lower()
+            if suffix in JSON_LINES_SUFFIXES:
+                return self.validator_service.validate_json_lines_stream(
+                    text, options.max_errors
+                )
+            if suffix == ".json":
+                return self.validator_service.validate_json_stream(
+                    text, options.max_errors
+                )
+            dialect = self._sniff_stream(text, options)
+            return self.validator_service.validate_csv_rows(
+                dialect.reader(text),
+                options.max_errors,
+                schema=self._registered_schema(options),
+            )
+        finally:
+            # El stream pertenece al llamante: no se cierra con el envoltorio
+            text.detach()
+
+    def _sniff_stream(
+        self, text: TextIO, options: ConversionOptions
+    ) -> CsvDialect:
+        # Detecta el dialecto con una muestra y vuelve al principio
+        sample = text.read(DIALECT_SAMPLE_SIZE)
+        complete = not text.read(1)
+        text.seek(0)
+        return self.file_service.sniff_dialect(
+            sample,
+            options.delimiter,
+            options.quotechar,
+            options.escapechar,
+            complete,
+        )
+
+    def _convert_rows(
+        self,
+        headers: List[str],
+        rows: Iterable[List[str]],
+        options: ConversionOptions,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> ConversionResult:
+        headers, rows, duplicates = self._pushdown(headers, rows, options)
+        records = self._normalized_records(headers, rows, options)
+        registered = self._registered_schema(options)
+        if schema is not None:
+            # Esquema ya inferido en otra llamada (conversión por fragmentos)
+            parsers = self.schema_service.compile_parsers(schema)
+            records = (
+                self.schema_service.apply_parsers(parsers, record)
+                for record in records
+            )
+        elif registered:
+            # Tipos ya validados en la pasada de validación: sin inferencia
+            schema = {
+                column: registered.types[column]
+                for column in headers
+                if column in registered.types
+            }
+            records = (
+                self.schema_service.apply_parsers(registered.parsers, record)
+                for record in records
+            )
+        elif options.infer_types:
+            sample = list(islice(records, options.sample_size))
+            schema = self.schema_service.infer_schema(sample)
+            parsers = self.schema_service.compile_parsers(schema)
+            records = (
+                self.schema_service.apply_parsers(parsers, record)
+                for record in chain(sample, records)
+            )
+
+        if options.sort_by:
+            records = self.sort_service.sort(records, options.sort_by, headers)
+        columns = headers
+        if options.unflatten:
+            build = self.flatten_service.compile_unflatten(headers)
+            records = map(build, records)
+            columns = list(dict.fromkeys(h.split(".")[0] for h in headers))
+        return ConversionResult(
+            records=records,
+            schema=schema,
+            columns=columns,
+            duplicates=duplicates,
+        )
+
+    def _pushdown(
+        self,
+        headers: List[str],
+        rows: Iterable[List[str]],
+        options: ConversionOptions,
+    ) -> Tuple[List[str], Iterable[Sequence[str]], Optional[Deduplicated]]:
+        # Se descartan filas vacías, igual que csv.DictReader
+        rows = (row for row in rows if row)
+        if options.where:
+            row_filter = self.query_service.compile_filter(
+                headers, options.where
+            )
+            rows = filter(row_filter, rows)
+        if options.columns:
+            headers, project = self.query_service.compile_projection(
+                headers, options.columns
+            )
+            rows = map(project, rows)
+        duplicates = None
+        if options.dedupe:
+            # Sobre las filas sin normalizar: los duplicados no se convierten
+            duplicates = self.dedupe_service.dedupe(
+                rows, self._row_key(headers, options), options.dedupe
+            )
+            rows = duplicates
+        # Se muestrea antes de normalizar: solo se normalizan las elegidas
+        return headers, self._sampled(rows, options), duplicates
+
+    def _row_key(
+        self, headers: List[str], options: ConversionOptions
+    ) -> Callable[[Sequence[str]], tuple]:
+        # Sin dedupe_on la clave es la fila entera
+        if not options.dedupe_on:
+            return tuple
+        indexes = []
+        for column in options.dedupe_on:
+            if column not in headers:
+                raise ValueError(f"Unknown column: {column}")
+            indexes.append(headers.index(column))
+        return lambda row: tuple(row[i] for i in indexes)
+
+    def _deduped(
+        self, records: Iterable[Dict], options: ConversionOptions
+    ) -> Tuple[Iterable[Dict], Optional[Deduplicated]]:
+        """Descarta los registros repetidos según options.dedupe.
+
+        Sin dedupe_on se compara el registro entero salvo los campos del
+        enriquecimiento, que son distintos en cada registro. Una columna de
+        dedupe_on que no está en ningún registro falla al agotar la entrada.
+        """
+        if not options.dedupe:
+            return records, None
+        if options.dedupe_on:
+            columns = options.dedupe_on
+            records = self.query_service.require_columns(records, columns)
+
+            def key(record: Dict) -> tuple:
+                return tuple(record.get(column) for column in columns)
 
-        reader = csv.DictReader(content.splitlines())
-        data = list(reader)
-        return self.transformation_service.normalize_csv_data(data)
+        else:
 
-    def json_to_csv(self, file_path: Path) -> str:
-        content = file_path.read_text()
+            def key(record: Dict) -> tuple:
+                return tuple(
+                    sorted(
+                        (name, value)
+                        for name, value in record.items()
+                        if name not in ENRICHED_FIELDS
+                    )
+                )
+
+        duplicates = self.dedupe_service.dedupe(records, key, options.dedupe)
+        return duplicates, duplicates
+
+    def _sorted(
+        self,
+        records: Iterable[Dict],
+        options: ConversionOptions,
+        columns: Optional[List[str]] = None,
+    ) -> Iterable[Dict]:
+        """Ordena según options.sort_by.
+
+        Sin columnas (JSON) una columna de orden que no está en ningún
+        registro falla al agotar la entrada, antes del primer registro
+        ordenado.
+        """
+        if not options.sort_by:
+            return records
+        if columns is None:
+            names = [
+                spec[1:] if spec.startswith("-") else spec
+                for spec in options.sort_by
+            ]
+            records = self.query_service.require_columns(records, names)
+        return self.sort_service.sort(records, options.sort_by, columns)
+
+    def _seen_columns(self, records: Iterable[Dict]) -> Optional[List[str]]:
+        # Unión de las claves; sin registros no se sabe qué columnas hay
+        union = ConversionOptions(union_columns=True)
+        return self._csv_fieldnames(records, union) or None
+
+    def _sampled(
+        self, items: Iterable, options: ConversionOptions
+    ) -> Iterable:
+        if not options.sample_rows:
+            return items
+
+        def sampled() -> Iterator:
+            yield from self.query_service.sample(
+                items, options.sample_rows, options.seed
+            )
+
+        return sampled()
+
+    def _normalized_records(
+        self,
+        headers: List[str],
+        rows: Iterable[Sequence[str]],
+        options: ConversionOptions,
+    ) -> Iterator[Dict]:
+        if options.batch_size:
+            batches = self.transformation_service.normalize_csv_batches(
+                headers, rows, options.batch_size
+            )
+        else:
+            records = (dict(zip(headers, row)) for row in rows)
+            batches = (
+                self.transformation_service.normalize_csv_data(chunk)
+                for chunk in _chunks(records, CHUNK_SIZE)
+            )
+        for batch in batches:
+            yield from batch
+
+    def read_records(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> ConversionResult:
+        """Devuelve los registros de un CSV, JSON o JSON Lines.
+
+        Se usa la misma lectura que en las conversiones: un CSV pasa por
+        convert_csv y un JSON se valida, enriquece y (con flatten) aplana
+        como en json-to-csv. JSON Lines se valida también al llamar: sus
+        registros se vuelcan a un archivo temporal en esa pasada y, en modo
+        tolerante, las líneas inválidas van al archivo de rechazos. Si los
+        registros no se recorren enteros hay que cerrar el resultado.
+        """
+        options = options or ConversionOptions()
+        suffix = file_path.suffix.lower()
+        if suffix == ".csv":
+            return self.convert_csv(file_path, options)
+        if suffix not in JSON_LINES_SUFFIXES:
+            records = self._json_records(file_path, options)
+            if options.flatten:
+                records = self._flattened(records, options)
+            records, duplicates = self._deduped(records, options)
+            # Se recorre ya: los errores del dedupe y del orden salen al
+            # llamar
+            records = list(self._sampled(records, options))
+            columns = self._seen_columns(records)
+            records = self._sorted(records, options, columns)
+            return ConversionResult(
+                records=iter(records), duplicates=duplicates
+            )
+
+        rejects = self._rejects_file() if options.lenient else None
+        spill_path = self.file_service.create_spill_file()
+        try:
+            with spill_path.open("w", encoding="utf-8") as spill:
+                records = self._json_lines_records(file_path, options, rejects)
+                if options.flatten:
+                    records = self._flattened(records, options)
+                records, duplicates = self._deduped(records, options)
+                columns = self._seen_columns(
+                    self._spill(self._sampled(records, options), spill)
+                )
+            records = self._sorted(_read_spill(spill_path), options, columns)
+        except BaseException:
+            spill_path.unlink(missing_ok=True)
+            if rejects:
+                rejects.discard()
+            raise
+        return ConversionResult(
+            records=iter(records),
+            rejects=rejects.report() if rejects else None,
+            duplicates=duplicates,
+            spill_paths=[spill_path],
+        )
+
+    def json_to_csv(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> str:
+        return "".join(self.iter_json_to_csv(file_path, options))
+
+    def iter_json_to_csv(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> Iterator[str]:
+        return self.convert_json_to_csv(file_path, options).chunks
+
+    def convert_json_to_csv(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> CsvResult:
+        """Convierte JSON o JSON Lines a CSV en fragmentos de texto.
+
+        Una primera pasada (inmediata) valida, enriquece y reúne las
+        columnas; así los errores se detectan antes de empezar a escribir.
+        Los registros de JSON Lines se vuelcan a un archivo temporal en esa
+        pasada y la segunda los lee de ahí al generar el CSV. En modo
+        tolerante las líneas JSON Lines inválidas van al archivo de
+        rechazos; un documento .json se sigue validando entero. Si el CSV
+        no se recorre entero hay que cerrar el resultado con close().
+        """
+        options = options or ConversionOptions()
+        if file_path.suffix.lower() not in JSON_LINES_SUFFIXES:
+            enriched_data = self._json_records(file_path, options)
+            if options.flatten:
+                enriched_data = self._flattened(enriched_data, options)
+            enriched_data, duplicates = self._deduped(enriched_data, options)
+            enriched_data = list(self._sampled(enriched_data, options))
+            fieldnames = self._csv_fieldnames(enriched_data, options)
+            records = self._sorted(enriched_data, options, fieldnames)
+            return CsvResult(
+                self._iter_csv(records, fieldnames), duplicates=duplicates
+            )
+
+        rejects = self._rejects_file() if options.lenient else None
+        spill_path = self.file_service.create_spill_file()
+        try:
+            with spill_path.open("w", encoding="utf-8") as spill:
+                records = self._json_lines_records(file_path, options, rejects)
+                if options.flatten:
+                    records = self._flattened(records, options)
+                records, duplicates = self._deduped(records, options)
+                records = self._spill(self._sampled(records, options), spill)
+                fieldnames = self._csv_fieldnames(records, options)
+            # Una columna de orden desconocida falla aquí, antes de leer
+            records = self._sorted(
+                _read_spill(spill_path), options, fieldnames
+            )
+        except BaseException:
+            spill_path.unlink(missing_ok=True)
+            if rejects:
+                rejects.discard()
+            raise
+        return CsvResult(
+            self._iter_csv(records, fieldnames),
+            rejects.report() if rejects else None,
+            duplicates,
+            [spill_path],
+        )
+
+    def records_to_csv(
+        self,
+        records: Iterable[Dict],
+        columns: Optional[List[str]] = None,
+        buffered: bool = False,
+    ) -> CsvResult:
+        """Escribe como CSV registros ya convertidos (un join, por ejemplo).
+
+        Sin columnas conocidas los registros se vuelcan a un archivo
+        temporal mientras se reúne la unión de sus claves, igual que en
+        json-to-csv con union; esa pasada es inmediata. Con buffered se
+        vuelcan aunque se conozcan las columnas, para tener al volver los
+        totales que solo se saben al final de la entrada.
+        """
+        if columns is not None and not buffered:
+            return CsvResult(self._iter_csv(records, columns))
+        spill_path = self.file_service.create_spill_file()
+        try:
+            with spill_path.open("w", encoding="utf-8") as spill:
+                fieldnames = self._csv_fieldnames(
+                    self._spill(records, spill),
+                    ConversionOptions(union_columns=True),
+                )
+            if columns is not None:
+                fieldnames = columns
+        except BaseException:
+            spill_path.unlink(missing_ok=True)
+            raise
+        return CsvResult(
+            self._iter_csv(_read_spill(spill_path), fieldnames),
+            spill_paths=[spill_path],
+        )
+
+    def json_to_tables(
+        self, file_path: Path, options: Optional[ConversionOptions] = None
+    ) -> TablesResult:
+        """Normaliza JSON en varias tablas CSV y las empaqueta en un zip.
+
+        Cada registro va a la tabla "records" y cada array de objetos a una
+        tabla hija con el record_id del padre. El nombre de la tabla hija
+        es su ruta saneada como nombre de archivo, con un sufijo (_2, _3...)
+        si ya está en uso; un campo record_id del hijo pasa a llamarse
+        "<tabla>.record_id". Se recorre la entrada una sola vez: cada tabla
+        se vuelca a su propio archivo temporal mientras se descubren sus
+        columnas y al final se escribe, tabla a tabla, al zip. En modo
+        tolerante las líneas rechazadas se añaden como rejects.ndjson y
+        también se devuelven como en convert_json_to_csv. El llamante debe
+        borrar el zip del resultado.
+        """
+        options = options or ConversionOptions()
+        rejects = None
+        if file_path.suffix.lower() in JSON_LINES_SUFFIXES:
+            rejects = self._rejects_file() if options.lenient else None
+            records = self._json_lines_records(file_path, options, rejects)
+        else:
+            records = self._json_records(file_path, options)
+        records, duplicates = self._deduped(records, options)
+        records = self._sorted(self._sampled(records, options), options)
+        flattener = self.flatten_service.create_flattener("join")
+
+        # Nombre y archivo de cada tabla por ruta de hijos (None para la de
+        # registros). El nombre es también el del archivo en el zip: se
+        # sanea y no puede repetir otro, ni el de la tabla de registros
+        tables: Dict[Optional[str], Tuple[str, _SpilledTable]] = {}
+        used = {PARENT_TABLE}
+
+        def table(path: Optional[str]) -> Tuple[str, "_SpilledTable"]:
+            if path not in tables:
+                name = PARENT_TABLE
+                if path is not None:
+                    name = base = secure_filename(path) or "table"
+                    suffix = 1
+                    while name.lower() in used:
+                        suffix += 1
+                        name = f"{base}_{suffix}"
+                    used.add(name.lower())
+                tables[path] = name, _SpilledTable(
+                    self.file_service.create_spill_file()
+                )
+            return tables[path]
+
+        zip_path = None
+        try:
+            for record in records:
+                parent, children = self.flatten_service.split_children(record)
+                table(None)[1].write(flattener.flatten(parent, "")[0])
+                for path, items in children.items():
+                    name, child_table = table(path)
+                    for item in items:
+                        fields = flattener.flatten(item, "")[0]
+                        if LINK_COLUMN in fields:
+                            # El campo del hijo no pisa el enlace al padre
+                            fields[f"{name}.{LINK_COLUMN}"] = fields.pop(
+                                LINK_COLUMN
+                            )
+                        row = {LINK_COLUMN: record.get(LINK_COLUMN)}
+                        row.update(fields)
+                        child_table.write(row)
+
+            zip_path = self.file_service.create_spill_file(".zip")
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                for name, spilled in tables.values():
+                    spilled.close()
+                    with zf.open(f"{name}.csv", "w", force_zip64=True) as raw:
+                        output = io.TextIOWrapper(
+                            raw, encoding="utf-8", newline=""
+                        )
+                        for chunk in self._iter_csv(
+                            _read_spill(spilled.path), list(spilled.fields)
+                        ):
+                            output.write(chunk)
+                        output.flush()
+                        output.detach()
+                if rejects and rejects.count:
+                    rejects.close()
+                    zf.write(rejects.path, REJECTS_NAME)
+        except BaseException:
+            if zip_path:
+                zip_path.unlink(missing_ok=True)
+            if rejects:
+                rejects.discard()
+            raise
+        finally:
+            for _, spilled in tables.values():
+                spilled.close()
+                spilled.path.unlink(missing_ok=True)
+        return TablesResult(
+            zip_path,
+            rejects=rejects.report() if rejects else None,
+            duplicates=duplicates,
+        )
+
+    def _json_records(
+        self, file_path: Path, options: ConversionOptions
+    ) -> List[Dict]:
+        # json.loads necesita el texto completo de un documento JSON
+        with self.file_service.open_text(file_path, options.encoding) as text:
+            content = text.read()
         validation = self.validator_service.validate_json_structure(content)
         if not validation.is_valid:
             raise ValueError(validation.errors[0])
-
         data = json.loads(content)
-        enriched_data = self.transformation_service.enrich_json_data(data)
+        return self.transformation_service.enrich_json_data(data)
+
+    def _flattened(
+        self, records: Iterable[Dict], options: ConversionOptions
+    ) -> Iterator[Dict]:
+        return self.flatten_service.flatten(records, options.array_mode)
+
+    def _csv_fieldnames(
+        self, records: Iterable[Dict], options: ConversionOptions
+    ) -> List[str]:
+        """Recorre los registros y devuelve las columnas del CSV.
+
+        Por defecto son las claves del primer registro y cualquier clave
+        nueva en otro registro es un error; con union_columns se usa la
+        unión de las claves en orden de aparición, dejando al final los
+        campos añadidos por el enriquecimiento.
+        """
+        seen: Dict[str, None] = {}
+        first_keys = None
+        for number, record in enumerate(records, 1):
+            if first_keys is None:
+                first_keys = set(record)
+                seen.update(dict.fromkeys(record))
+            elif options.union_columns:
+                seen.update(dict.fromkeys(record))
+            elif not options.columns and not first_keys.issuperset(record):
+                extra = ", ".join(str(k) for k in record if k not in seen)
+                raise ValueError(
+                    f"Record {number} has fields not in the CSV header: "
+                    f"{extra}"
+                )
+
+        if options.columns:
+            return list(options.columns)
+        fieldnames = list(seen)
+        if options.union_columns:
+            fieldnames = [f for f in fieldnames if f not in ENRICHED_FIELDS]
+            fieldnames += [f for f in ENRICHED_FIELDS if f in seen]
+        if options.column_order == "sorted":
+            fieldnames.sort(key=str)
+        return fieldnames
+
+    def _iter_csv(
+        self, records: Iterable[Dict], fieldnames: List[str]
+    ) -> Iterator[str]:
+        return self.serializer_service.iter_csv(
+            records, fieldnames, CHUNK_SIZE
+        )
+
+    def _spill(self, records: Iterable[Dict], spill: TextIO) -> Iterator[Dict]:
+        for record in records:
+            spill.write(json.dumps(record, default=str))
+            spill.write("\n")
+            yield record
+
+    def _json_lines_records(
+        self,
+        file_path: Path,
+        options: ConversionOptions,
+        rejects: Optional["_RejectsFile"] = None,
+    ) -> Iterator[Dict]:
+        """Decodifica y enriquece un archivo JSON Lines sin cargarlo entero.
+
+        Los errores de todas las líneas se reúnen y se lanzan al final; con
+        rejects las líneas inválidas se escriben ahí y se sigue.
+        """
+        errors = []
+        count = 0
+        with self.file_service.open_text(file_path, options.encoding) as file:
+            for block_records, block_rejected in self._parse_json_lines(
+                file, options.workers
+            ):
+                if rejects:
+                    for rejected in block_rejected:
+                        rejects.write(rejected)
+                else:
+                    errors.extend(row.reason for row in block_rejected)
+                if errors:
+                    continue
+                yield from self.transformation_service.enrich_json_data(
+                    block_records, start=count
+                )
+                count += len(block_records)
+                if rejects:
+                    rejects.accepted = count
+        if errors:
+            raise ValueError(_error_message(errors, options.max_errors))
+        if not count and not (rejects and rejects.count):
+            raise ValueError("Empty JSON Lines file")
+
+    def _parse_json_lines(
+        self, lines: Iterable[str], workers: Optional[int]
+    ) -> Iterator[Tuple[List[Dict], List[RejectedRow]]]:
+        """Decodifica las líneas por bloques, en orden.
+
+        Con varios workers los bloques se reparten entre los procesos del
+        servicio, con como mucho dos bloques pendientes por worker pedido
+        para no leer todo el archivo.
+        """
+        parse = self.validator_service.split_json_lines
+        blocks = (
+            (block, 1 + number * JSON_LINES_BLOCK)
+            for number, block in enumerate(_chunks(lines, JSON_LINES_BLOCK))
+        )
+        if not workers or workers < 2:
+            for block, first_line in blocks:
+                yield parse(block, first_line)
+            return
+
+        executor = self._process_pool()
+        pending = deque()
+        try:
+            for block, first_line in blocks:
+                pending.append(executor.submit(parse, block, first_line))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BrokenProcessPool:
+            # Un proceso murió: la próxima conversión crea otro conjunto
+            with self._executor_lock:
+                broken = self._executor is executor
+                if broken:
+                    self._executor = None
+            if broken:
+                atexit.unregister(self.shutdown)
+                executor.shutdown(wait=False)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # Se crea con la primera conversión que lo necesita y se reutiliza;
+        # al salir del intérprete se detiene
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def _registered_schema(
+        self, options: ConversionOptions
+    ) -> Optional[CompiledSchema]:
+        if not options.schema_id:
+            return None
+        try:
+            return self.schema_service.get_schema(options.schema_id)
+        except KeyError:
+            raise ValueError(f"Unknown schema: {options.schema_id}") from None
+
+    def _rejects_file(self) -> "_RejectsFile":
+        return _RejectsFile(self.file_service.create_spill_file(".ndjson"))
+
+
+def _error_message(errors: List[str], max_errors: Optional[int]) -> str:
+    # Sin límite de errores (all_errors) se informan todos
+    if max_errors is None or len(errors) <= MAX_REPORTED_ERRORS:
+        return "; ".join(errors)
+    reported = "; ".join(errors[:MAX_REPORTED_ERRORS])
+    return f"{reported} (and {len(errors) - MAX_REPORTED_ERRORS} more)"
+
+
+def _content_chunks(
+    rows: Iterable[List[str]], size: int
+) -> Iterator[Tuple[str, List[List[str]]]]:
+    """Corta las filas en fragmentos definidos por su contenido.
+
+    Un fragmento termina tras una fila cuyo hash es múltiplo de `size`
+    (o al llegar a 4 * size filas). Así una fila insertada o borrada solo
+    cambia el fragmento en el que cae y no desplaza los siguientes.
+    """
+    minimum, maximum = max(1, size // 4), size * 4
+    divisor = max(1, size - minimum)
+    chunk: List[List[str]] = []
+    chunk_hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for row in rows:
+        row_hash = digest(row)
+        chunk.append(row)
+        chunk_hash.update(row_hash)
+        boundary = int.from_bytes(row_hash[:8], "big") % divisor == 0
+        if len(chunk) >= maximum or len(chunk) >= minimum and boundary:
+            yield chunk_hash.hexdigest(), chunk
+            chunk = []
+            chunk_hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    if chunk:
+        yield chunk_hash.hexdigest(), chunk
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class _SpilledTable:
+    """Filas de una tabla volcadas como JSON Lines y sus columnas."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.fields: Dict[str, None] = {}
+        self._file = path.open("w", encoding="utf-8")
+
+    def write(self, row: Dict) -> None:
+        self.fields.update(dict.fromkeys(row))
+        self._file.write(json.dumps(row))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _RejectsFile:
+    """Filas rechazadas en modo tolerante, una por línea en JSON Lines."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self.accepted = 0
+        self._file = path.open("w", encoding="utf-8")
+
+    def write(self, rejected: RejectedRow) -> None:
+        self.count += 1
+        self._file.write(
+            json.dumps(
+                {
+                    "line": rejected.line,
+                    "reason": rejected.reason,
+                    "content": rejected.content,
+                }
+            )
+        )
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def discard(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def report(self) -> RejectsReport:
+        """Cierra el archivo; si no hubo rechazos lo borra."""
+        if not self.count:
+            self.discard()
+            return RejectsReport(self.accepted, 0)
+        self.close()
+        return RejectsReport(self.accepted, self.count, self.path)
 
-        if not enriched_data:
-            return ""
 
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=enriched_data[0].keys())
-        writer.writeheader()
-        writer.writerows(enriched_data)
-        return output.getvalue()
+def _read_spill(path: Path) -> Iterator[Dict]:
+    try:
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+    finally:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from .converter_service import (
+    ConversionOptions,
+    ConverterService,
+    INCREMENTAL_CHUNK_ROWS,
+    IncrementalResult,
+)
+
+DATASET_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+DATASETS_FOLDER = "datasets"
+
+
+@dataclass
+class DatasetVersion:
+    version: int
+    created_at: datetime
+    chunks: int
+    reused_chunks: int
+    converted_chunks: int
+
+
+class _ChunkStore:
+    """Salida convertida de cada fragmento, un archivo por clave."""
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.keys: List[str] = []
+        self.reused = 0
+        self.converted = 0
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            fragment = (self.folder / f"{key}.json").read_text("utf-8")
+        except FileNotFoundError:
+            return None
+        self.keys.append(key)
+        self.reused += 1
+        return fragment
+
+    def put(self, key: str, fragment: str) -> None:
+        # Se escribe aparte y se renombra: nunca se lee un archivo a medias
+        path = self.folder / f"{key}.json"
+        partial = path.with_suffix(f".{os.getpid()}.{id(self)}.tmp")
+        partial.write_text(fragment, "utf-8")
+        os.replace(partial, path)
+        self.keys.append(key)
+        self.converted += 1
+
+
+class VersionConversion:
+    """Fragmentos JSON de una versión; `version` se asigna al terminar."""
+
+    def __init__(
+        self,
+        service: "DatasetService",
+        dataset_id: str,
+        result: IncrementalResult,
+        store: _ChunkStore,
+    ):
+        self.service = service
+        self.dataset_id = dataset_id
+        self.result = result
+        self.store = store
+        self.version: Optional[DatasetVersion] = None
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.result.fragments
+        self.version = self.service._register(self.dataset_id, self.store)
+
+
+class DatasetService:
+    def __init__(
+        self,
+        base_path: Path,
+        converter_service: ConverterService,
+        chunk_rows: int = INCREMENTAL_CHUNK_ROWS,
+    ):
+        self.base_path = Path(base_path) / DATASETS_FOLDER
+        self.converter_service = converter_service
+        self.chunk_rows = chunk_rows
+        self._versions: Dict[str, List[DatasetVersion]] = {}
+        self._lock = threading.Lock()
+
+    def convert_version(
+        self,
+        dataset_id: str,
+        file_path: Path,
+        options: Optional[ConversionOptions] = None,
+    ) -> VersionConversion:
+        """Convierte una nueva versión de un CSV reutilizando la anterior.
+
+        Los fragmentos cuyo contenido no ha cambiado se sirven desde la
+        salida guardada de la versión previa. La versión se registra al
+        terminar de recorrer los fragmentos y entonces se borran los que
+        ya no usa; si se abandona, la versión no se registra.
+        """
+        if not DATASET_ID.fullmatch(dataset_id):
+            raise ValueError(f"Invalid dataset id: {dataset_id}")
+        folder = self.base_path / dataset_id
+        folder.mkdir(parents=True, exist_ok=True)
+        store = _ChunkStore(folder)
+        result = self.converter_service.convert_csv_incremental(
+            file_path, store, options, self.chunk_rows
+        )
+        return VersionConversion(self, dataset_id, result, store)
+
+    def get_versions(self, dataset_id: str) -> List[DatasetVersion]:
+        with self._lock:
+            if dataset_id not in self._versions:
+                raise KeyError(f"Dataset {dataset_id} not found")
+            return list(self._versions[dataset_id])
+
+    def _register(self, dataset_id: str, store: _ChunkStore) -> DatasetVersion:
+        with self._lock:
+            versions = self._versions.setdefault(dataset_id, [])
+            version = DatasetVersion(
+                version=len(versions) + 1,
+                created_at=datetime.now(),
+                chunks=len(store.keys),
+                reused_chunks=store.reused,
+                converted_chunks=store.converted,
+            )
+            versions.append(version)
+            # Solo se conserva la salida de la última versión
+            keep = {f"{key}.json" for key in store.keys}
+            for path in store.folder.glob("*.json"):
+                if path.name not in keep:
+                    path.unlink(missing_ok=True)
+        return version
@@ -0,0 +1,185 @@
+import hashlib
+import heapq
+import math
+import mmap
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+from .file_service import FileService
+
+DEDUPE_MODES = ("exact", "bloom")
+DIGEST_SIZE = 16
+# Claves que se guardan en memoria antes de volcar un tramo ordenado
+MAX_KEYS_IN_MEMORY = 1000000
+# Tramos en disco a partir de los cuales se fusionan en uno solo
+MAX_DIGEST_RUNS = 8
+BLOOM_CAPACITY = 10000000
+BLOOM_ERROR_RATE = 0.001
+
+Key = Callable[[Any], Any]
+
+
+def digest(key: Any) -> bytes:
+    """Resume una clave (tupla de valores) en 16 bytes."""
+    return hashlib.blake2b(
+        repr(key).encode("utf-8"), digest_size=DIGEST_SIZE
+    ).digest()
+
+
+class BloomFilter:
+    """Filtro de Bloom con doble hashing sobre el resumen de la clave."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key_digest: bytes) -> bool:
+        """Añade la clave; devuelve False si (probablemente) ya estaba."""
+        first = int.from_bytes(key_digest[:8], "big")
+        step = int.from_bytes(key_digest[8:], "big") | 1
+        bits = self.bits
+        added = False
+        for i in range(self.hashes):
+            byte, bit = divmod((first + i * step) % self.size, 8)
+            mask = 1 << bit
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        return added
+
+    def close(self) -> None:
+        pass
+
+
+class _DigestRun:
+    """Resúmenes ordenados en un archivo, consultados por bisección."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = len(self._map) // DIGEST_SIZE
+
+    def __contains__(self, key_digest: bytes) -> bool:
+        data = self._map
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * DIGEST_SIZE
+            current = data[start : start + DIGEST_SIZE]
+            if current == key_digest:
+                return True
+            if current < key_digest:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+    def __iter__(self) -> Iterator[bytes]:
+        data = self._map
+        for start in range(0, self.count * DIGEST_SIZE, DIGEST_SIZE):
+            yield data[start : start + DIGEST_SIZE]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class DigestSet:
+    """Conjunto exacto de resúmenes que se vuelca a disco al crecer.
+
+    Las claves nuevas se guardan en un set; al llegar a max_keys se
+    escriben ordenadas en un tramo y se consultan con bisección sobre un
+    mmap. Cuando hay demasiados tramos se fusionan en uno.
+    """
+
+    def __init__(self, file_service: FileService, max_keys: int):
+        self.file_service = file_service
+        self.max_keys = max_keys
+        self.memory: set = set()
+        self.runs: List[_DigestRun] = []
+
+    def add(self, key_digest: bytes) -> bool:
+        """Añade la clave; devuelve False si ya estaba."""
+        if key_digest in self.memory:
+            return False
+        for run in self.runs:
+            if key_digest in run:
+                return False
+        self.memory.add(key_digest)
+        if len(self.memory) >= self.max_keys:
+            self._spill(sorted(self.memory))
+            self.memory.clear()
+            if len(self.runs) > MAX_DIGEST_RUNS:
+                runs, self.runs = self.runs, []
+                self._spill(heapq.merge(*runs))
+                for run in runs:
+                    run.close()
+        return True
+
+    def _spill(self, digests: Iterable[bytes]) -> None:
+        path = self.file_service.create_spill_file(".keys")
+        with path.open("wb") as file:
+            for key_digest in digests:
+                file.write(key_digest)
+        self.runs.append(_DigestRun(path))
+
+    def close(self) -> None:
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.memory.clear()
+
+
+class Deduplicated:
+    """Elementos sin duplicados; `removed` cuenta los descartados."""
+
+    def __init__(self, items: Iterable, key: Key, seen):
+        self.items = items
+        self.key = key
+        self.seen = seen
+        self.removed = 0
+
+    def __iter__(self) -> Iterator:
+        try:
+            for item in self.items:
+                if self.seen.add(digest(self.key(item))):
+                    yield item
+                else:
+                    self.removed += 1
+        finally:
+            self.seen.close()
+
+
+class DedupeService:
+    def __init__(
+        self,
+        file_service: FileService,
+        max_keys: int = MAX_KEYS_IN_MEMORY,
+        bloom_capacity: int = BLOOM_CAPACITY,
+        bloom_error_rate: float = BLOOM_ERROR_RATE,
+    ):
+        self.file_service = file_service
+        self.max_keys = max_keys
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+
+    def dedupe(
+        self, items: Iterable, key: Key, mode: Optional[str] = "exact"
+    ) -> Deduplicated:
+        """Descarta los elementos cuya clave ya ha aparecido, en streaming.
+
+        exact guarda un resumen de 16 bytes por clave distinta y lo vuelca
+        a disco pasado el presupuesto; bloom usa memoria fija y puede
+        descartar, con probabilidad bloom_error_rate, un elemento único.
+        """
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"Unsupported dedupe mode: {mode}")
+        if mode == "bloom":
+            seen = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        else:
+            seen = DigestSet(self.file_service, self.max_keys)
+        return Deduplicated(items, key, seen)
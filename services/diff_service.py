@@ -0,0 +1,176 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+from .dedupe_service import digest
+from .file_service import FileService, SpillPartition
+from .join_service import JoinKey, compile_key, key_value
+from .transformation_service import ENRICHED_FIELDS
+
+# Filas de la versión antigua que se comparan en memoria
+MAX_DIFF_ROWS = 100000
+SPILL_PARTITIONS = 16
+# A partir de esta profundidad una partición se compara en memoria
+MAX_PARTITION_DEPTH = 4
+
+
+def _comparable(record: Dict) -> Dict[str, str]:
+    # El enriquecimiento cambia en cada lectura; nulo y vacío son iguales
+    return {
+        name: "" if value is None else key_value(value)
+        for name, value in record.items()
+        if name not in ENRICHED_FIELDS
+    }
+
+
+def _row_digest(record: Dict) -> bytes:
+    return digest(tuple(sorted(_comparable(record).items())))
+
+
+class Diff:
+    """Cambios entre dos versiones; `summary` se completa al recorrerlos."""
+
+    def __init__(self, service: "DiffService", old, new, key: JoinKey):
+        self.service = service
+        self.old = old
+        self.new = new
+        self.key = key
+        self.summary = {
+            "added": 0,
+            "removed": 0,
+            "changed": 0,
+            "unchanged": 0,
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.service._diff(self, self.old, self.new, 0)
+
+    def change(
+        self, change_type: str, record: Dict, columns: Optional[List] = None
+    ) -> Dict:
+        self.summary[change_type] += 1
+        change = {
+            "change_type": change_type,
+            "changed_columns": ",".join(columns) if columns else None,
+        }
+        change.update(record)
+        return change
+
+
+class DiffService:
+    def __init__(
+        self,
+        file_service: FileService,
+        max_rows: int = MAX_DIFF_ROWS,
+        partitions: int = SPILL_PARTITIONS,
+    ):
+        self.file_service = file_service
+        self.max_rows = max_rows
+        self.partitions = partitions
+
+    def diff(
+        self,
+        old: Iterable[Dict],
+        new: Iterable[Dict],
+        key: List[str],
+        old_columns: Optional[List[str]] = None,
+        new_columns: Optional[List[str]] = None,
+    ) -> Diff:
+        """Compara dos versiones de un conjunto de datos por su clave.
+
+        Cada fila nueva se busca por clave entre las antiguas y se compara
+        el hash de sus valores: sale como added o changed (con las columnas
+        cambiadas) y, al final, las antiguas no vistas salen como removed.
+        Si la versión antigua supera max_rows, ambas se reparten por hash
+        de la clave en particiones en disco que se comparan una a una.
+        Los campos del enriquecimiento no cuentan como cambios y la clave
+        debe ser única: con claves repetidas gana la última fila antigua.
+        """
+        if not key:
+            raise ValueError("A key column is required")
+        for columns in (old_columns, new_columns):
+            for column in key:
+                if columns is not None and column not in columns:
+                    raise ValueError(f"Unknown column: {column}")
+        return Diff(self, old, new, compile_key(key))
+
+    def _diff(
+        self, diff: Diff, old: Iterable[Dict], new: Iterable[Dict], level: int
+    ) -> Iterator[Dict]:
+        table: Dict[tuple, Dict] = {}
+        old_parts: List[SpillPartition] = []
+        new_parts: List[SpillPartition] = []
+        try:
+            old = iter(old)
+            for record in old:
+                key = diff.key(record)
+                if key is None:
+                    # Sin clave no puede emparejarse con ninguna fila nueva
+                    yield diff.change("removed", record)
+                    continue
+                table[key] = record
+                if len(table) > self.max_rows and level < MAX_PARTITION_DEPTH:
+                    old_parts = self.file_service.create_partitions(
+                        self.partitions, ".diff"
+                    )
+                    for key, previous in table.items():
+                        old_parts[self._partition(key, level)].write(previous)
+                    table.clear()
+                    for previous in old:
+                        key = diff.key(previous)
+                        if key is None:
+                            yield diff.change("removed", previous)
+                            continue
+                        old_parts[self._partition(key, level)].write(previous)
+                    break
+
+            if not old_parts:
+                for record in new:
+                    yield from self._compare(diff, table, record)
+                for previous in table.values():
+                    yield diff.change("removed", previous)
+                return
+
+            new_parts = self.file_service.create_partitions(
+                self.partitions, ".diff"
+            )
+            for record in new:
+                key = diff.key(record)
+                if key is None:
+                    yield diff.change("added", record)
+                    continue
+                new_parts[self._partition(key, level)].write(record)
+            for old_part, new_part in zip(old_parts, new_parts):
+                old_part.close()
+                new_part.close()
+                readers = old_part.read(), new_part.read()
+                try:
+                    yield from self._diff(diff, *readers, level + 1)
+                finally:
+                    # Se cierran antes de borrar (necesario en Windows)
+                    for reader in readers:
+                        reader.close()
+                old_part.discard()
+                new_part.discard()
+        finally:
+            for partition in old_parts + new_parts:
+                partition.discard()
+
+    def _compare(
+        self, diff: Diff, table: Dict[tuple, Dict], record: Dict
+    ) -> Iterator[Dict]:
+        key = diff.key(record)
+        previous = table.pop(key, None) if key is not None else None
+        if previous is None:
+            yield diff.change("added", record)
+        elif _row_digest(previous) == _row_digest(record):
+            diff.summary["unchanged"] += 1
+        else:
+            before, after = _comparable(previous), _comparable(record)
+            columns = [
+                name
+                for name in dict.fromkeys([*after, *before])
+                if before.get(name, "") != after.get(name, "")
+            ]
+            yield diff.change("changed", record, columns)
+
+    def _partition(self, key: tuple, level: int) -> int:
+        # El nivel cambia el reparto en cada recursión
+        return hash((level, key)) % self.partitions
@@ -1,8 +1,55 @@
-from dataclasses import dataclass
-from datetime import datetime
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+import codecs
+import csv
+import mmap
+import os
+import pickle
+import re
+import tempfile
+import threading
+import uuid
 from werkzeug.utils import secure_filename
 
+# Cada cuántas filas se guarda un desplazamiento en el índice
+INDEX_STRIDE = 100
+# Bytes que se leen del principio del archivo para detectar la codificación
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# Se comprueba utf-32 antes que utf-16: su BOM LE empieza igual
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Caracteres de texto que se leen como máximo para detectar el separador
+DIALECT_SAMPLE_SIZE = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+DELIMITER_ALIASES = {"tab": "\t", "\\t": "\t"}
+# Bytes que se examinan de cada vez al contar filas sobre el mmap
+COUNT_CHUNK_SIZE = 1024 * 1024
+# csv.reader solo devuelve [] para las líneas sin nada: " " es una fila
+BLANK_LINE = re.compile(rb"^\r?\n", re.MULTILINE)
+# Una línea con su terminador, que puede ser \n, \r\n o \r como en open()
+LINE = re.compile(rb"[^\r\n]*(?:\r\n?|\n)|[^\r\n]+")
+# Registros que se serializan juntos en un archivo de partición
+PARTITION_BATCH = 1000
+# Caracteres que deben ser un solo byte igual para buscarlos sobre bytes
+ASCII = bytes(range(128))
+
 
 @dataclass
 class FileInfo:
@@ -11,15 +58,261 @@ class FileInfo:
     mime_type: str
 
 
+@dataclass
+class CsvDialect:
+    delimiter: str = ","
+    quotechar: str = '"'
+    escapechar: Optional[str] = None
+
+    def reader(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        return csv.reader(
+            lines,
+            delimiter=self.delimiter,
+            quotechar=self.quotechar,
+            escapechar=self.escapechar,
+        )
+
+
+@dataclass
+class RowIndex:
+    """Desplazamientos en bytes de las filas de un CSV.
+
+    offsets[i] es el inicio de la fila i * stride (sin contar la cabecera),
+    de modo que el índice ocupa row_count / stride enteros.
+    """
+
+    header_end: int
+    row_count: int
+    stride: int
+    offsets: array
+
+    def locate(self, row: int) -> Tuple[int, int]:
+        """Devuelve el byte desde el que leer y las filas a saltar."""
+        if not self.offsets:
+            return self.header_end, 0
+        checkpoint = min(row // self.stride, len(self.offsets) - 1)
+        return self.offsets[checkpoint], row - checkpoint * self.stride
+
+
+@dataclass
+class RetainedFile:
+    upload_id: str
+    path: Path
+    index: RowIndex
+    expires_at: datetime
+    dialect: CsvDialect = field(default_factory=CsvDialect)
+
+
+@dataclass
+class Artifact:
+    """Archivo generado (p. ej. filas rechazadas) que se puede descargar."""
+
+    artifact_id: str
+    path: Path
+    expires_at: datetime
+
+
+class SpillPartition:
+    """Registros volcados con pickle por lotes en un archivo temporal."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self._file = path.open("wb")
+        self._buffer: List = []
+
+    def write(self, item) -> None:
+        self.count += 1
+        self._buffer.append(item)
+        if len(self._buffer) >= PARTITION_BATCH:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            pickle.dump(self._buffer, self._file, pickle.HIGHEST_PROTOCOL)
+            self._buffer = []
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._flush()
+            self._file.close()
+
+    def read(self) -> Iterator:
+        """Lee los registros; hay que cerrar antes la escritura."""
+        with self.path.open("rb") as file:
+            while True:
+                try:
+                    batch = pickle.load(file)
+                except EOFError:
+                    return
+                yield from batch
+
+    def discard(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
 class FileService:
     def __init__(self, base_path: Path):
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self._retained: Dict[str, RetainedFile] = {}
+        self._artifacts: Dict[str, Artifact] = {}
+        self._lock = threading.Lock()
 
     def save_file(self, content: bytes, filename: str) -> Path:
-        file_path = self.base_path / secure_filename(filename)
-        file_path.write_bytes(content)
-        return file_path
+        """Guarda una subida con un nombre único en la carpeta de subidas.
+
+        Se conserva la extensión del nombre original, pero dos subidas que
+        se llamen igual (las dos versiones de un join o de un diff, o dos
+        peticiones a la vez) no se pisan.
+        """
+        suffix = Path(secure_filename(filename)).suffix
+        fd, name = tempfile.mkstemp(suffix=suffix, dir=self.base_path)
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        return Path(name)
+
+    def detect_encoding(
+        self, file_path: Path, sample_size: int = ENCODING_SAMPLE_SIZE
+    ) -> str:
+        """Detecta la codificación a partir de los primeros bytes.
+
+        Se usa el BOM si lo hay; si no, los bytes nulos delatan UTF-16 sin
+        BOM, y si la muestra no es UTF-8 válido se asume cp1252 (o latin-1
+        si tampoco lo es). Nunca se lee más de sample_size bytes.
+        """
+        with file_path.open("rb") as file:
+            sample = file.read(sample_size)
+        return self.detect_sample_encoding(sample)
+
+    def detect_sample_encoding(self, sample: bytes) -> str:
+        for bom, encoding in BOMS:
+            if sample.startswith(bom):
+                return encoding
+        if b"\x00" in sample:
+            even_nulls = sample[0::2].count(0)
+            odd_nulls = sample[1::2].count(0)
+            if odd_nulls > even_nulls:
+                return "utf-16-le"
+            if even_nulls > odd_nulls:
+                return "utf-16-be"
+        for encoding in ("utf-8", "cp1252"):
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                # final=False: la muestra puede cortar un carácter multibyte
+                decoder.decode(sample, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return "latin-1"
+
+    def open_text(
+        self, file_path: Path, encoding: Optional[str] = None
+    ) -> TextIO:
+        """Abre el archivo para leerlo como texto, decodificando por bloques.
+
+        Sin encoding explícito se detecta con detect_encoding. Se abre con
+        newline="" como necesita el módulo csv.
+        """
+        encoding = self.resolve_encoding(file_path, encoding)
+        return file_path.open(encoding=encoding, newline="")
+
+    def resolve_encoding(
+        self, file_path: Path, encoding: Optional[str] = None
+    ) -> str:
+        if not encoding:
+            return self.detect_encoding(file_path)
+        return self.normalize_encoding(encoding)
+
+    def normalize_encoding(self, encoding: str) -> str:
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            raise ValueError(f"Unknown encoding: {encoding}") from None
+        # utf-8-sig lee igual UTF-8 sin BOM y descarta el BOM si lo hay
+        return "utf-8-sig" if name == "utf-8" else encoding
+
+    def detect_dialect(
+        self,
+        file_path: Path,
+        encoding: Optional[str] = None,
+        delimiter: Optional[str] = None,
+        quotechar: Optional[str] = None,
+        escapechar: Optional[str] = None,
+        sample_size: int = DIALECT_SAMPLE_SIZE,
+    ) -> CsvDialect:
+        """Devuelve el dialecto del CSV, detectando el separador si hace falta.
+
+        Los valores explícitos se respetan; sin separador explícito se
+        detecta con csv.Sniffer sobre, como mucho, sample_size caracteres.
+        """
+        if delimiter:
+            return self.sniff_dialect("", delimiter, quotechar, escapechar)
+        with self.open_text(file_path, encoding) as text:
+            sample = text.read(sample_size)
+            complete = not text.read(1)
+        return self.sniff_dialect(
+            sample, delimiter, quotechar, escapechar, complete
+        )
+
+    def sniff_dialect(
+        self,
+        sample: str,
+        delimiter: Optional[str] = None,
+        quotechar: Optional[str] = None,
+        escapechar: Optional[str] = None,
+        complete: bool = True,
+    ) -> CsvDialect:
+        delimiter = DELIMITER_ALIASES.get(delimiter, delimiter)
+        for name, value in (
+            ("delimiter", delimiter),
+            ("quotechar", quotechar),
+            ("escapechar", escapechar),
+        ):
+            if value and (len(value) != 1 or value in "\r\n"):
+                raise ValueError(f"{name} must be a single character")
+        if not delimiter:
+            if not complete:
+                # Se descarta la última línea, que puede estar cortada
+                sample = sample[: sample.rfind("\n") + 1] or sample
+            try:
+                sniffed = csv.Sniffer().sniff(sample, SNIFF_DELIMITERS)
+                delimiter = sniffed.delimiter
+            except csv.Error:
+                # Una sola columna o una muestra ambigua: se usa la coma
+                delimiter = ","
+        return CsvDialect(
+            delimiter=delimiter,
+            quotechar=quotechar or '"',
+            escapechar=escapechar or None,
+        )
+
+    def create_spill_file(self, suffix: str = ".spill") -> Path:
+        """Crea un archivo temporal en la carpeta de subidas.
+
+        Quien lo crea es responsable de borrarlo al terminar.
+        """
+        fd, name = tempfile.mkstemp(suffix=suffix, dir=self.base_path)
+        os.close(fd)
+        return Path(name)
+
+    def create_partitions(
+        self, count: int, suffix: str = ".part"
+    ) -> List[SpillPartition]:
+        """Crea count particiones temporales; hay que descartarlas al final."""
+        return [
+            SpillPartition(self.create_spill_file(suffix))
+            for _ in range(count)
+        ]
+
+    def iter_file(
+        self, file_path: Path, chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """Lee un archivo por bloques."""
+        with file_path.open("rb") as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
 
     def get_file_info(self, file_path: Path) -> FileInfo:
         stats = file_path.stat()
@@ -38,6 +331,209 @@ class FileService:
         mime_types = {
             ".csv": "text/csv",
             ".json": "application/json",
+            ".ndjson": "application/x-ndjson",
+            ".jsonl": "application/x-ndjson",
             ".txt": "text/plain",
         }
         return mime_types.get(extension, "application/octet-stream")
+
+    def build_row_index(
+        self,
+        file_path: Path,
+        stride: int = INDEX_STRIDE,
+        dialect: Optional[CsvDialect] = None,
+    ) -> RowIndex:
+        """Indexa las filas de un CSV en una sola pasada sobre sus bytes.
+
+        Los registros se delimitan con csv.reader y el dialecto del archivo,
+        así que las comillas y los escapes se interpretan como al convertir;
+        las líneas vacías se ignoran como en csv.reader.
+        """
+        dialect = dialect or CsvDialect()
+        offsets = array("q")
+        header_end = None
+        row_count = 0
+        start = 0
+        with file_path.open("rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mm:
+                    for end, rows in _csv_records(mm, dialect):
+                        if not rows:
+                            start = end
+                            continue
+                        if header_end is None:
+                            header_end = end
+                        else:
+                            if row_count % stride == 0:
+                                offsets.append(start)
+                            row_count += 1
+                        start = end
+        return RowIndex(
+            header_end=header_end if header_end is not None else start,
+            row_count=row_count,
+            stride=stride,
+            offsets=offsets,
+        )
+
+    def count_rows(
+        self,
+        file_path: Path,
+        dialect: Optional[CsvDialect] = None,
+        chunk_size: int = COUNT_CHUNK_SIZE,
+        encoding: Optional[str] = None,
+    ) -> int:
+        """Cuenta las filas de datos de un CSV sobre un mmap del archivo.
+
+        Se recorre por bloques que acaban en salto de línea. Un bloque que
+        empieza entre registros y no tiene comillas, escapes ni \\r sueltos
+        se cuenta con bytes.count, sin partirlo en líneas; el resto pasa
+        por csv.reader como en build_row_index. Si la codificación no
+        conserva ASCII byte a byte (UTF-16) se cuenta el texto decodificado.
+        """
+        dialect = dialect or CsvDialect()
+        records = 0
+        if encoding and not _ascii_compatible(encoding):
+            with self.open_text(file_path, encoding) as text:
+                records = sum(1 for row in dialect.reader(text) if row)
+            return max(records - 1, 0)
+        with file_path.open("rb") as file:
+            if not os.fstat(file.fileno()).st_size:
+                return 0
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for _, rows in _csv_records(mm, dialect, chunk_size):
+                    records += rows
+        # La primera fila es la cabecera
+        return max(records - 1, 0)
+
+    def retain_file(
+        self,
+        content: Union[bytes, Iterable[bytes]],
+        filename: str,
+        ttl_seconds: int,
+        dialect: Optional[CsvDialect] = None,
+    ) -> RetainedFile:
+        """Guarda el contenido (o sus bloques) y lo indexa durante el TTL."""
+        upload_id = uuid.uuid4().hex
+        retained_dir = self.base_path / "retained"
+        retained_dir.mkdir(exist_ok=True)
+        file_path = retained_dir / (
+            f"{upload_id}{Path(secure_filename(filename)).suffix}"
+        )
+        if isinstance(content, bytes):
+            content = [content]
+        try:
+            with file_path.open("wb") as file:
+                for chunk in content:
+                    file.write(chunk)
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+        retained = RetainedFile(
+            upload_id=upload_id,
+            path=file_path,
+            index=self.build_row_index(file_path, dialect=dialect),
+            expires_at=datetime.now() + timedelta(seconds=ttl_seconds),
+            dialect=dialect or CsvDialect(),
+        )
+        with self._lock:
+            self._purge_expired()
+            self._retained[upload_id] = retained
+        return retained
+
+    def get_retained(self, upload_id: str) -> RetainedFile:
+        with self._lock:
+            self._purge_expired()
+            if upload_id not in self._retained:
+                raise KeyError(f"Upload {upload_id} not found or expired")
+            return self._retained[upload_id]
+
+    def retain_artifact(self, file_path: Path, ttl_seconds: int) -> Artifact:
+        """Conserva un archivo ya escrito para descargarlo durante el TTL."""
+        artifact = Artifact(
+            artifact_id=uuid.uuid4().hex,
+            path=file_path,
+            expires_at=datetime.now() + timedelta(seconds=ttl_seconds),
+        )
+        with self._lock:
+            self._purge_expired()
+            self._artifacts[artifact.artifact_id] = artifact
+        return artifact
+
+    def get_artifact(self, artifact_id: str) -> Artifact:
+        with self._lock:
+            self._purge_expired()
+            if artifact_id not in self._artifacts:
+                raise KeyError(f"Artifact {artifact_id} not found or expired")
+            return self._artifacts[artifact_id]
+
+    def _purge_expired(self) -> None:
+        now = datetime.now()
+        for registry in (self._retained, self._artifacts):
+            expired = [
+                key
+                for key, entry in registry.items()
+                if entry.expires_at <= now
+            ]
+            for key in expired:
+                registry.pop(key).path.unlink(missing_ok=True)
+
+
+def _ascii_compatible(encoding: str) -> bool:
+    # Saltos de línea, comillas y separadores se buscan en los bytes
+    try:
+        return ASCII.decode("ascii").encode(encoding) == ASCII
+    except UnicodeError:
+        return False
+
+
+def _csv_records(
+    mm: mmap.mmap, dialect: CsvDialect, chunk_size: Optional[int] = None
+) -> Iterator[Tuple[int, int]]:
+    """Recorre los registros de un CSV en bytes con csv.reader.
+
+    Devuelve el byte en que acaba cada registro y cuántas filas aporta: 0
+    si es una línea vacía (csv.reader la devuelve como []) y 1 si no. El
+    lector pide las líneas de una en una y no lee por delante, así que la
+    posición de la última línea entregada es el final del registro.
+
+    Con chunk_size se avanza por bloques que acaban en salto de línea y
+    los que no necesitan el lector se cuentan enteros: se devuelve el
+    final del bloque con el número de filas que contiene.
+    """
+    size = len(mm)
+    special = [dialect.quotechar.encode("utf-8")]
+    if dialect.escapechar:
+        special.append(dialect.escapechar.encode("utf-8"))
+    position = 0
+    # Si la última línea entregada al lector cerraba un registro
+    boundary = True
+
+    def lines(limit: int) -> Iterator[str]:
+        nonlocal position, boundary
+        for match in LINE.finditer(mm, position):
+            # Solo se corta entre registros: el lector nunca ve uno a medias
+            if boundary and position >= limit:
+                return
+            position = match.end()
+            boundary = False
+            yield match.group().decode("utf-8", "surrogateescape")
+
+    while position < size:
+        limit = size
+        if chunk_size:
+            end = mm.find(b"\n", min(position + chunk_size, size) - 1)
+            limit = size if end == -1 else end + 1
+            chunk = mm[position:limit]
+            plain = not any(char in chunk for char in special)
+            if plain and chunk.count(b"\r") == chunk.count(b"\r\n"):
+                rows = chunk.count(b"\n") - len(BLANK_LINE.findall(chunk))
+                if not chunk.endswith(b"\n"):
+                    rows += 1
+                position = limit
+                yield position, rows
+                continue
+        for row in dialect.reader(lines(limit)):
+            boundary = True
+            yield position, 1 if row else 0
@@ -0,0 +1,252 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+ARRAY_MODES = ("join", "explode", "index")
+# Planes distintos que se guardan para unas mismas claves de primer nivel
+MAX_PLANS_PER_KEYS = 8
+
+Exploded = List[Tuple[str, list]]
+Writer = Callable[[Any, Dict, Exploded], None]
+
+
+class ShapeMismatch(Exception):
+    """El registro no tiene la forma para la que se compiló el plan."""
+
+
+class FlattenService:
+    def flatten(
+        self,
+        records: Iterable[Dict],
+        array_mode: str = "join",
+        separator: str = ".",
+        join_with: str = "|",
+    ) -> Iterator[Dict]:
+        """Aplana objetos anidados en columnas con nombres con puntos.
+
+        Los arrays se unen en un solo texto (join), generan una fila por
+        elemento (explode) o una columna por posición (index). Para cada
+        forma de registro se compila un plan una sola vez; los registros
+        siguientes con la misma forma solo ejecutan el plan.
+        """
+        flattener = self.create_flattener(array_mode, separator, join_with)
+        for record in records:
+            yield from flattener.flatten(record, "")
+
+    def create_flattener(
+        self,
+        array_mode: str = "join",
+        separator: str = ".",
+        join_with: str = "|",
+    ) -> "_Flattener":
+        """Devuelve un aplanador que conserva sus planes entre llamadas."""
+        if array_mode not in ARRAY_MODES:
+            raise ValueError(f"Unsupported array mode: {array_mode}")
+        return _Flattener(array_mode, separator, join_with)
+
+    def split_children(
+        self, record: Dict, separator: str = "."
+    ) -> Tuple[Dict, Dict[str, List[Dict]]]:
+        """Separa los arrays de objetos de un registro.
+
+        Devuelve el registro sin esos arrays y, por cada ruta ("items",
+        "order.lines"), la lista de objetos hijos.
+        """
+        children: Dict[str, List[Dict]] = {}
+        return self._detach(record, "", separator, children), children
+
+    def _detach(
+        self,
+        value: Dict,
+        prefix: str,
+        separator: str,
+        children: Dict[str, List[Dict]],
+    ) -> Dict:
+        parent = {}
+        for key, item in value.items():
+            path = f"{prefix}{separator}{key}" if prefix else str(key)
+            if isinstance(item, dict):
+                parent[key] = self._detach(item, path, separator, children)
+            elif (
+                isinstance(item, list)
+                and item
+                and all(isinstance(element, dict) for element in item)
+            ):
+                children.setdefault(path, []).extend(item)
+            else:
+                parent[key] = item
+        return parent
+
+    def compile_unflatten(
+        self, headers: List[str], separator: str = "."
+    ) -> Callable[[Dict], Dict]:
+        """Compila, a partir de las cabeceras, la función que anida un registro.
+
+        "address.city" pasa a {"address": {"city": ...}} y los segmentos
+        numéricos consecutivos desde 0 ("tags.0", "tags.1") pasan a listas.
+        El plan se calcula una vez por archivo; aplicarlo a cada registro
+        solo copia valores.
+        """
+        tree: Dict = {}
+        for header in headers:
+            node = tree
+            parts = header.split(separator)
+            for depth, part in enumerate(parts[:-1]):
+                child = node.setdefault(part, {})
+                if not isinstance(child, dict):
+                    prefix = separator.join(parts[: depth + 1])
+                    raise ValueError(
+                        f"Conflicting columns: {prefix} and {header}"
+                    )
+                node = child
+            if parts[-1] in node:
+                raise ValueError(f"Conflicting columns: {header}")
+            node[parts[-1]] = header
+        return self._compile_builder(tree, root=True)
+
+    def _compile_builder(
+        self, tree: Dict, root: bool = False
+    ) -> Callable[[Dict], Any]:
+        leaves = [(k, v) for k, v in tree.items() if isinstance(v, str)]
+        children = [
+            (key, self._compile_builder(subtree))
+            for key, subtree in tree.items()
+            if isinstance(subtree, dict)
+        ]
+        order = list(tree)
+        as_list = not root and order == [str(i) for i in range(len(order))]
+
+        def build(record: Dict) -> Any:
+            node = {key: record.get(source) for key, source in leaves}
+            for key, child in children:
+                node[key] = child(record)
+            if as_list:
+                return [node[key] for key in order]
+            if children and leaves:
+                return {key: node[key] for key in order}
+            return node
+
+        return build
+
+
+class _Flattener:
+    def __init__(self, array_mode: str, separator: str, join_with: str):
+        self.array_mode = array_mode
+        self.separator = separator
+        self.join_with = join_with
+        self.plans: Dict[Tuple, List[Writer]] = {}
+        self.compiled = 0
+
+    def flatten(self, value: Any, prefix: str) -> List[Dict]:
+        row: Dict = {}
+        exploded: Exploded = []
+        self._plan_for(value, prefix, row, exploded)
+        rows = [row]
+        for array_prefix, items in exploded:
+            variants = [
+                variant
+                for item in items
+                for variant in self.flatten(item, array_prefix)
+            ]
+            if variants:
+                rows = [
+                    {**row, **variant} for row in rows for variant in variants
+                ]
+        return rows
+
+    def _plan_for(
+        self, value: Any, prefix: str, row: Dict, exploded: Exploded
+    ) -> None:
+        if isinstance(value, dict):
+            key = (prefix, tuple(value))
+        else:
+            key = (prefix, type(value))
+        plans = self.plans.setdefault(key, [])
+        for plan in plans:
+            try:
+                plan(value, row, exploded)
+                return
+            except ShapeMismatch:
+                # Se descarta lo escrito por el plan que no encajaba
+                row.clear()
+                exploded.clear()
+        plan = self._compile(value, prefix)
+        self.compiled += 1
+        if len(plans) >= MAX_PLANS_PER_KEYS:
+            plans.pop(0)
+        plans.append(plan)
+        plan(value, row, exploded)
+
+    def _column(self, prefix: str, key: Any) -> str:
+        return f"{prefix}{self.separator}{key}" if prefix else str(key)
+
+    def _compile(self, sample: Any, prefix: str) -> Writer:
+        if isinstance(sample, dict):
+            return self._compile_object(sample, prefix)
+        if isinstance(sample, list):
+            return self._compile_array(sample, prefix)
+
+        def write_scalar(value: Any, row: Dict, exploded: Exploded) -> None:
+            if isinstance(value, (dict, list)):
+                raise ShapeMismatch
+            row[prefix] = value
+
+        return write_scalar
+
+    def _compile_object(self, sample: Dict, prefix: str) -> Writer:
+        children = [
+            (key, self._compile(value, self._column(prefix, key)))
+            for key, value in sample.items()
+        ]
+        size = len(children)
+
+        def write_object(value: Any, row: Dict, exploded: Exploded) -> None:
+            if not isinstance(value, dict) or len(value) != size:
+                raise ShapeMismatch
+            try:
+                for key, child in children:
+                    child(value[key], row, exploded)
+            except KeyError:
+                raise ShapeMismatch from None
+
+        return write_object
+
+    def _compile_array(self, sample: list, prefix: str) -> Writer:
+        if self.array_mode == "index":
+            children = [
+                self._compile(item, self._column(prefix, position))
+                for position, item in enumerate(sample)
+            ]
+            size = len(children)
+
+            def write_indexed(
+                value: Any, row: Dict, exploded: Exploded
+            ) -> None:
+                if not isinstance(value, list) or len(value) != size:
+                    raise ShapeMismatch
+                for item, child in zip(value, children):
+                    child(item, row, exploded)
+
+            return write_indexed
+
+        if self.array_mode == "explode":
+
+            def write_exploded(
+                value: Any, row: Dict, exploded: Exploded
+            ) -> None:
+                if not isinstance(value, list):
+                    raise ShapeMismatch
+                exploded.append((prefix, value))
+
+            return write_exploded
+
+        def write_joined(value: Any, row: Dict, exploded: Exploded) -> None:
+            if not isinstance(value, list):
+                raise ShapeMismatch
+            row[prefix] = self._join(value)
+
+        return write_joined
+
+    def _join(self, items: list) -> str:
+        if any(isinstance(item, (dict, list)) for item in items):
+            return json.dumps(items)
+        return self.join_with.join("" if i is None else str(i) for i in items)
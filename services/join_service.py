@@ -0,0 +1,261 @@
+import json
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from .file_service import FileService, SpillPartition
+
+JOIN_TYPES = ("inner", "left", "right", "outer")
+# Filas del lado de construcción que caben en la tabla hash en memoria
+MAX_BUILD_ROWS = 100000
+SPILL_PARTITIONS = 16
+# A partir de esta profundidad una partición se une en memoria aunque no
+# quepa: solo ocurre si casi todas sus filas comparten clave
+MAX_PARTITION_DEPTH = 4
+# Sufijo de las columnas del lado derecho que ya existen en el izquierdo
+RIGHT_SUFFIX = "_right"
+
+JoinKey = Callable[[Dict], Optional[tuple]]
+
+
+def key_value(value: Any) -> str:
+    """Valor comparable entre formatos: "1" en un CSV y 1 en un JSON."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    if isinstance(value, bool):
+        return json.dumps(value)
+    return str(value)
+
+
+def compile_key(columns: List[str]) -> JoinKey:
+    """Clave de emparejamiento de un registro; None si algún valor falta."""
+
+    def key(record: Dict) -> Optional[tuple]:
+        values = []
+        for column in columns:
+            value = record.get(column)
+            if value is None or value == "":
+                # Como en SQL, una clave nula no empareja con nada
+                return None
+            values.append(key_value(value))
+        return tuple(values)
+
+    return key
+
+
+class JoinService:
+    def __init__(
+        self,
+        file_service: FileService,
+        max_build_rows: int = MAX_BUILD_ROWS,
+        partitions: int = SPILL_PARTITIONS,
+    ):
+        self.file_service = file_service
+        self.max_build_rows = max_build_rows
+        self.partitions = partitions
+
+    def output_columns(
+        self,
+        left_columns: List[str],
+        right_columns: List[str],
+        left_on: List[str],
+        right_on: List[str],
+    ) -> List[str]:
+        """Columnas del resultado: las izquierdas y luego las derechas.
+
+        Una clave derecha con el mismo nombre que su pareja izquierda se
+        funde con ella; el resto de nombres repetidos llevan el sufijo
+        _right.
+        """
+        merged = {r for l, r in zip(left_on, right_on) if l == r}
+        columns = list(left_columns)
+        for column in right_columns:
+            if column in merged:
+                continue
+            if column in left_columns:
+                column += RIGHT_SUFFIX
+            columns.append(column)
+        return columns
+
+    def join(
+        self,
+        left: Iterable[Dict],
+        right: Iterable[Dict],
+        left_on: List[str],
+        right_on: List[str],
+        how: str = "inner",
+        build: str = "right",
+        left_columns: Optional[List[str]] = None,
+        right_columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """Une los registros de los dos lados por igualdad de claves.
+
+        Se construye una tabla hash con el lado `build` (el más pequeño) y
+        se recorre el otro emparejando cada registro. Si el lado de
+        construcción supera max_build_rows, ambos lados se reparten por
+        hash en particiones en disco y se unen partición a partición (grace
+        hash join). Los errores de columnas se detectan al llamar; sin
+        columnas conocidas se toman las del primer registro izquierdo.
+        """
+        if how not in JOIN_TYPES:
+            raise ValueError(f"Unsupported join type: {how}")
+        if build not in ("left", "right"):
+            raise ValueError(f"Unsupported build side: {build}")
+        if not left_on or len(left_on) != len(right_on):
+            raise ValueError("Join needs the same number of keys per side")
+        for keys, columns in (
+            (left_on, left_columns),
+            (right_on, right_columns),
+        ):
+            for column in keys:
+                if columns is not None and column not in columns:
+                    raise ValueError(f"Unknown column: {column}")
+
+        left = iter(left)
+        if left_columns is None:
+            first = next(left, None)
+            left_columns = list(first or [])
+            if first is not None:
+                left = chain([first], left)
+        combine = self._combiner(set(left_columns), left_on, right_on)
+        left_key, right_key = compile_key(left_on), compile_key(right_on)
+
+        if build == "left":
+            return self._hash_join(
+                left,
+                right,
+                left_key,
+                right_key,
+                how in ("left", "outer"),
+                how in ("right", "outer"),
+                combine,
+                0,
+            )
+        return self._hash_join(
+            right,
+            left,
+            right_key,
+            left_key,
+            how in ("right", "outer"),
+            how in ("left", "outer"),
+            lambda built, probed: combine(probed, built),
+            0,
+        )
+
+    def _combiner(
+        self, left_columns: set, left_on: List[str], right_on: List[str]
+    ) -> Callable[[Optional[Dict], Optional[Dict]], Dict]:
+        merged = {r for l, r in zip(left_on, right_on) if l == r}
+
+        def combine(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+            result = dict(left) if left else {}
+            if right:
+                for column, value in right.items():
+                    if column in merged:
+                        if left is None:
+                            result[column] = value
+                        continue
+                    if column in left_columns:
+                        column += RIGHT_SUFFIX
+                    result[column] = value
+            return result
+
+        return combine
+
+    def _hash_join(
+        self,
+        build_rows: Iterable[Dict],
+        probe_rows: Iterable[Dict],
+        build_key: JoinKey,
+        probe_key: JoinKey,
+        keep_build: bool,
+        keep_probe: bool,
+        combine: Callable[[Optional[Dict], Optional[Dict]], Dict],
+        level: int,
+    ) -> Iterator[Dict]:
+        table: Dict[tuple, List[Dict]] = {}
+        size = 0
+        build_parts: List[SpillPartition] = []
+        probe_parts: List[SpillPartition] = []
+        try:
+            build_rows = iter(build_rows)
+            for record in build_rows:
+                key = build_key(record)
+                if key is None:
+                    if keep_build:
+                        yield combine(record, None)
+                    continue
+                table.setdefault(key, []).append(record)
+                size += 1
+                if size > self.max_build_rows and level < MAX_PARTITION_DEPTH:
+                    # No cabe en memoria: se reparte todo en particiones
+                    build_parts = self.file_service.create_partitions(
+                        self.partitions, ".join"
+                    )
+                    for key, records in table.items():
+                        partition = build_parts[self._partition(key, level)]
+                        for built in records:
+                            partition.write(built)
+                    table.clear()
+                    for built in build_rows:
+                        key = build_key(built)
+                        if key is None:
+                            if keep_build:
+                                yield combine(built, None)
+                            continue
+                        build_parts[self._partition(key, level)].write(built)
+                    break
+
+            if not build_parts:
+                matched = set()
+                for record in probe_rows:
+                    key = probe_key(record)
+                    matches = table.get(key) if key is not None else None
+                    if matches:
+                        matched.add(key)
+                        for built in matches:
+                            yield combine(built, record)
+                    elif keep_probe:
+                        yield combine(None, record)
+                if keep_build:
+                    for key, records in table.items():
+                        if key not in matched:
+                            for built in records:
+                                yield combine(built, None)
+                return
+
+            probe_parts = self.file_service.create_partitions(
+                self.partitions, ".join"
+            )
+            for record in probe_rows:
+                key = probe_key(record)
+                if key is None:
+                    if keep_probe:
+                        yield combine(None, record)
+                    continue
+                probe_parts[self._partition(key, level)].write(record)
+            for built, probed in zip(build_parts, probe_parts):
+                built.close()
+                probed.close()
+                readers = built.read(), probed.read()
+                try:
+                    yield from self._hash_join(
+                        *readers,
+                        build_key,
+                        probe_key,
+                        keep_build,
+                        keep_probe,
+                        combine,
+                        level + 1,
+                    )
+                finally:
+                    # Se cierran antes de borrar (necesario en Windows)
+                    for reader in readers:
+                        reader.close()
+                built.discard()
+                probed.discard()
+        finally:
+            for partition in build_parts + probe_parts:
+                partition.discard()
+
+    def _partition(self, key: tuple, level: int) -> int:
+        # El nivel cambia el reparto en cada recursión
+        return hash((level, key)) % self.partitions
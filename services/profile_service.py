@@ -0,0 +1,182 @@
+import hashlib
+import json
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .schema_service import FLOAT_PATTERN
+
+# 2^12 registros de un byte: error típico de ~1,6 % en el recuento
+HLL_PRECISION = 12
+TOP_K = 10
+# Contadores que guarda el resumen de valores frecuentes por cada top-k
+HEAVY_HITTERS_FACTOR = 8
+
+
+def _hash(text: str) -> int:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HyperLogLog:
+    """Recuento aproximado de valores distintos en memoria fija."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._rest_bits = 64 - precision
+        self._rest_mask = (1 << self._rest_bits) - 1
+
+    def add(self, text: str) -> None:
+        value = _hash(text)
+        index = value >> self._rest_bits
+        # Posición del primer bit a 1 en los bits que no forman el índice
+        rank = self._rest_bits - (value & self._rest_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Corrección para pocos valores: conteo lineal
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+
+class HeavyHitters:
+    """Valores más frecuentes con el algoritmo de Misra-Gries.
+
+    Guarda como mucho `capacity` contadores; cualquier valor que aparezca
+    en más de n / (capacity + 1) filas está garantizado entre ellos. Los
+    recuentos son cotas inferiores.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counters: Dict[str, int] = {}
+
+    def add(self, text: str) -> None:
+        counters = self.counters
+        if text in counters:
+            counters[text] += 1
+        elif len(counters) < self.capacity:
+            counters[text] = 1
+        else:
+            for key in list(counters):
+                if counters[key] == 1:
+                    del counters[key]
+                else:
+                    counters[key] -= 1
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counters.items(), key=lambda item: -item[1])
+        return ranked[:k]
+
+
+class _ColumnProfile:
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self.count = 0
+        self.null_count = 0
+        self.empty_count = 0
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.numeric_count = 0
+        self.numeric_sum = 0.0
+        self.numeric_min: Optional[float] = None
+        self.numeric_max: Optional[float] = None
+        self.distinct = HyperLogLog()
+        self.frequent = HeavyHitters(top_k * HEAVY_HITTERS_FACTOR)
+
+    def update(self, value: Any) -> None:
+        self.count += 1
+        if value is None:
+            self.null_count += 1
+            return
+        if isinstance(value, str):
+            text = value
+            number = float(value) if FLOAT_PATTERN.fullmatch(value) else None
+        else:
+            text = json.dumps(value, default=str)
+            number = (
+                float(value)
+                if isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                else None
+            )
+        if text == "":
+            self.empty_count += 1
+        length = len(text)
+        if self.min_length is None or length < self.min_length:
+            self.min_length = length
+        if self.max_length is None or length > self.max_length:
+            self.max_length = length
+        if number is not None and math.isfinite(number):
+            self.numeric_count += 1
+            self.numeric_sum += number
+            if self.numeric_min is None or number < self.numeric_min:
+                self.numeric_min = number
+            if self.numeric_max is None or number > self.numeric_max:
+                self.numeric_max = number
+        self.distinct.add(text)
+        self.frequent.add(text)
+
+    def to_dict(self, row_count: int) -> Dict:
+        # Las filas en las que la columna no aparecía cuentan como nulas
+        missing = row_count - self.count
+        return {
+            "null_count": self.null_count + missing,
+            "empty_count": self.empty_count,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "numeric_count": self.numeric_count,
+            "min": self.numeric_min,
+            "max": self.numeric_max,
+            "mean": (
+                self.numeric_sum / self.numeric_count
+                if self.numeric_count
+                else None
+            ),
+            "distinct_count": self.distinct.count(),
+            "top_values": [
+                {"value": value, "count": count}
+                for value, count in self.frequent.top(self.top_k)
+            ],
+        }
+
+
+class ProfileService:
+    def profile(
+        self,
+        records: Iterable[Dict],
+        top_k: int = TOP_K,
+        exclude: Iterable[str] = (),
+    ) -> Dict:
+        """Calcula estadísticas por columna en una sola pasada.
+
+        La memoria no depende del número de filas: cada columna guarda unos
+        contadores, un HyperLogLog para los valores distintos y un resumen
+        de Misra-Gries para los valores más frecuentes. Las columnas de
+        exclude no se perfilan.
+        """
+        columns: Dict[str, _ColumnProfile] = {}
+        exclude = frozenset(exclude)
+        row_count = 0
+        for record in records:
+            row_count += 1
+            for key, value in record.items():
+                if key in exclude:
+                    continue
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = _ColumnProfile(top_k)
+                column.update(value)
+        return {
+            "row_count": row_count,
+            "columns": {
+                key: column.to_dict(row_count)
+                for key, column in columns.items()
+            },
+        }
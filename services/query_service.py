@@ -0,0 +1,172 @@
+import math
+import operator
+import random
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+PREDICATE_PATTERN = re.compile(r"^([^!<>=]+)(!=|>=|<=|=|>|<)(.*)$")
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+Row = Sequence[str]
+_MISSING = object()
+
+
+@dataclass
+class Predicate:
+    column: str
+    op: str
+    value: str
+
+
+def _as_number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _open_unit(rng: random.Random) -> float:
+    # Uniforme en (0, 1): random() puede devolver 0 y log(0) no existe
+    while not (value := rng.random()):
+        pass
+    return value
+
+
+class QueryService:
+    def parse_predicate(self, expression: str) -> Predicate:
+        match = PREDICATE_PATTERN.match(expression)
+        if not match:
+            raise ValueError(f"Invalid filter expression: {expression}")
+        column, op, value = match.groups()
+        return Predicate(column.strip(), op, value.strip())
+
+    def compile_filter(
+        self, headers: List[str], predicates: List[Predicate]
+    ) -> Callable[[Row], bool]:
+        """Compila los predicados (unidos con AND) sobre filas de csv.reader.
+
+        Los valores se comparan sin espacios alrededor y antes de normalizar;
+        si ambos lados son numéricos se comparan como números.
+        """
+        checks = [self._compile_predicate(headers, p) for p in predicates]
+
+        def row_filter(row: Row) -> bool:
+            return all(check(row) for check in checks)
+
+        return row_filter
+
+    def _compile_predicate(
+        self, headers: List[str], predicate: Predicate
+    ) -> Callable[[Row], bool]:
+        index = self._column_index(headers, predicate.column)
+        compare = OPERATORS[predicate.op]
+        expected = predicate.value
+        expected_number = _as_number(expected)
+
+        def check(row: Row) -> bool:
+            if index >= len(row):
+                return False
+            value = row[index].strip()
+            if expected_number is not None:
+                number = _as_number(value)
+                if number is not None:
+                    return compare(number, expected_number)
+            return compare(value, expected)
+
+        return check
+
+    def compile_projection(
+        self, headers: List[str], columns: List[str]
+    ) -> Tuple[List[str], Callable[[Row], Tuple[str, ...]]]:
+        """Devuelve las columnas y una función que las extrae de cada fila.
+
+        Las filas más cortas que las cabeceras (modo lenient) dan None en
+        las columnas que les faltan, igual que csv.DictReader.
+        """
+        indices = [self._column_index(headers, column) for column in columns]
+        width = max(indices) + 1
+        getter = operator.itemgetter(*indices)
+        single = len(indices) == 1
+
+        def project(row: Row) -> Tuple[str, ...]:
+            if len(row) >= width:
+                return (getter(row),) if single else getter(row)
+            return tuple(row[i] if i < len(row) else None for i in indices)
+
+        return list(columns), project
+
+    def sample(
+        self, items: Iterable[Any], size: int, seed: Optional[int] = None
+    ) -> List[Any]:
+        """Muestreo uniforme de `size` elementos en una sola pasada.
+
+        Usa el algoritmo L de muestreo de reservorio: en lugar de sortear
+        cada elemento, calcula cuántos saltar hasta el siguiente reemplazo,
+        así que el coste aleatorio crece con size * log(n / size). La
+        memoria es proporcional a size. Los elementos se devuelven en su
+        orden original; la misma semilla da la misma muestra.
+        """
+        rng = random.Random(seed)
+        iterator = iter(items)
+        reservoir = list(enumerate(islice(iterator, size)))
+        position = len(reservoir)
+        if position == size:
+            weight = math.exp(math.log(_open_unit(rng)) / size)
+            while True:
+                skip = math.floor(
+                    math.log(_open_unit(rng)) / math.log(1 - weight)
+                )
+                position += skip
+                item = next(islice(iterator, skip, None), _MISSING)
+                if item is _MISSING:
+                    break
+                reservoir[rng.randrange(size)] = (position, item)
+                position += 1
+                weight *= math.exp(math.log(_open_unit(rng)) / size)
+        reservoir.sort(key=operator.itemgetter(0))
+        return [item for _, item in reservoir]
+
+    def require_columns(
+        self, records: Iterable[Dict], columns: List[str]
+    ) -> Iterator[Dict]:
+        """Devuelve los registros y al final falla si falta alguna columna.
+
+        Es la comprobación de columnas para registros sin cabecera (JSON):
+        una columna es desconocida si no aparece en ningún registro, así
+        que el error llega al agotar la entrada. Sin registros no falla.
+        """
+        missing = set(columns)
+        seen = False
+        for record in records:
+            seen = True
+            if missing:
+                missing.difference_update(record.keys())
+            yield record
+        if seen and missing:
+            column = next(c for c in columns if c in missing)
+            raise ValueError(f"Unknown column: {column}")
+
+    def _column_index(self, headers: List[str], column: str) -> int:
+        try:
+            return headers.index(column)
+        except ValueError:
+            raise ValueError(f"Unknown column: {column}") from None
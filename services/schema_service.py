@@ -0,0 +1,306 @@
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+Parser = Callable[[Optional[str]], Any]
+
+INT_PATTERN = re.compile(r"[-+]?(0|[1-9][0-9]*)")
+# Como en INT_PATTERN, los ceros a la izquierda (códigos postales) son texto
+FLOAT_PATTERN = re.compile(
+    r"[-+]?((0|[1-9][0-9]*)(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?"
+)
+DATE_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+DATETIME_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}[T ][0-9:.+\-Z]+")
+BOOL_VALUES = {"true": True, "false": False}
+
+# Orden de preferencia: el primer tipo que acepta todo el muestreo gana
+TYPE_ORDER = ("bool", "int", "float", "date", "datetime")
+# Tipos que se pueden declarar en un esquema registrado
+SCHEMA_TYPES = ("string",) + TYPE_ORDER
+
+# Devuelve el motivo por el que un valor no cumple el esquema, o None
+ValueCheck = Callable[[str], Optional[str]]
+RowCheck = Callable[[Sequence[str]], Optional[str]]
+
+
+def _is_bool(value: str) -> bool:
+    return value.lower() in BOOL_VALUES
+
+
+def _is_date(value: str) -> bool:
+    if not DATE_PATTERN.fullmatch(value):
+        return False
+    try:
+        date.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_datetime(value: str) -> bool:
+    if not DATETIME_PATTERN.fullmatch(value):
+        return False
+    try:
+        datetime.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _parse_float(value: str) -> float:
+    # float() también acepta "nan" o "inf", que no son JSON válido
+    if not FLOAT_PATTERN.fullmatch(value):
+        raise ValueError(f"could not convert string to float: {value!r}")
+    return float(value)
+
+
+TYPE_CHECKS = {
+    "bool": _is_bool,
+    "int": lambda value: INT_PATTERN.fullmatch(value) is not None,
+    "float": lambda value: FLOAT_PATTERN.fullmatch(value) is not None,
+    "date": _is_date,
+    "datetime": _is_datetime,
+}
+
+TYPE_CONVERTERS = {
+    "bool": lambda value: BOOL_VALUES[value.lower()],
+    "int": int,
+    "float": _parse_float,
+    "date": date.fromisoformat,
+    "datetime": datetime.fromisoformat,
+    "null": str,
+}
+
+
+@dataclass
+class CompiledSchema:
+    """Esquema registrado, con sus comprobaciones y conversores compilados."""
+
+    schema_id: str
+    definition: Dict
+    types: Dict[str, str]
+    checks: Dict[str, ValueCheck]
+    parsers: Dict[str, Parser] = field(default_factory=dict)
+
+    def header_errors(self, headers: List[str]) -> List[str]:
+        errors = [
+            f"Falta la columna {column} del esquema"
+            for column in self.types
+            if column not in headers
+        ]
+        errors += [
+            f"La columna {column} no está en el esquema"
+            for column in headers
+            if column not in self.types
+        ]
+        return errors
+
+    def bind(self, headers: List[str]) -> RowCheck:
+        """Devuelve la comprobación de filas de csv.reader con esas cabeceras."""
+        checks = [
+            (headers.index(column), check)
+            for column, check in self.checks.items()
+            if column in headers
+        ]
+
+        def check_row(row: Sequence[str]) -> Optional[str]:
+            for index, check in checks:
+                reason = check(row[index].strip())
+                if reason:
+                    return reason
+            return None
+
+        return check_row
+
+
+class SchemaService:
+    def __init__(self):
+        self._schemas: Dict[str, CompiledSchema] = {}
+        self._lock = threading.Lock()
+
+    def infer_schema(self, sample: List[Dict]) -> Dict[str, str]:
+        """Infiere el tipo de cada columna a partir de un muestreo de filas.
+
+        Los tipos posibles son bool, int, float, date, datetime y string;
+        una columna sin ningún valor en el muestreo se marca como null.
+        """
+        columns: Dict[str, List[str]] = {}
+        for row in sample:
+            for key, value in row.items():
+                values = columns.setdefault(key, [])
+                if isinstance(value, str) and value != "":
+                    values.append(value)
+
+        return {
+            key: self._infer_column_type(values)
+            for key, values in columns.items()
+        }
+
+    def _infer_column_type(self, values: List[str]) -> str:
+        if not values:
+            return "null"
+        for type_name in TYPE_ORDER:
+            check = TYPE_CHECKS[type_name]
+            if all(check(value) for value in values):
+                return type_name
+        return "string"
+
+    def compile_parsers(self, schema: Dict[str, str]) -> Dict[str, Parser]:
+        return {
+            key: self._compile_parser(type_name)
+            for key, type_name in schema.items()
+        }
+
+    def _compile_parser(self, type_name: str) -> Parser:
+        convert = TYPE_CONVERTERS.get(type_name)
+
+        def parse(value: Optional[str]) -> Any:
+            if convert is None:
+                return value
+            if value is None or value == "":
+                return None
+            try:
+                return convert(value)
+            except (ValueError, KeyError):
+                # El muestreo no garantiza el tipo: se conserva el texto
+                return value
+
+        return parse
+
+    def apply_parsers(self, parsers: Dict[str, Parser], row: Dict) -> Dict:
+        return {
+            key: parsers[key](value) if key in parsers else value
+            for key, value in row.items()
+        }
+
+    def register_schema(self, definition: Dict) -> CompiledSchema:
+        """Compila y guarda un esquema; devuelve el ya guardado si existe.
+
+        La definición es {"columns": [{"name", "type", "required",
+        "allowed"}, ...]}. El identificador se deriva del contenido, así que
+        registrar dos veces el mismo esquema devuelve el mismo id.
+        """
+        columns = self._schema_columns(definition)
+        canonical = json.dumps({"columns": columns}, sort_keys=True)
+        schema_id = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+        with self._lock:
+            if schema_id not in self._schemas:
+                self._schemas[schema_id] = self._compile_schema(
+                    schema_id, columns
+                )
+            return self._schemas[schema_id]
+
+    def get_schema(self, schema_id: str) -> CompiledSchema:
+        with self._lock:
+            if schema_id not in self._schemas:
+                raise KeyError(f"Schema {schema_id} not found")
+            return self._schemas[schema_id]
+
+    def _schema_columns(self, definition: Any) -> List[Dict]:
+        columns = (
+            definition.get("columns") if isinstance(definition, dict) else None
+        )
+        if not isinstance(columns, list) or not columns:
+            raise ValueError("Schema must have a non-empty list of columns")
+        normalized = []
+        names = set()
+        for column in columns:
+            if not isinstance(column, dict) or not isinstance(
+                column.get("name"), str
+            ):
+                raise ValueError("Every schema column needs a name")
+            name = column["name"]
+            if name in names:
+                raise ValueError(f"Duplicate schema column: {name}")
+            names.add(name)
+            type_name = column.get("type", "string")
+            if type_name not in SCHEMA_TYPES:
+                raise ValueError(f"Unsupported type for {name}: {type_name}")
+            allowed = column.get("allowed")
+            if allowed is not None and not isinstance(allowed, list):
+                raise ValueError(f"allowed for {name} must be a list")
+            if allowed is not None:
+                allowed = [self._allowed_text(value) for value in allowed]
+                self._check_allowed(name, type_name, allowed)
+            normalized.append(
+                {
+                    "name": name,
+                    "type": type_name,
+                    "required": bool(column.get("required", False)),
+                    "allowed": allowed,
+                }
+            )
+        return normalized
+
+    def _check_allowed(
+        self, name: str, type_name: str, allowed: List[str]
+    ) -> None:
+        # Un valor permitido que no es del tipo de la columna nunca casaría
+        convert = TYPE_CONVERTERS.get(type_name)
+        if not convert:
+            return
+        for value in allowed:
+            try:
+                convert(value)
+            except (ValueError, KeyError):
+                raise ValueError(
+                    f"Invalid allowed value for {name}: {value}"
+                ) from None
+
+    def _allowed_text(self, value: Any) -> str:
+        # Los valores se comparan con el texto del CSV: true, no True
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def _compile_schema(
+        self, schema_id: str, columns: List[Dict]
+    ) -> CompiledSchema:
+        types = {column["name"]: column["type"] for column in columns}
+        return CompiledSchema(
+            schema_id=schema_id,
+            definition={"columns": columns},
+            types=types,
+            checks={
+                column["name"]: self._compile_check(column)
+                for column in columns
+            },
+            parsers=self.compile_parsers(types),
+        )
+
+    def _compile_check(self, column: Dict) -> ValueCheck:
+        name = column["name"]
+        type_name = column["type"]
+        required = column["required"]
+        # Se comprueba con el mismo conversor que se aplicará al convertir;
+        # los valores permitidos se comparan ya convertidos ("TRUE" es true)
+        convert = TYPE_CONVERTERS.get(type_name)
+        allowed = None
+        if column["allowed"]:
+            allowed = {
+                convert(value) if convert else value
+                for value in column["allowed"]
+            }
+
+        def check(value: str) -> Optional[str]:
+            if value == "":
+                if required:
+                    return f"Falta el valor obligatorio de la columna {name}"
+                return None
+            parsed = value
+            if convert:
+                try:
+                    parsed = convert(value)
+                except (ValueError, KeyError):
+                    return (
+                        f"Valor no válido en la columna {name} ({type_name})"
+                    )
+            if allowed is not None and parsed not in allowed:
+                return f"Valor no permitido en la columna {name}"
+            return None
+
+        return check
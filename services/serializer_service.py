@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Número de registros que se agrupan en cada fragmento de la respuesta
+CHUNK_RECORDS = 500
+
+ORIENTS = ("records", "split", "ndjson")
+MIME_TYPES = {
+    "records": "application/json",
+    "split": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class SerializerService:
+    def iter_json(
+        self,
+        records: Iterable[Dict],
+        orient: str = "records",
+        columns: Optional[List[str]] = None,
+        **extra: Any,
+    ) -> Iterator[str]:
+        """Serializa los registros en fragmentos de texto según `orient`.
+
+        - records: {"data": [{...}, ...], **extra}
+        - split: {"columns": [...], "data": [[...], ...], **extra}
+        - ndjson: un objeto JSON por línea; los campos extra invocables
+          van en una última línea {"trailer": {...}} y el resto se omite
+
+        Los registros se codifican a medida que se consumen, sin construir
+        la lista completa en memoria. Un campo extra invocable se evalúa
+        tras escribir los datos, para valores que solo se conocen al final.
+        """
+        if orient not in ORIENTS:
+            raise ValueError(f"Unsupported orient: {orient}")
+        if orient == "ndjson":
+            yield from self.iter_ndjson(records)
+            trailer = {
+                key: value() for key, value in extra.items() if callable(value)
+            }
+            if trailer:
+                yield self.dumps({"trailer": trailer}) + "\n"
+            return
+
+        if orient == "split":
+            records = iter(records)
+            if columns is None:
+                first = next(records, None)
+                columns = list(first) if first is not None else []
+                records = chain([first] if first is not None else [], records)
+            yield f'{{"columns": {self.dumps(columns)}, "data": ['
+            items = ([record.get(c) for c in columns] for record in records)
+        else:
+            yield '{"data": ['
+            items = records
+
+        separator = ""
+        for chunk in self._chunks(items):
+            # Un solo dumps por bloque es más rápido que uno por registro
+            yield separator + self.dumps(chunk)[1:-1]
+            separator = ", "
+        yield "]"
+        for key, value in extra.items():
+            if callable(value):
+                value = value()
+            yield f", {json.dumps(key)}: {self.dumps(value)}"
+        yield "}"
+
+    def iter_json_fragments(
+        self, fragments: Iterable[str], **extra: Any
+    ) -> Iterator[str]:
+        """Como iter_json (records) con registros ya serializados.
+
+        Cada fragmento es una lista JSON de registros sin los corchetes,
+        por ejemplo la salida guardada de una conversión anterior.
+        """
+        yield '{"data": ['
+        separator = ""
+        for fragment in fragments:
+            yield separator + fragment
+            separator = ", "
+        yield "]"
+        for key, value in extra.items():
+            if callable(value):
+                value = value()
+            yield f", {json.dumps(key)}: {self.dumps(value)}"
+        yield "}"
+
+    def iter_csv(
+        self,
+        records: Iterable[Dict],
+        fieldnames: List[str],
+        chunk_size: int = CHUNK_RECORDS,
+    ) -> Iterator[str]:
+        """Escribe los registros como CSV con las columnas indicadas.
+
+        Las claves que no están en fieldnames se ignoran; sin columnas no
+        se escribe nada.
+        """
+        if not fieldnames:
+            return
+        output = io.StringIO()
+        writer = csv.DictWriter(
+            output, fieldnames=fieldnames, extrasaction="ignore"
+        )
+        writer.writeheader()
+        iterator = iter(records)
+        while chunk := list(islice(iterator, chunk_size)):
+            writer.writerows(chunk)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+        if output.tell():
+            yield output.getvalue()
+
+    def iter_ndjson(self, records: Iterable[Dict]) -> Iterator[str]:
+        for chunk in self._chunks(records):
+            yield "".join(self.dumps(record) + "\n" for record in chunk)
+
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value, default=self._default)
+
+    def _chunks(self, items: Iterable) -> Iterator[List]:
+        iterator = iter(items)
+        while chunk := list(islice(iterator, CHUNK_RECORDS)):
+            yield chunk
+
+    def _default(self, value: Any) -> Any:
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        raise TypeError(
+            f"Object of type {type(value).__name__} is not JSON serializable"
+        )
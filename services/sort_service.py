@@ -0,0 +1,142 @@
+import heapq
+import pickle
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from .file_service import FileService
+
+# Registros que se ordenan en memoria antes de volcar un tramo a disco
+RUN_SIZE = 50000
+# Registros que se serializan juntos dentro de un tramo
+RUN_BATCH = 1000
+
+SortKey = Callable[[Dict], tuple]
+
+
+class _Descending:
+    """Invierte la comparación de un valor para ordenar de mayor a menor."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def _comparable(value: Any) -> tuple:
+    # Números antes que textos, para que una columna mixta no falle
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, (date, datetime)):
+        return (1, value.isoformat())
+    return (1, str(value))
+
+
+class SortService:
+    def __init__(self, file_service: FileService, run_size: int = RUN_SIZE):
+        self.file_service = file_service
+        self.run_size = run_size
+
+    def parse_sort(self, expression: str) -> List[str]:
+        """Separa "a,-b" en columnas; el prefijo "-" indica descendente."""
+        keys = [part.strip() for part in expression.split(",")]
+        return [key for key in keys if key and key != "-"]
+
+    def compile_key(
+        self, sort_by: List[str], columns: Optional[List[str]] = None
+    ) -> SortKey:
+        """Compila la clave de ordenación de los registros.
+
+        Los valores nulos o ausentes van siempre al final, también en
+        orden descendente.
+        """
+        parts = []
+        for spec in sort_by:
+            descending = spec.startswith("-")
+            column = spec[1:] if descending else spec
+            if columns is not None and column not in columns:
+                raise ValueError(f"Unknown column: {column}")
+            parts.append((column, descending))
+
+        def key(record: Dict) -> tuple:
+            values = []
+            for column, descending in parts:
+                value = record.get(column)
+                if value is None:
+                    values.append((True, None))
+                    continue
+                value = _comparable(value)
+                values.append(
+                    (False, _Descending(value) if descending else value)
+                )
+            return tuple(values)
+
+        return key
+
+    def sort(
+        self,
+        records: Iterable[Dict],
+        sort_by: List[str],
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """Ordena los registros con una ordenación externa por mezcla.
+
+        Los registros se ordenan en memoria por tramos de run_size; si no
+        caben en un solo tramo, cada tramo se vuelca a un archivo temporal
+        en la carpeta de subidas y se mezclan todos (k-way) a medida que se
+        consume el resultado. Es estable: a igual clave se mantiene el orden
+        de entrada. Las columnas desconocidas se detectan al llamar.
+        """
+        key = self.compile_key(sort_by, columns)
+        return self._merge_sort(records, key)
+
+    def _merge_sort(
+        self, records: Iterable[Dict], key: SortKey
+    ) -> Iterator[Dict]:
+        runs: List[Path] = []
+        readers: List[Iterator[Dict]] = []
+        iterator = iter(records)
+        try:
+            while chunk := list(islice(iterator, self.run_size)):
+                chunk.sort(key=key)
+                if not runs and len(chunk) < self.run_size:
+                    # Todo cabe en memoria: no hace falta ningún archivo
+                    yield from chunk
+                    return
+                runs.append(self._write_run(chunk))
+                del chunk
+            readers = [self._read_run(path) for path in runs]
+            yield from heapq.merge(*readers, key=key)
+        finally:
+            # Se cierran los lectores antes de borrar (necesario en Windows)
+            for reader in readers:
+                reader.close()
+            for path in runs:
+                path.unlink(missing_ok=True)
+
+    def _write_run(self, records: List[Dict]) -> Path:
+        # pickle conserva los tipos (fechas, enteros) de los registros
+        path = self.file_service.create_spill_file(".run")
+        with path.open("wb") as file:
+            for start in range(0, len(records), RUN_BATCH):
+                pickle.dump(
+                    records[start : start + RUN_BATCH],
+                    file,
+                    pickle.HIGHEST_PROTOCOL,
+                )
+        return path
+
+    def _read_run(self, path: Path) -> Iterator[Dict]:
+        with path.open("rb") as file:
+            while True:
+                try:
+                    batch = pickle.load(file)
+                except EOFError:
+                    return
+                yield from batch
@@ -1,8 +1,19 @@
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Sequence
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usa el bucle por filas
+    np = None
+
+LOCATION_FIELDS = ("city", "country", "state")
+ENRICHED_FIELDS = ("record_id", "processed_at")
+
 
 class TransformationService:
+    def __init__(self, use_numpy: bool = True):
+        self.use_numpy = use_numpy and np is not None
+
     def normalize_csv_data(self, data: List[Dict]) -> List[Dict]:
         normalized = []
         for row in data:
@@ -13,7 +24,7 @@ class TransformationService:
                     normalized_value = value.strip()
 
                     # Solo aplicamos Title() a campos de ubicación
-                    if key.lower() in ["city", "country", "state"]:
+                    if key.lower() in LOCATION_FIELDS:
                         normalized_value = normalized_value.title()
                     # Para nombres, mantenemos el formato original
                     elif key.lower() == "name":
@@ -25,9 +36,60 @@ class TransformationService:
             normalized.append(normalized_row)
         return normalized
 
-    def enrich_json_data(self, data: List[Dict]) -> List[Dict]:
+    def normalize_csv_batches(
+        self, headers: List[str], rows: Iterable[List[str]], batch_size: int
+    ) -> Iterator[List[Dict]]:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield self.normalize_csv_batch(headers, batch)
+                batch = []
+        if batch:
+            yield self.normalize_csv_batch(headers, batch)
+
+    def normalize_csv_batch(
+        self, headers: List[str], batch: List[List[str]]
+    ) -> List[Dict]:
+        """Normaliza un bloque de filas de csv.reader columna a columna.
+
+        Produce lo mismo que normalize_csv_data sobre las filas de
+        csv.DictReader; sin NumPy, o si alguna fila no tiene tantos campos
+        como cabeceras o le faltan valores (None), se recurre a ese bucle.
+        """
+        width = len(headers)
+        if not self.use_numpy or any(
+            len(row) != width or None in row for row in batch
+        ):
+            rows = [self._row_to_dict(headers, row) for row in batch]
+            return self.normalize_csv_data(rows)
+
+        columns = [
+            self.normalize_csv_column(key, column)
+            for key, column in zip(headers, zip(*batch))
+        ]
+        return [dict(zip(headers, values)) for values in zip(*columns)]
+
+    def normalize_csv_column(self, key: str, values: Sequence[str]) -> List:
+        column = np.char.strip(np.array(values, dtype=str))
+        if key.lower() in LOCATION_FIELDS:
+            # title() no está vectorizado: se aplica a los valores distintos
+            uniques, inverse = np.unique(column, return_inverse=True)
+            column = np.char.title(uniques)[inverse]
+        return column.tolist()
+
+    def _row_to_dict(self, headers: List[str], row: List[str]) -> Dict:
+        # Mismo resultado que csv.DictReader con restkey/restval por defecto
+        record = dict(zip(headers, row))
+        if len(row) > len(headers):
+            record[None] = row[len(headers) :]
+        for key in headers[len(row) :]:
+            record[key] = None
+        return record
+
+    def enrich_json_data(self, data: List[Dict], start: int = 0) -> List[Dict]:
         enriched = []
-        for i, row in enumerate(data):
+        for i, row in enumerate(data, start):
             enriched_row = row.copy()
             enriched_row["record_id"] = f"REC-{i+1:04d}"
             enriched_row["processed_at"] = datetime.now().isoformat()
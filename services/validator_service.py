@@ -1,38 +1,146 @@
 from dataclasses import dataclass
-from typing import List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+from itertools import islice
 import csv
+import io
 import json
+import re
+from .schema_service import CompiledSchema
+
+# Caracteres que se leen de cada vez al validar un documento JSON
+JSON_READ_SIZE = 64 * 1024
+# Tamaño máximo de un elemento del array al validar por streaming
+MAX_JSON_ITEM_SIZE = 16 * 1024 * 1024
+# Caracteres que cambian el estado al buscar el final de un elemento
+STRING_BODY = re.compile(r'(?:[^"\\]+|\\.)*', re.DOTALL)
+NESTED_SPECIAL = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r"[\s,\]}]")
+# Líneas JSON Lines que se decodifican juntas al validar
+JSON_LINES_VALIDATION_BLOCK = 5000
 
 
 @dataclass
 class ValidationResult:
     is_valid: bool
     errors: List[str]
+    row_count: int = 0
+    column_count: int = 0
+
+
+@dataclass
+class RejectedRow:
+    """Fila descartada en modo tolerante: su línea, el motivo y el dato."""
+
+    line: int
+    reason: str
+    content: Any
 
 
 class ValidatorService:
-    def validate_csv_structure(self, content: str) -> ValidationResult:
-        try:
-            lines = content.strip().split("\n")
-            if not lines:
-                return ValidationResult(False, ["Archivo vacío"])
+    def validate_csv_structure(
+        self, content: str, max_errors: Optional[int] = 1
+    ) -> ValidationResult:
+        content = content.strip()
+        if not content:
+            return ValidationResult(False, ["Archivo vacío"])
+        return self.validate_csv_rows(
+            csv.reader(io.StringIO(content, newline="")), max_errors
+        )
+
+    def validate_csv_rows(
+        self,
+        rows: Iterable[List[str]],
+        max_errors: Optional[int] = 1,
+        rejects: Optional[Callable[[RejectedRow], None]] = None,
+        schema: Optional[CompiledSchema] = None,
+    ) -> ValidationResult:
+        """Valida las filas de un csv.reader sin cargarlas en memoria.
+
+        Los errores indican la línea física donde empieza la fila (un campo
+        entre comillas puede ocupar varias líneas), tomada de line_num del
+        lector. Se detiene al llegar a max_errors errores; con None los
+        reúne todos en una sola pasada. Las filas vacías al principio y al
+        final se ignoran, igual que al validar el contenido con strip().
+
+        Con schema, las cabeceras deben ser las del esquema y cada fila se
+        comprueba con sus validadores compilados en esta misma pasada.
+        Con rejects (modo tolerante) las filas con otro número de columnas
+        o que no cumplen el esquema no son errores: se pasan a rejects y
+        las filas vacías se ignoran.
+        """
+        rows = iter(rows)
+        errors: List[str] = []
+        line = 0
+        row_count = 0
 
-            reader = csv.reader(lines)
-            headers = next(reader)
+        def row_lines() -> Iterator[Tuple[int, List[str]]]:
+            nonlocal line
+            count = 0
+            for row in rows:
+                count += 1
+                start = line + 1
+                line = getattr(rows, "line_num", count)
+                yield start, row
+
+        def add(message: str) -> bool:
+            errors.append(message)
+            return max_errors is not None and len(errors) >= max_errors
+
+        numbered = row_lines()
+        try:
+            headers = next((row for _, row in numbered if row), None)
             if not headers:
                 return ValidationResult(
                     False, ["No se encontraron encabezados en el CSV"]
                 )
+            check_row = None
+            if schema:
+                header_errors = schema.header_errors(headers)
+                if header_errors:
+                    return ValidationResult(False, header_errors)
+                check_row = schema.bind(headers)
 
-            for i, row in enumerate(reader, 1):
+            blank_line = None
+            for start, row in numbered:
+                if not row:
+                    if not rejects:
+                        blank_line = blank_line or start
+                    continue
+                row_count += 1
+                reason = None
                 if len(row) != len(headers):
-                    return ValidationResult(
-                        False,
-                        [f"Número inconsistente de columnas en la línea {i}"],
-                    )
-            return ValidationResult(True, [])
-        except Exception as e:
-            return ValidationResult(False, [str(e)])
+                    reason = "Número inconsistente de columnas"
+                elif check_row:
+                    reason = check_row(row)
+                if rejects:
+                    if reason:
+                        rejects(
+                            RejectedRow(
+                                start, f"{reason} en la línea {start}", row
+                            )
+                        )
+                    continue
+                if blank_line and add(
+                    f"Número inconsistente de columnas en la línea "
+                    f"{blank_line}"
+                ):
+                    break
+                blank_line = None
+                if reason and add(f"{reason} en la línea {start}"):
+                    break
+        except (csv.Error, UnicodeDecodeError) as e:
+            add(f"Error de formato en la línea {line + 1}: {e}")
+        return ValidationResult(not errors, errors, row_count, len(headers))
 
     def validate_json_structure(self, content: str) -> ValidationResult:
         try:
@@ -50,3 +158,232 @@ class ValidatorService:
             return ValidationResult(True, [])
         except json.JSONDecodeError:
             return ValidationResult(False, ["Invalid JSON format"])
+
+    def validate_json_stream(
+        self,
+        text: TextIO,
+        max_errors: Optional[int] = 1,
+        read_size: int = JSON_READ_SIZE,
+    ) -> ValidationResult:
+        """Valida un documento JSON (un array de objetos) sin cargarlo.
+
+        Los elementos del array se decodifican de uno en uno a medida que
+        se lee el texto; en memoria solo queda el elemento actual y el
+        conjunto de claves, que da el número de columnas.
+        """
+        errors: List[str] = []
+        keys: Dict[str, None] = {}
+        count = 0
+        try:
+            for count, item in enumerate(
+                self._json_array_items(text, read_size), 1
+            ):
+                if isinstance(item, dict):
+                    keys.update(dict.fromkeys(item))
+                    continue
+                errors.append(f"Item {count} must be an object")
+                if max_errors is not None and len(errors) >= max_errors:
+                    break
+        except ValueError as e:
+            errors.append(str(e))
+        if not count and not errors:
+            errors.append("Empty JSON list")
+        return ValidationResult(not errors, errors, count, len(keys))
+
+    def _json_array_items(self, text: TextIO, read_size: int) -> Iterator[Any]:
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        finished = False
+
+        def fill() -> bool:
+            # Añade texto al búfer conservando solo lo que falta por leer
+            nonlocal buffer, position, finished
+            chunk = "" if finished else text.read(read_size)
+            if not chunk:
+                finished = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def peek() -> str:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if not fill():
+                    return ""
+
+        first = peek()
+        if first != "[":
+            raise ValueError(
+                "JSON must be a list of objects"
+                if first and first in '{"-0123456789tfn'
+                else "Invalid JSON format"
+            )
+        position += 1
+        if peek() == "]":
+            position += 1
+        else:
+            while True:
+                # Se delimita el elemento y se decodifica una sola vez; los
+                # trozos de las lecturas se guardan y se unen al final
+                scanner = _ItemScanner(peek())
+                parts: List[str] = []
+                size = 0
+                while True:
+                    end = scanner.scan(buffer, position)
+                    if end >= 0:
+                        parts.append(buffer[position:end])
+                        position = end
+                        break
+                    parts.append(buffer[position:])
+                    size += len(buffer) - position
+                    position = len(buffer)
+                    if size > MAX_JSON_ITEM_SIZE:
+                        raise ValueError("Invalid JSON format")
+                    if not fill():
+                        if not scanner.scalar:
+                            raise ValueError("Invalid JSON format")
+                        # Un número (o true, null...) puede acabar el texto
+                        break
+                item_text = "".join(parts)
+                try:
+                    item, end = decoder.raw_decode(item_text)
+                except json.JSONDecodeError:
+                    raise ValueError("Invalid JSON format") from None
+                if end != len(item_text):
+                    raise ValueError("Invalid JSON format")
+                yield item
+                separator = peek()
+                position += 1
+                if separator == "]":
+                    break
+                if separator != "," or peek() == "]":
+                    raise ValueError("Invalid JSON format")
+        if peek():
+            raise ValueError("Invalid JSON format")
+
+    def validate_json_lines_stream(
+        self, lines: Iterable[str], max_errors: Optional[int] = 1
+    ) -> ValidationResult:
+        """Valida JSON Lines por bloques, sin conservar los objetos."""
+        errors: List[str] = []
+        keys: Dict[str, None] = {}
+        count = 0
+        lines = iter(lines)
+        first_line = 1
+        while block := list(islice(lines, JSON_LINES_VALIDATION_BLOCK)):
+            records, rejected = self.split_json_lines(block, first_line)
+            first_line += len(block)
+            count += len(records)
+            for record in records:
+                keys.update(dict.fromkeys(record))
+            errors.extend(row.reason for row in rejected)
+            if max_errors is not None and len(errors) >= max_errors:
+                errors = errors[:max_errors]
+                break
+        if not count and not errors:
+            errors.append("Empty JSON Lines file")
+        return ValidationResult(not errors, errors, count, len(keys))
+
+    def parse_json_lines(
+        self, lines: List[str], first_line: int = 1
+    ) -> Tuple[List[Dict], List[str]]:
+        """Decodifica un bloque de líneas JSON Lines.
+
+        Devuelve los objetos válidos y un error por cada línea mal formada,
+        con su número de línea en el archivo. Las líneas en blanco se omiten.
+        """
+        records, rejected = self.split_json_lines(lines, first_line)
+        return records, [row.reason for row in rejected]
+
+    def split_json_lines(
+        self, lines: List[str], first_line: int = 1
+    ) -> Tuple[List[Dict], List[RejectedRow]]:
+        """Como parse_json_lines, pero conserva el texto de cada línea mala."""
+        records = []
+        rejected = []
+        for line_number, line in enumerate(lines, first_line):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                rejected.append(
+                    RejectedRow(
+                        line_number,
+                        f"Invalid JSON on line {line_number}",
+                        line.rstrip("\r\n"),
+                    )
+                )
+                continue
+            if not isinstance(record, dict):
+                rejected.append(
+                    RejectedRow(
+                        line_number,
+                        f"Line {line_number} must be a JSON object",
+                        line.rstrip("\r\n"),
+                    )
+                )
+                continue
+            records.append(record)
+        return records, rejected
+
+
+class _ItemScanner:
+    """Busca dónde acaba un valor JSON en un texto que llega por trozos.
+
+    Solo sigue las comillas, los escapes y el anidamiento, sin decodificar
+    nada, y conserva ese estado entre trozos: cada carácter se examina una
+    vez aunque el valor ocupe muchas lecturas.
+    """
+
+    def __init__(self, first: str):
+        self.scalar = first not in '[{"'
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def scan(self, text: str, position: int) -> int:
+        """Devuelve la posición en que acaba el valor, o -1 si sigue."""
+        if self.scalar:
+            match = SCALAR_END.search(text, position)
+            return match.start() if match else -1
+        while True:
+            if self.escaped:
+                if position >= len(text):
+                    return -1
+                position += 1
+                self.escaped = False
+            if self.in_string:
+                # Se salta el contenido con sus escapes; se para en la
+                # comilla de cierre o en una barra invertida al final
+                position = STRING_BODY.match(text, position).end()
+                if position == len(text):
+                    return -1
+                if text[position] == "\\":
+                    self.escaped = True
+                    position += 1
+                    continue
+                position += 1
+                self.in_string = False
+                if not self.depth:
+                    return position
+                continue
+            match = NESTED_SPECIAL.search(text, position)
+            if not match:
+                return -1
+            position = match.end()
+            char = match.group()
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if not self.depth:
+                    return position
@@ -0,0 +1,20 @@
+import pytest
+from services import (
+    ConverterService,
+    FileService,
+    TransformationService,
+    ValidatorService,
+)
+
+
+@pytest.fixture
+def converter_service(tmp_path):
+    """ConverterService real sobre un directorio temporal."""
+    service = ConverterService(
+        ValidatorService(),
+        FileService(tmp_path),
+        TransformationService(),
+        max_workers=2,
+    )
+    yield service
+    service.shutdown()
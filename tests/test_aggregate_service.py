@@ -0,0 +1,109 @@
+import pytest
+from services import Aggregate, AggregateService, FileService
+
+
+class TestAggregateService:
+    @pytest.fixture
+    def aggregate_service(self, tmp_path):
+        return AggregateService(FileService(tmp_path), max_groups=4)
+
+    def test_aggregate(self, aggregate_service):
+        records = [
+            {"region": "N", "amount": "10"},
+            {"region": "S", "amount": "2.5"},
+            {"region": "N", "amount": "n/a"},
+            {"region": "N", "amount": 5},
+            {"region": "S", "amount": None},
+        ]
+        aggregates = aggregate_service.parse_aggregates(
+            ["count,count:amount", "sum:amount,min:amount", "max:amount"]
+            + ["mean:amount"]
+        )
+
+        groups = list(
+            aggregate_service.aggregate(records, ["region"], aggregates)
+        )
+
+        assert groups == [
+            {
+                "region": "N",
+                "count": 3,
+                "count_amount": 3,
+                "sum_amount": 15,
+                "min_amount": 5,
+                "max_amount": 10,
+                "mean_amount": 7.5,
+            },
+            {
+                "region": "S",
+                "count": 2,
+                "count_amount": 1,
+                "sum_amount": 2.5,
+                "min_amount": 2.5,
+                "max_amount": 2.5,
+                "mean_amount": 2.5,
+            },
+        ]
+
+    def test_aggregate_spills_partitions(self, aggregate_service, tmp_path):
+        records = [{"k": i % 50, "v": i} for i in range(500)]
+
+        groups = aggregate_service.aggregate(
+            records, ["k"], [Aggregate("count"), Aggregate("sum", "v")]
+        )
+        first = next(groups)
+        spilled = list(tmp_path.iterdir())
+        rest = list(groups)
+
+        assert len(spilled) == 16
+        by_key = {g["k"]: g for g in [first] + rest}
+        assert len(by_key) == 50
+        assert by_key[7] == {"k": 7, "count": 10, "sum_v": 7 * 10 + 2250}
+        assert list(tmp_path.iterdir()) == []
+
+    def test_abandoned_aggregate_removes_partitions(
+        self, aggregate_service, tmp_path
+    ):
+        groups = aggregate_service.aggregate(
+            ({"k": i} for i in range(100)), ["k"], [Aggregate("count")]
+        )
+
+        next(groups)
+        groups.close()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_aggregate_without_group_by(self, aggregate_service):
+        groups = aggregate_service.aggregate(
+            [{"a": 1}, {"a": 2}], [], aggregate_service.parse_aggregates([])
+        )
+
+        assert list(groups) == [{"count": 2}]
+
+    def test_invalid_aggregates(self, aggregate_service):
+        with pytest.raises(ValueError, match="Unsupported aggregate: avg"):
+            aggregate_service.parse_aggregates(["avg:x"])
+        with pytest.raises(ValueError, match="Aggregate sum needs a column"):
+            aggregate_service.parse_aggregates(["sum"])
+        with pytest.raises(ValueError, match="Unknown column: zone"):
+            aggregate_service.aggregate(
+                [], ["zone"], [Aggregate("count")], columns=["region"]
+            )
+
+    def test_unknown_column_without_columns(self, aggregate_service):
+        records = [{"region": "N"}, {"region": "S", "amount": 4}]
+
+        with pytest.raises(ValueError, match="Unknown column: zone"):
+            aggregate_service.aggregate(
+                records, ["zone"], [Aggregate("count")]
+            )
+        groups = aggregate_service.aggregate(
+            records, ["region"], [Aggregate("sum", "amount")]
+        )
+        empty = aggregate_service.aggregate([], ["zone"], [Aggregate("count")])
+
+        assert list(groups) == [
+            {"region": "N", "sum_amount": None},
+            {"region": "S", "sum_amount": 4},
+        ]
+        assert list(empty) == []
@@ -1,8 +1,14 @@
+import csv
+import io
+import json
+import zipfile
 import pytest
 from pathlib import Path
 from unittest.mock import Mock
 from services import (
+    CsvDialect,
     ConverterService,
+    ConversionOptions,
     ValidatorService,
     FileService,
     TransformationService,
@@ -40,29 +46,57 @@ class TestConverterService:
         self,
         converter_service,
         mock_validator_service,
+        mock_file_service,
         mock_transformation_service,
     ):
-        mock_validator_service.validate_csv_structure.return_value.is_valid = (
-            True
-        )
-        mock_validator_service.validate_csv_structure.return_value.errors = []
+        mock_validator_service.validate_csv_rows.return_value.is_valid = True
+        mock_validator_service.validate_csv_rows.return_value.errors = []
         mock_transformation_service.normalize_csv_data.return_value = [
             {"name": "John Doe", "city": "New York"}
         ]
+        mock_file_service.open_text.side_effect = lambda *args: io.StringIO(
+            "name,city\nJohn Doe,New York"
+        )
+        mock_file_service.detect_dialect.return_value = CsvDialect()
 
         file_path = Mock(spec=Path)
-        file_path.read_text.return_value = "name,city\nJohn Doe,New York"
 
         result = converter_service.csv_to_json(file_path)
 
         assert result == [{"name": "John Doe", "city": "New York"}]
-        mock_validator_service.validate_csv_structure.assert_called_once()
+        mock_validator_service.validate_csv_rows.assert_called_once()
         mock_transformation_service.normalize_csv_data.assert_called_once()
 
+    def test_csv_to_json_in_batches(
+        self,
+        converter_service,
+        mock_validator_service,
+        mock_file_service,
+        mock_transformation_service,
+    ):
+        mock_validator_service.validate_csv_rows.return_value.is_valid = True
+        mock_transformation_service.normalize_csv_batches.return_value = iter(
+            [[{"name": "John"}], [{"name": "Jane"}]]
+        )
+        mock_file_service.open_text.side_effect = lambda *args: io.StringIO(
+            "name\nJohn\nJane"
+        )
+        mock_file_service.detect_dialect.return_value = CsvDialect()
+
+        file_path = Mock(spec=Path)
+
+        result = converter_service.csv_to_json(
+            file_path, ConversionOptions(batch_size=1)
+        )
+
+        assert result == [{"name": "John"}, {"name": "Jane"}]
+        mock_transformation_service.normalize_csv_data.assert_not_called()
+
     def test_json_to_csv(
         self,
         converter_service,
         mock_validator_service,
+        mock_file_service,
         mock_transformation_service,
     ):
         mock_validator_service.validate_json_structure.return_value.is_valid = (
@@ -73,14 +107,356 @@ class TestConverterService:
             {"name": "John Doe", "city": "New York"}
         ]
 
-        file_path = Mock(spec=Path)
-        file_path.read_text.return_value = (
+        mock_file_service.open_text.return_value = io.StringIO(
             '[{"name": "John Doe", "city": "New York"}]'
         )
 
+        file_path = Mock(spec=Path)
+
         result = converter_service.json_to_csv(file_path)
 
         expected_csv = "name,city\r\nJohn Doe,New York\r\n"
         assert result == expected_csv
         mock_validator_service.validate_json_structure.assert_called_once()
         mock_transformation_service.enrich_json_data.assert_called_once()
+
+
+class TestConverterServiceCsvFiles:
+    def test_unread_rows_leave_no_open_file(
+        self, converter_service, tmp_path, monkeypatch
+    ):
+        file_path = tmp_path / "data.csv"
+        file_path.write_text("name\nJohn\n")
+        opened = []
+        open_text = converter_service.file_service.open_text
+
+        def spy(*args):
+            opened.append(open_text(*args))
+            return opened[-1]
+
+        monkeypatch.setattr(converter_service.file_service, "open_text", spy)
+
+        result = converter_service.convert_csv(
+            file_path, ConversionOptions(columns=["name"])
+        )
+
+        assert opened and all(text.closed for text in opened)
+        assert list(result.records) == [{"name": "John"}]
+        assert all(text.closed for text in opened)
+
+    @pytest.mark.parametrize("encoding", ["utf-8", "utf-16", "cp1252"])
+    def test_retain_csv_stores_utf8(self, converter_service, encoding):
+        content = "name;city\nJosé;Málaga\nAna;León\n"
+        stream = io.BytesIO(content.encode(encoding))
+
+        retained = converter_service.retain_csv(
+            stream,
+            "data.csv",
+            60,
+            ConversionOptions(encoding=encoding, delimiter=";"),
+        )
+
+        assert retained.path.read_text(encoding="utf-8") == content
+        assert retained.index.row_count == 2
+        assert not stream.closed
+
+
+class TestConverterServiceJsonLines:
+    @pytest.mark.parametrize("workers", [None, 2])
+    def test_json_lines_to_csv(self, converter_service, tmp_path, workers):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text(
+            "".join(f'{{"event": "e{i}"}}\n' for i in range(12000))
+        )
+
+        result = converter_service.json_to_csv(
+            file_path, ConversionOptions(workers=workers)
+        )
+
+        rows = result.splitlines()
+        assert rows[0] == "event,record_id,processed_at"
+        assert len(rows) == 12001
+        assert rows[12000].startswith("e11999,REC-12000,")
+
+    def test_json_lines_workers_share_one_pool(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text('{"a": 1}\n' * 6000)
+        options = ConversionOptions(workers=2)
+
+        converter_service.json_to_csv(file_path, options)
+        executor = converter_service._executor
+        converter_service.json_to_csv(file_path, options)
+
+        assert executor is not None
+        assert converter_service._executor is executor
+        converter_service.shutdown()
+        assert converter_service._executor is None
+
+    def test_close_unread_csv_removes_spill(self, converter_service, tmp_path):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text('{"a": 1}\n{"a": 2}\n')
+
+        result = converter_service.convert_json_to_csv(file_path)
+        result.close()
+
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_read_json_lines_validates_on_call(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text('{"a": 1}\n{"a": \n')
+
+        with pytest.raises(ValueError, match="Invalid JSON on line 2"):
+            converter_service.read_records(file_path)
+        file_path.write_text('{"a": 1}\n{"a": 2}\n')
+        result = converter_service.read_records(file_path)
+        result.close()
+
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_json_lines_reports_line_numbers(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "events.jsonl"
+        file_path.write_text('{"a": 1}\n{"a": \n\n"text"\n')
+
+        with pytest.raises(ValueError) as error:
+            converter_service.json_to_csv(file_path)
+
+        assert str(error.value) == (
+            "Invalid JSON on line 2; Line 4 must be a JSON object"
+        )
+
+    def test_json_dedupe_ignores_enriched_fields(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "events.json"
+        file_path.write_text(
+            '[{"a": 1, "b": 2}, {"b": 2, "a": 1}, {"a": 1, "b": 3}]'
+        )
+
+        result = converter_service.convert_json_to_csv(
+            file_path, ConversionOptions(dedupe="exact")
+        )
+        rows = "".join(result.chunks).splitlines()
+
+        assert [row.split(",")[:3] for row in rows[1:]] == [
+            ["1", "2", "REC-0001"],
+            ["1", "3", "REC-0003"],
+        ]
+        assert result.duplicates.removed == 1
+
+    @pytest.mark.parametrize("suffix", [".json", ".ndjson"])
+    def test_json_dedupe_on_unknown_column(
+        self, converter_service, tmp_path, suffix
+    ):
+        records = [{"a": 1}, {"a": 2}, {"a": 3}]
+        file_path = tmp_path / f"events{suffix}"
+        if suffix == ".json":
+            file_path.write_text(json.dumps(records))
+        else:
+            file_path.write_text(
+                "".join(f"{json.dumps(r)}\n" for r in records)
+            )
+        options = ConversionOptions(dedupe="exact", dedupe_on=["b"])
+
+        with pytest.raises(ValueError, match="Unknown column: b"):
+            converter_service.read_records(file_path, options)
+        with pytest.raises(ValueError, match="Unknown column: b"):
+            converter_service.convert_json_to_csv(file_path, options)
+        assert list(tmp_path.iterdir()) == [file_path]
+
+
+class TestConverterServiceColumnUnion:
+    @pytest.fixture
+    def records(self):
+        return [{"name": "John"}, {"name": "Maria", "age": 25}, {"zip": "1"}]
+
+    @pytest.mark.parametrize("suffix", [".json", ".ndjson"])
+    def test_union_columns(self, converter_service, tmp_path, records, suffix):
+        file_path = tmp_path / f"data{suffix}"
+        if suffix == ".json":
+            file_path.write_text(json.dumps(records))
+        else:
+            file_path.write_text("\n".join(json.dumps(r) for r in records))
+
+        result = converter_service.json_to_csv(
+            file_path, ConversionOptions(union_columns=True)
+        )
+
+        rows = list(csv.DictReader(result.splitlines()))
+        assert list(rows[0]) == [
+            "name",
+            "age",
+            "zip",
+            "record_id",
+            "processed_at",
+        ]
+        assert [(r["name"], r["age"], r["zip"]) for r in rows] == [
+            ("John", "", ""),
+            ("Maria", "25", ""),
+            ("", "", "1"),
+        ]
+        assert [p.name for p in tmp_path.iterdir()] == [file_path.name]
+
+    def test_sorted_column_order(self, converter_service, tmp_path, records):
+        file_path = tmp_path / "data.json"
+        file_path.write_text(json.dumps(records))
+
+        result = converter_service.json_to_csv(
+            file_path,
+            ConversionOptions(union_columns=True, column_order="sorted"),
+        )
+
+        assert result.splitlines()[0] == (
+            "age,name,processed_at,record_id,zip"
+        )
+
+    def test_new_fields_without_union(
+        self, converter_service, tmp_path, records
+    ):
+        file_path = tmp_path / "data.ndjson"
+        file_path.write_text("\n".join(json.dumps(r) for r in records))
+
+        with pytest.raises(ValueError, match="Record 2 has fields"):
+            converter_service.json_to_csv(file_path)
+
+        assert [p.name for p in tmp_path.iterdir()] == [file_path.name]
+
+
+class TestConverterServiceTables:
+    def test_json_to_tables(self, converter_service, tmp_path):
+        file_path = tmp_path / "orders.ndjson"
+        file_path.write_text(
+            '{"id": 1, "customer": {"name": "Ana"}, '
+            '"items": [{"sku": "X", "qty": 2}, {"sku": "Y"}]}\n'
+            '{"id": 2, "customer": {"name": "Luis"}, "items": []}\n'
+        )
+
+        zip_path = converter_service.json_to_tables(file_path).path
+
+        with zipfile.ZipFile(zip_path) as zf:
+            assert zf.namelist() == ["records.csv", "items.csv"]
+            parents = list(
+                csv.DictReader(zf.read("records.csv").decode().splitlines())
+            )
+            items = list(
+                csv.DictReader(zf.read("items.csv").decode().splitlines())
+            )
+        assert [p["customer.name"] for p in parents] == ["Ana", "Luis"]
+        assert parents[1]["items"] == ""
+        assert items == [
+            {"record_id": "REC-0001", "sku": "X", "qty": "2"},
+            {"record_id": "REC-0001", "sku": "Y", "qty": ""},
+        ]
+        zip_path.unlink()
+        assert [p.name for p in tmp_path.iterdir()] == [file_path.name]
+
+    def test_json_to_tables_names(self, converter_service, tmp_path):
+        file_path = tmp_path / "orders.json"
+        file_path.write_text(
+            json.dumps(
+                [
+                    {
+                        "records": [{"n": 1}],
+                        "../evil": [{"n": 2}],
+                        "evil": [{"n": 3}],
+                        "lines": [{"record_id": "L1"}],
+                    }
+                ]
+            )
+        )
+
+        zip_path = converter_service.json_to_tables(file_path).path
+
+        with zipfile.ZipFile(zip_path) as zf:
+            assert zf.namelist() == [
+                "records.csv",
+                "records_2.csv",
+                "evil.csv",
+                "evil_2.csv",
+                "lines.csv",
+            ]
+            parents = zf.read("records.csv").decode().splitlines()
+            lines = zf.read("lines.csv").decode().splitlines()
+        assert parents[0] == "record_id,processed_at"
+        assert lines == ["record_id,lines.record_id", "REC-0001,L1"]
+        zip_path.unlink()
+
+
+class TestConverterServiceLenient:
+    def test_csv_rejects_bad_rows(self, converter_service, tmp_path):
+        file_path = tmp_path / "data.csv"
+        file_path.write_text(
+            'name,note\nJohn,"a\nb"\nJane\n\nAnn,x\nBob,y,z\n'
+        )
+
+        result = converter_service.convert_csv(
+            file_path, ConversionOptions(lenient=True)
+        )
+
+        assert list(result.records) == [
+            {"name": "John", "note": "a\nb"},
+            {"name": "Ann", "note": "x"},
+        ]
+        assert result.rejects.accepted_rows == 2
+        assert result.rejects.rejected_rows == 2
+        rejected = [
+            json.loads(line)
+            for line in result.rejects.path.read_text().splitlines()
+        ]
+        assert [(r["line"], r["content"]) for r in rejected] == [
+            (4, ["Jane"]),
+            (7, ["Bob", "y", "z"]),
+        ]
+
+    def test_csv_without_rejects_leaves_no_file(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "data.csv"
+        file_path.write_text("name\nJohn\n")
+
+        result = converter_service.convert_csv(
+            file_path, ConversionOptions(lenient=True)
+        )
+
+        assert result.rejects.rejected_rows == 0
+        assert result.rejects.path is None
+        assert [p.name for p in tmp_path.iterdir()] == ["data.csv"]
+
+    def test_json_lines_rejects_bad_lines(self, converter_service, tmp_path):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text('{"a": 1}\n{"a": \n[1]\n{"a": 2}\n')
+
+        result = converter_service.convert_json_to_csv(
+            file_path, ConversionOptions(lenient=True)
+        )
+
+        rows = list(csv.DictReader("".join(result.chunks).splitlines()))
+        assert [row["a"] for row in rows] == ["1", "2"]
+        assert result.rejects.accepted_rows == 2
+        rejected = result.rejects.path.read_text().splitlines()
+        assert [json.loads(line)["content"] for line in rejected] == [
+            '{"a": ',
+            "[1]",
+        ]
+
+    def test_json_lines_to_tables_reports_rejects(
+        self, converter_service, tmp_path
+    ):
+        file_path = tmp_path / "events.ndjson"
+        file_path.write_text('{"a": 1}\n{"a": \n{"a": 2}\n')
+
+        result = converter_service.json_to_tables(
+            file_path, ConversionOptions(lenient=True)
+        )
+
+        assert result.rejects.accepted_rows == 2
+        assert result.rejects.rejected_rows == 1
+        with zipfile.ZipFile(result.path) as zf:
+            assert (
+                zf.read("rejects.ndjson") == result.rejects.path.read_bytes()
+            )
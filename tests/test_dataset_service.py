@@ -0,0 +1,97 @@
+import json
+import pytest
+from services import ConversionOptions, DatasetService
+
+
+class TestDatasetService:
+    @pytest.fixture
+    def dataset_service(self, tmp_path, converter_service):
+        return DatasetService(tmp_path, converter_service, chunk_rows=20)
+
+    def write_csv(self, tmp_path, rows):
+        path = tmp_path / "export.csv"
+        path.write_text("sku,price\n" + "".join(f"{s},{p}\n" for s, p in rows))
+        return path
+
+    def convert(self, conversion):
+        return json.loads("[" + ", ".join(conversion) + "]")
+
+    def test_reuses_unchanged_chunks(
+        self, tmp_path, dataset_service, converter_service
+    ):
+        rows = [(f"A{i}", i) for i in range(500)]
+        options = ConversionOptions(infer_types=True)
+        first = dataset_service.convert_version(
+            "products", self.write_csv(tmp_path, rows), options
+        )
+        self.convert(first)
+
+        rows[250] = ("A250", 999)
+        del rows[100]
+        path = self.write_csv(tmp_path, rows)
+        second = dataset_service.convert_version("products", path, options)
+        records = self.convert(second)
+
+        assert first.version.converted_chunks == first.version.chunks
+        assert second.version.version == 2
+        # Solo cambian los fragmentos con la fila borrada y la modificada
+        assert second.version.converted_chunks <= 2
+        assert second.version.reused_chunks >= second.version.chunks - 2
+        expected = converter_service.convert_csv(path, options)
+        assert (
+            second.result.schema
+            == expected.schema
+            == {
+                "sku": "string",
+                "price": "int",
+            }
+        )
+        assert records == list(expected.records)
+        # Solo se conserva la salida de la última versión
+        folder = tmp_path / "datasets" / "products"
+        assert len(list(folder.glob("*.json"))) == second.version.chunks
+        assert [
+            v.version for v in dataset_service.get_versions("products")
+        ] == [
+            1,
+            2,
+        ]
+
+    def test_options_change_converts_again(self, tmp_path, dataset_service):
+        path = self.write_csv(tmp_path, [(f"A{i}", i) for i in range(100)])
+
+        self.convert(dataset_service.convert_version("products", path))
+        typed = dataset_service.convert_version(
+            "products", path, ConversionOptions(infer_types=True)
+        )
+        records = self.convert(typed)
+
+        assert typed.version.reused_chunks == 0
+        assert records[1]["price"] == 1
+
+    def test_abandoned_conversion_is_not_registered(
+        self, tmp_path, dataset_service
+    ):
+        path = self.write_csv(tmp_path, [(f"A{i}", i) for i in range(100)])
+
+        conversion = dataset_service.convert_version("products", path)
+        next(iter(conversion))
+
+        assert conversion.version is None
+        with pytest.raises(KeyError):
+            dataset_service.get_versions("products")
+
+    def test_invalid_requests(self, tmp_path, dataset_service):
+        path = self.write_csv(tmp_path, [("A1", 1)])
+
+        with pytest.raises(ValueError, match="Invalid dataset id"):
+            dataset_service.convert_version("../products", path)
+        with pytest.raises(ValueError, match="sort_by is not supported"):
+            dataset_service.convert_version(
+                "products", path, ConversionOptions(sort_by=["sku"])
+            )
+        # Se detectan al llamar, antes de recorrer los fragmentos
+        with pytest.raises(ValueError, match="Unknown column: name"):
+            dataset_service.convert_version(
+                "products", path, ConversionOptions(columns=["sku", "name"])
+            )
@@ -0,0 +1,60 @@
+import pytest
+from services import DedupeService, FileService
+from services.dedupe_service import BloomFilter, digest
+
+
+class TestDedupeService:
+    @pytest.fixture
+    def dedupe_service(self, tmp_path):
+        return DedupeService(FileService(tmp_path), max_keys=10)
+
+    def test_exact_dedupe_spills_keys(self, dedupe_service, tmp_path):
+        items = [i % 100 for i in range(300)]
+
+        deduped = dedupe_service.dedupe(items, lambda n: (n,))
+        iterator = iter(deduped)
+        first = [next(iterator) for _ in range(100)]
+        spilled = list(tmp_path.iterdir())
+        rest = list(iterator)
+
+        assert first == list(range(100))
+        assert rest == []
+        assert deduped.removed == 200
+        # Al noveno tramo se fusionan los nueve; el décimo queda aparte
+        assert len(spilled) == 2
+        assert list(tmp_path.iterdir()) == []
+
+    def test_dedupe_keeps_first_occurrence(self, dedupe_service):
+        rows = [["a", "1"], ["b", "2"], ["a", "3"], ["b", "2"]]
+
+        deduped = dedupe_service.dedupe(rows, lambda row: (row[0],))
+
+        assert list(deduped) == [["a", "1"], ["b", "2"]]
+        assert deduped.removed == 2
+
+    def test_bloom_dedupe(self, tmp_path):
+        service = DedupeService(
+            FileService(tmp_path), bloom_capacity=1000, bloom_error_rate=0.01
+        )
+        items = [i % 500 for i in range(1000)]
+
+        deduped = service.dedupe(items, lambda n: (n,), "bloom")
+        kept = list(deduped)
+
+        # Los falsos positivos solo pueden descartar de más, nunca de menos
+        assert len(kept) == len(set(kept))
+        assert len(kept) >= 490
+        assert deduped.removed == 1000 - len(kept)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_bloom_filter_size(self):
+        bloom = BloomFilter(1000, 0.01)
+
+        assert bloom.size == 9586
+        assert bloom.hashes == 7
+        assert bloom.add(digest(("x",)))
+        assert not bloom.add(digest(("x",)))
+
+    def test_unsupported_mode(self, dedupe_service):
+        with pytest.raises(ValueError, match="Unsupported dedupe mode: x"):
+            dedupe_service.dedupe([], tuple, "x")
@@ -0,0 +1,91 @@
+from unittest.mock import Mock
+import pytest
+from services import DiffService, FileService
+
+
+class TestDiffService:
+    @pytest.fixture
+    def diff_service(self, tmp_path):
+        return DiffService(FileService(tmp_path), max_rows=4)
+
+    def test_diff(self, diff_service):
+        old = [
+            {"id": "1", "price": "10", "stock": "5"},
+            {"id": "2", "price": "20", "stock": "1"},
+            {"id": "3", "price": "30", "stock": ""},
+        ]
+        new = [
+            {"id": 2, "price": 25, "stock": 1},
+            {"id": 3, "price": 30, "stock": None},
+            {"id": 4, "price": 40, "stock": 2},
+        ]
+
+        diff = diff_service.diff(old, new, ["id"])
+        changes = list(diff)
+
+        assert changes == [
+            {
+                "change_type": "changed",
+                "changed_columns": "price",
+                "id": 2,
+                "price": 25,
+                "stock": 1,
+            },
+            {
+                "change_type": "added",
+                "changed_columns": None,
+                "id": 4,
+                "price": 40,
+                "stock": 2,
+            },
+            {
+                "change_type": "removed",
+                "changed_columns": None,
+                "id": "1",
+                "price": "10",
+                "stock": "5",
+            },
+        ]
+        assert diff.summary == {
+            "added": 1,
+            "removed": 1,
+            "changed": 1,
+            "unchanged": 1,
+        }
+
+    def test_partitioned_diff(self, tmp_path):
+        file_service = FileService(tmp_path)
+        file_service.create_partitions = Mock(
+            wraps=file_service.create_partitions
+        )
+        diff_service = DiffService(file_service, max_rows=40)
+        old = [{"id": i, "v": i} for i in range(100)]
+        new = [{"id": i, "v": i + (i % 10 == 0)} for i in range(50, 150)]
+
+        diff = diff_service.diff(old, new, ["id"])
+        changes = list(diff)
+
+        assert file_service.create_partitions.call_count == 2
+        assert diff.summary == {
+            "added": 50,
+            "removed": 50,
+            "changed": 5,
+            "unchanged": 45,
+        }
+        assert len(changes) == 105
+        assert list(tmp_path.iterdir()) == []
+
+    def test_diff_ignores_enriched_fields(self, diff_service):
+        old = [{"id": 1, "record_id": "REC-0001"}]
+        new = [{"id": 1, "record_id": "REC-0009"}]
+
+        diff = diff_service.diff(old, new, ["id"])
+
+        assert list(diff) == []
+        assert diff.summary["unchanged"] == 1
+
+    def test_invalid_diff(self, diff_service):
+        with pytest.raises(ValueError, match="A key column is required"):
+            diff_service.diff([], [], [])
+        with pytest.raises(ValueError, match="Unknown column: sku"):
+            diff_service.diff([], [], ["sku"], new_columns=["id"])
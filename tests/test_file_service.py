@@ -1,6 +1,7 @@
 from pathlib import Path
+import io
 import pytest
-from services.file_service import FileService
+from services.file_service import CsvDialect, FileService
 
 
 class TestFileService:
@@ -34,3 +35,251 @@ class TestFileService:
         assert file_path.read_bytes() == content
         assert file_info.size == len(content)
         assert file_info.mime_type == "text/plain"
+
+    def test_save_file_with_the_same_name(
+        self, file_service: FileService
+    ) -> None:
+        # Act
+        first = file_service.save_file(b"first", "../data.csv")
+        second = file_service.save_file(b"second", "../data.csv")
+
+        # Assert
+        assert first != second
+        assert first.parent == second.parent == file_service.base_path
+        assert first.suffix == ".csv"
+        assert (first.read_bytes(), second.read_bytes()) == (
+            b"first",
+            b"second",
+        )
+
+    def test_build_row_index(self, file_service: FileService) -> None:
+        # Arrange
+        content = (
+            b"name,notes\n"
+            b'John,"line one\nline two"\n'
+            b"\n"
+            b"Maria,plain\n"
+            b'Ana,"say ""hi"""\n'
+        )
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        index = file_service.build_row_index(file_path, stride=2)
+
+        # Assert
+        assert index.header_end == len(b"name,notes\n")
+        assert index.row_count == 3
+        assert list(index.offsets) == [
+            content.index(b"John"),
+            content.index(b"Ana"),
+        ]
+        assert index.locate(1) == (content.index(b"John"), 1)
+        assert index.locate(2) == (content.index(b"Ana"), 0)
+
+    def test_retained_file_expires(self, file_service: FileService) -> None:
+        # Arrange
+        retained = file_service.retain_file(b"name\nJohn\n", "test.csv", 60)
+        expired = file_service.retain_file(b"name\nJane\n", "test.csv", 0)
+
+        # Act
+        found = file_service.get_retained(retained.upload_id)
+
+        # Assert
+        assert found.path.read_bytes() == b"name\nJohn\n"
+        assert found.index.row_count == 1
+        with pytest.raises(KeyError):
+            file_service.get_retained(expired.upload_id)
+        assert not expired.path.exists()
+
+    @pytest.mark.parametrize(
+        "content, expected",
+        [
+            ("name\nJosé\n".encode("utf-8"), "utf-8"),
+            ("name\nJosé\n".encode("utf-8-sig"), "utf-8-sig"),
+            ("name\nJosé\n".encode("utf-16"), "utf-16"),
+            ("name\nJosé\n".encode("utf-16-le"), "utf-16-le"),
+            ("name\nJosé €\n".encode("cp1252"), "cp1252"),
+            (b"name\n\x81\x8d\n", "latin-1"),
+        ],
+    )
+    def test_detect_encoding(
+        self, file_service: FileService, content: bytes, expected: str
+    ) -> None:
+        # Arrange
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        encoding = file_service.detect_encoding(file_path)
+
+        # Assert
+        assert encoding == expected
+
+    def test_detect_encoding_reads_only_sample(
+        self, file_service: FileService
+    ) -> None:
+        # Arrange: el byte inválido queda fuera de la muestra
+        content = b"a" * 100 + "é".encode("cp1252")
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        encoding = file_service.detect_encoding(file_path, sample_size=100)
+
+        # Assert
+        assert encoding == "utf-8"
+
+    def test_unknown_encoding(self, file_service: FileService) -> None:
+        with pytest.raises(ValueError, match="Unknown encoding"):
+            file_service.normalize_encoding("klingon")
+
+    @pytest.mark.parametrize("delimiter", [",", ";", "\t", "|"])
+    def test_detect_dialect(
+        self, file_service: FileService, delimiter: str
+    ) -> None:
+        # Arrange
+        rows = ["name", "city", "age"], ["John", "Madrid", "30"]
+        content = "\n".join(delimiter.join(row) for row in rows * 3)
+        file_path = file_service.save_file(content.encode(), "test.csv")
+
+        # Act
+        dialect = file_service.detect_dialect(file_path)
+
+        # Assert
+        assert dialect.delimiter == delimiter
+        assert dialect.quotechar == '"'
+
+    def test_detect_dialect_single_column(
+        self, file_service: FileService
+    ) -> None:
+        # Arrange
+        file_path = file_service.save_file(b"name\nJohn\nJane\n", "test.csv")
+
+        # Act
+        dialect = file_service.detect_dialect(file_path)
+
+        # Assert
+        assert dialect.delimiter == ","
+
+    def test_detect_dialect_reads_only_sample(
+        self, file_service: FileService
+    ) -> None:
+        # Arrange: tras la muestra las filas pasan a usar comas
+        content = "a;b\n1;2\n" * 10 + "x,y,z,w\n" * 1000
+        file_path = file_service.save_file(content.encode(), "test.csv")
+
+        # Act
+        dialect = file_service.detect_dialect(file_path, sample_size=80)
+
+        # Assert
+        assert dialect.delimiter == ";"
+
+    def test_explicit_dialect(self, file_service: FileService) -> None:
+        # Act
+        dialect = file_service.sniff_dialect("a;b", "tab", "'", "\\")
+
+        # Assert
+        assert (dialect.delimiter, dialect.quotechar) == ("\t", "'")
+        assert dialect.escapechar == "\\"
+        with pytest.raises(ValueError, match="delimiter"):
+            file_service.sniff_dialect("", delimiter=";;")
+
+    def test_build_row_index_with_quotechar(
+        self, file_service: FileService
+    ) -> None:
+        # Arrange
+        content = b"name;note\nJohn;'two\nlines'\nJane;'it\\'s'\nAnn;x\n"
+        file_path = file_service.save_file(content, "test.csv")
+        dialect = file_service.sniff_dialect("", ";", "'", "\\")
+
+        # Act
+        index = file_service.build_row_index(
+            file_path, stride=1, dialect=dialect
+        )
+
+        # Assert
+        assert index.row_count == 3
+        assert list(index.offsets) == [10, 27, 40]
+
+    def test_build_row_index_with_quote_inside_field(
+        self, file_service: FileService
+    ) -> None:
+        # Arrange: una comilla a mitad de campo es un carácter normal
+        content = b'name,size\npizza,12" wide\nb,2\nc,3\n'
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        index = file_service.build_row_index(file_path, stride=1)
+
+        # Assert
+        assert index.row_count == 3
+        assert list(index.offsets) == [
+            content.index(b"pizza"),
+            content.index(b"b,2"),
+            content.index(b"c,3"),
+        ]
+
+    @pytest.mark.parametrize("chunk_size", [1, 16, 1024])
+    def test_count_rows(self, file_service: FileService, chunk_size) -> None:
+        # Arrange
+        content = (
+            b'name,note\r\nJohn,"two\n\nlines"\r\n\r\nJane,x\n'
+            b'Ann,"a ""quoted"" word"\nBob,last'
+        )
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        row_count = file_service.count_rows(file_path, chunk_size=chunk_size)
+
+        # Assert
+        assert row_count == 4
+        assert row_count == file_service.build_row_index(file_path).row_count
+
+    @pytest.mark.parametrize("chunk_size", [1, 16, 1024])
+    @pytest.mark.parametrize(
+        "content, dialect",
+        [
+            (b'name,size\npizza,12" wide\nb,2\nc,3\n', CsvDialect()),
+            (b"name\nJohn\n \n\t\n\r\n\nAnn", CsvDialect()),
+            (b"name,note\rJohn,x\r\rAnn,y\r", CsvDialect()),
+            (
+                b"name;note\nJohn;a\\\nb\nAnn;c\n",
+                CsvDialect(";", escapechar="\\"),
+            ),
+        ],
+    )
+    def test_count_rows_matches_csv_reader(
+        self, file_service: FileService, content, dialect, chunk_size
+    ) -> None:
+        # Arrange
+        file_path = file_service.save_file(content, "test.csv")
+        text = io.StringIO(content.decode("utf-8"), newline="")
+        expected = sum(1 for row in dialect.reader(text) if row) - 1
+
+        # Act
+        row_count = file_service.count_rows(file_path, dialect, chunk_size)
+
+        # Assert
+        assert row_count == expected
+        assert row_count == (
+            file_service.build_row_index(file_path, dialect=dialect).row_count
+        )
+
+    @pytest.mark.parametrize("encoding", ["utf-16", "utf-16-be", "utf-32"])
+    def test_count_rows_decodes_wide_encodings(
+        self, file_service: FileService, encoding
+    ) -> None:
+        # Arrange: U+0A0A y U+0D0A contienen los bytes de \n y \r
+        content = 'name,note\nਊ,x\n"a\nb",ഊ\n'.encode(encoding)
+        file_path = file_service.save_file(content, "test.csv")
+
+        # Act
+        row_count = file_service.count_rows(file_path, encoding=encoding)
+
+        # Assert
+        assert row_count == 2
+
+    def test_count_rows_empty_file(self, file_service: FileService) -> None:
+        # Arrange
+        file_path = file_service.save_file(b"", "test.csv")
+
+        # Act / Assert
+        assert file_service.count_rows(file_path) == 0
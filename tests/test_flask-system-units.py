@@ -1,8 +1,11 @@
+import csv
 import pytest
 from pathlib import Path
 from app import create_app
 import json
 import io
+import zipfile
+from werkzeug.test import EnvironBuilder
 
 
 class TestFlaskApp:
@@ -11,7 +14,16 @@ class TestFlaskApp:
     @pytest.fixture
     def app(self, tmpdir):
         """Fixture que proporciona la aplicación Flask configurada para pruebas"""
-        config = {"TESTING": True, "UPLOAD_FOLDER": str(tmpdir)}
+        config = {
+            "TESTING": True,
+            "UPLOAD_FOLDER": str(tmpdir),
+            "SORT_RUN_SIZE": 64,
+            "DEDUPE_MAX_KEYS": 64,
+            "AGGREGATE_MAX_GROUPS": 64,
+            "JOIN_MAX_BUILD_ROWS": 64,
+            "DIFF_MAX_ROWS": 64,
+            "INCREMENTAL_CHUNK_ROWS": 20,
+        }
         app = create_app(config)
         return app
 
@@ -70,3 +82,1247 @@ class TestFlaskApp:
         assert response.status_code == 200
         assert response.headers["Content-Type"].startswith("text/csv")
         assert "attachment" in response.headers["Content-Disposition"]
+
+    @pytest.mark.parametrize(
+        "url, names",
+        [
+            ("/api/v1/convert/json-to-csv", ["file"]),
+            ("/api/v1/join?on=id&format=csv", ["left", "right"]),
+            ("/api/v1/diff?key=id&format=csv", ["old", "new"]),
+            ("/api/v1/convert/json-to-csv?tables=true", ["file"]),
+        ],
+    )
+    def test_unread_response_leaves_no_files(self, app, url, names):
+        """Una respuesta cerrada sin recorrer borra subidas y temporales"""
+        # Arrange
+        content = b'{"id": 1, "a": "x"}\n{"id": 2, "a": "y"}\n'
+        data = {
+            name: (io.BytesIO(content), f"{name}.ndjson") for name in names
+        }
+
+        environ = EnvironBuilder(
+            url, method="POST", data=data, content_type="multipart/form-data"
+        ).get_environ()
+        status = []
+
+        # Act: el cliente de pruebas siempre lee el primer fragmento, así
+        # que se llama a la aplicación WSGI y se cierra sin leer nada
+        body = app(environ, lambda s, headers: status.append(s))
+        body.close()
+
+        # Assert
+        assert status == ["200 OK"]
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_csv_to_json_endpoint_batch_mode(self, client):
+        """Prueba la conversión CSV a JSON por lotes columnares"""
+        # Arrange
+        csv_content = b"name,city\nJohn, new york\nMaria,madrid \nAna,lima"
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?batch_size=2",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["data"] == [
+            {"name": "John", "city": "New York"},
+            {"name": "Maria", "city": "Madrid"},
+            {"name": "Ana", "city": "Lima"},
+        ]
+
+    def test_csv_to_json_endpoint_infer_types(self, client):
+        """Prueba la salida tipada con el esquema inferido"""
+        # Arrange
+        csv_content = b"name,age,active\nJohn,30,true\nMaria,,false"
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?infer_types=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["schema"] == {
+            "name": "string",
+            "age": "int",
+            "active": "bool",
+        }
+        assert response.json["data"] == [
+            {"name": "John", "age": 30, "active": True},
+            {"name": "Maria", "age": None, "active": False},
+        ]
+
+    def test_csv_to_json_endpoint_columns_and_where(self, client):
+        """Prueba la proyección de columnas y el filtro de filas"""
+        # Arrange
+        csv_content = (
+            b"name,age,city,country\n"
+            b"John,30,new york,US\n"
+            b"Maria,25,madrid,ES\n"
+            b"Pablo,41,sevilla,ES"
+        )
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json"
+            "?columns=name,city&where=country=ES&where=age>30",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["data"] == [{"name": "Pablo", "city": "Sevilla"}]
+
+    def test_csv_to_json_endpoint_unknown_column(self, client):
+        """Prueba el error al pedir una columna inexistente"""
+        # Arrange
+        data = {"file": (io.BytesIO(b"name,age\nJohn,30"), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?columns=email",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json["error"] == "Unknown column: email"
+
+    def test_paginated_csv_to_json(self, client):
+        """Prueba la conversión por páginas de una subida conservada"""
+        # Arrange
+        csv_content = "name,city\n" + "\n".join(
+            f"Person{i},city{i}" for i in range(250)
+        )
+        upload = client.post(
+            "/api/v1/uploads",
+            data={"file": (io.BytesIO(csv_content.encode()), "test.csv")},
+            content_type="multipart/form-data",
+        )
+        upload_id = upload.json["upload_id"]
+
+        # Act
+        page = client.get(
+            f"/api/v1/uploads/{upload_id}/csv-to-json?offset=120&limit=100"
+        )
+        last_page = client.get(
+            f"/api/v1/uploads/{upload_id}/csv-to-json"
+            f"?cursor={page.json['next_cursor']}"
+        )
+
+        # Assert
+        assert upload.status_code == 201
+        assert upload.json["row_count"] == 250
+        assert page.status_code == 200
+        assert page.json["total_rows"] == 250
+        assert len(page.json["data"]) == 100
+        assert page.json["data"][0] == {"name": "Person120", "city": "City120"}
+        assert [row["name"] for row in last_page.json["data"]] == [
+            f"Person{i}" for i in range(220, 250)
+        ]
+        assert last_page.json["next_cursor"] is None
+
+    def test_paginated_csv_to_json_unknown_upload(self, client):
+        """Prueba la respuesta para una subida inexistente o caducada"""
+        # Act
+        response = client.get("/api/v1/uploads/missing/csv-to-json")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_csv_to_json_endpoint_split_orient(self, client):
+        """Prueba la salida JSON en orientación split"""
+        # Arrange
+        csv_content = b"name,city\nJohn,new york\nMaria,madrid"
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?orient=split",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["columns"] == ["name", "city"]
+        assert response.json["data"] == [
+            ["John", "New York"],
+            ["Maria", "Madrid"],
+        ]
+
+    def test_csv_to_json_endpoint_ndjson_accept(self, client):
+        """Prueba la salida NDJSON elegida con la cabecera Accept"""
+        # Arrange
+        csv_content = b"name,age\nJohn,30\nMaria,25"
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json",
+            data=data,
+            content_type="multipart/form-data",
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.data.decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"name": "John", "age": "30"},
+            {"name": "Maria", "age": "25"},
+        ]
+
+    def test_json_lines_to_csv_endpoint(self, client):
+        """Prueba la conversión de JSON Lines a CSV"""
+        # Arrange
+        ndjson_content = b'{"name": "John"}\n{"name": "Maria"}\n'
+        data = {"file": (io.BytesIO(ndjson_content), "events.ndjson")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        rows = response.data.decode().splitlines()
+        assert rows[0] == "name,record_id,processed_at"
+        assert rows[2].startswith("Maria,REC-0002,")
+
+    def test_json_to_csv_endpoint_union_columns(self, client):
+        """Prueba la unión de columnas de registros heterogéneos"""
+        # Arrange
+        json_content = json.dumps(
+            [{"name": "John"}, {"name": "Maria", "city": "Madrid"}]
+        ).encode()
+        data = {"file": (io.BytesIO(json_content), "test.json")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv?union=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        rows = response.data.decode().splitlines()
+        assert rows[0] == "name,city,record_id,processed_at"
+        assert rows[1].startswith("John,,REC-0001,")
+
+    def test_json_to_csv_endpoint_flatten(self, client):
+        """Prueba el aplanado de objetos anidados a columnas con puntos"""
+        # Arrange
+        json_content = json.dumps(
+            [{"name": "John", "address": {"city": "Madrid", "zip": "28001"}}]
+        ).encode()
+        data = {"file": (io.BytesIO(json_content), "test.json")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv?flatten=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        rows = response.data.decode().splitlines()
+        assert (
+            rows[0] == "name,address.city,address.zip,record_id,processed_at"
+        )
+        assert rows[1].startswith("John,Madrid,28001,REC-0001,")
+
+    def test_json_to_csv_endpoint_tables(self, client, app):
+        """Prueba la salida relacional en un zip con varias tablas"""
+        # Arrange
+        json_content = json.dumps(
+            [{"id": 1, "items": [{"sku": "X"}, {"sku": "Y"}]}]
+        ).encode()
+        data = {"file": (io.BytesIO(json_content), "test.json")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv?tables=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.mimetype == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+            assert zf.namelist() == ["records.csv", "items.csv"]
+            assert zf.read("items.csv").decode().splitlines() == [
+                "record_id,sku",
+                "REC-0001,X",
+                "REC-0001,Y",
+            ]
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    @pytest.mark.parametrize("encoding", ["latin-1", "utf-16"])
+    def test_csv_to_json_endpoint_detects_encoding(self, client, encoding):
+        """Prueba la conversión de CSV en codificaciones distintas de UTF-8"""
+        # Arrange
+        csv_content = "name,city\nJosé,Málaga\n".encode(encoding)
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["data"] == [{"name": "José", "city": "Málaga"}]
+
+    def test_csv_to_json_endpoint_explicit_encoding(self, client):
+        """Prueba el parámetro encoding explícito"""
+        # Arrange
+        csv_content = "name\nÅsa\n".encode("iso-8859-15")
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?encoding=iso-8859-15",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.json["data"] == [{"name": "Åsa"}]
+
+    @pytest.mark.parametrize("delimiter", [";", "\t"])
+    def test_csv_to_json_endpoint_sniffs_delimiter(self, client, delimiter):
+        """Prueba la detección de separadores distintos de la coma"""
+        # Arrange
+        csv_content = delimiter.join(["name", "amount"]) + "\n"
+        csv_content += delimiter.join(["José", '"1,5"']) + "\n"
+        csv_content += delimiter.join(["Ana", "2"]) + "\n"
+        data = {"file": (io.BytesIO(csv_content.encode()), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["data"] == [
+            {"name": "José", "amount": "1,5"},
+            {"name": "Ana", "amount": "2"},
+        ]
+
+    def test_csv_to_json_endpoint_explicit_dialect(self, client):
+        """Prueba los parámetros delimiter, quotechar y escapechar"""
+        # Arrange
+        csv_content = "name|note\nJohn|'a|b'\nJane|it\\'s\n"
+        data = {"file": (io.BytesIO(csv_content.encode()), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json"
+            "?delimiter=|&quotechar='&escapechar=\\",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.json["data"] == [
+            {"name": "John", "note": "a|b"},
+            {"name": "Jane", "note": "it's"},
+        ]
+
+    def test_csv_to_json_endpoint_invalid_delimiter(self, client):
+        """Prueba el rechazo de un separador de más de un carácter"""
+        # Arrange
+        data = {"file": (io.BytesIO(b"a,b\n1,2\n"), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?delimiter=;;",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json["error"] == "delimiter must be a single character"
+
+    def test_paginated_csv_to_json_keeps_dialect(self, client):
+        """Prueba que las páginas se leen con el dialecto detectado"""
+        # Arrange
+        csv_content = "name;city\n" + "\n".join(
+            f"Person{i};city{i}" for i in range(150)
+        )
+        upload = client.post(
+            "/api/v1/uploads",
+            data={"file": (io.BytesIO(csv_content.encode()), "test.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Act
+        page = client.get(
+            f"/api/v1/uploads/{upload.json['upload_id']}/csv-to-json"
+            "?offset=140&limit=5"
+        )
+
+        # Assert
+        assert upload.json["row_count"] == 150
+        assert page.json["data"][0] == {"name": "Person140", "city": "City140"}
+
+    def test_csv_to_json_endpoint_all_errors(self, client):
+        """Prueba que se informan todos los errores de una sola vez"""
+        # Arrange
+        csv_content = b'name,note\nJohn,"a\nb"\nJane\nAnn,x,y\n'
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?all_errors=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json["error"] == (
+            "Número inconsistente de columnas en la línea 4; "
+            "Número inconsistente de columnas en la línea 5"
+        )
+
+    @pytest.mark.parametrize(
+        "query, reported", [("all_errors=true", 25), ("max_errors=25", 20)]
+    )
+    def test_csv_to_json_endpoint_many_errors(self, client, query, reported):
+        """Con all_errors el mensaje no se recorta a 20 errores"""
+        # Arrange
+        csv_content = "name,note\n" + "x\n" * 25
+        data = {"file": (io.BytesIO(csv_content.encode()), "test.csv")}
+
+        # Act
+        response = client.post(
+            f"/api/v1/convert/csv-to-json?{query}",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        error = response.json["error"]
+        assert error.count("Número inconsistente") == reported
+        assert error.endswith("línea 26") == (reported == 25)
+        assert error.endswith("(and 5 more)") == (reported == 20)
+
+    def test_csv_to_json_endpoint_lenient(self, client):
+        """Prueba el modo tolerante y la descarga de filas rechazadas"""
+        # Arrange
+        csv_content = b"name,age\nJohn,30\nJane\nAnn,25\n"
+        data = {"file": (io.BytesIO(csv_content), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?lenient=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+        rejects = client.get(f"/api/v1/rejects/{response.json['rejects_id']}")
+
+        # Assert
+        assert response.status_code == 200
+        assert [row["name"] for row in response.json["data"]] == [
+            "John",
+            "Ann",
+        ]
+        assert response.json["accepted_rows"] == 2
+        assert response.json["rejected_rows"] == 1
+        assert response.headers["X-Rejected-Rows"] == "1"
+        assert rejects.mimetype == "application/x-ndjson"
+        assert json.loads(rejects.data) == {
+            "line": 3,
+            "reason": "Número inconsistente de columnas en la línea 3",
+            "content": ["Jane"],
+        }
+
+    def test_json_lines_to_csv_endpoint_lenient(self, client):
+        """Prueba el recuento de rechazos en la conversión a CSV"""
+        # Arrange
+        ndjson_content = b'{"name": "John"}\nnot json\n'
+        data = {"file": (io.BytesIO(ndjson_content), "test.ndjson")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv?lenient=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-Accepted-Rows"] == "1"
+        assert response.headers["X-Rejected-Rows"] == "1"
+        assert "X-Rejects-Id" in response.headers
+
+    def test_json_lines_to_tables_lenient(self, client):
+        """Prueba el recuento de rechazos en la salida relacional"""
+        # Arrange
+        ndjson_content = b'{"name": "John"}\nnot json\n{"name": "Ann"}\n'
+        data = {"file": (io.BytesIO(ndjson_content), "test.ndjson")}
+
+        # Act
+        response = client.post(
+            "/api/v1/convert/json-to-csv?lenient=true&tables=true",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-Accepted-Rows"] == "2"
+        assert response.headers["X-Rejected-Rows"] == "1"
+        rejects = client.get(
+            f"/api/v1/rejects/{response.headers['X-Rejects-Id']}"
+        )
+        with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+            assert zf.read("rejects.ndjson") == rejects.data
+
+    def test_unknown_rejects(self, client):
+        """Prueba la respuesta para rechazos inexistentes o caducados"""
+        # Act
+        response = client.get("/api/v1/rejects/missing")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_csv_to_json_endpoint_registered_schema(self, client):
+        """Prueba la conversión validada con un esquema registrado"""
+        # Arrange
+        schema = client.post(
+            "/api/v1/schemas",
+            json={
+                "columns": [
+                    {"name": "id", "type": "int", "required": True},
+                    {"name": "price", "type": "float"},
+                ]
+            },
+        )
+        url = (
+            "/api/v1/convert/csv-to-json"
+            f"?schema_id={schema.json['schema_id']}&all_errors=true"
+        )
+
+        # Act
+        valid = client.post(
+            url,
+            data={"file": (io.BytesIO(b"id,price\n1,9.5\n2,\n"), "a.csv")},
+            content_type="multipart/form-data",
+        )
+        invalid = client.post(
+            url,
+            data={"file": (io.BytesIO(b"id,price\n,1\n3,x\n"), "b.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert schema.status_code == 201
+        assert valid.json["schema"] == {"id": "int", "price": "float"}
+        assert valid.json["data"] == [
+            {"id": 1, "price": 9.5},
+            {"id": 2, "price": None},
+        ]
+        assert invalid.status_code == 400
+        assert invalid.json["error"] == (
+            "Falta el valor obligatorio de la columna id en la línea 2; "
+            "Valor no válido en la columna price (float) en la línea 3"
+        )
+
+    def test_csv_to_json_endpoint_unknown_schema(self, client):
+        """Prueba la referencia a un esquema no registrado"""
+        # Act
+        response = client.post(
+            "/api/v1/convert/csv-to-json?schema_id=missing",
+            data={"file": (io.BytesIO(b"id\n1\n"), "test.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json["error"] == "Unknown schema: missing"
+
+    def test_validate_csv_endpoint(self, client, app):
+        """Prueba la validación sin conversión y su límite de tamaño propio"""
+        # Arrange
+        app.config["MAX_CONTENT_LENGTH"] = 1024
+        csv_content = b"name;age\n" + b"John;30\n" * 200 + b"Jane\nAnn;1;2\n"
+
+        # Act
+        response = client.post(
+            "/api/v1/validate/csv",
+            data={"file": (io.BytesIO(csv_content), "test.csv")},
+            content_type="multipart/form-data",
+        )
+        too_large = client.post(
+            "/api/v1/convert/csv-to-json",
+            data={"file": (io.BytesIO(csv_content), "test.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json == {
+            "valid": False,
+            "errors": [
+                "Número inconsistente de columnas en la línea 202",
+                "Número inconsistente de columnas en la línea 203",
+            ],
+            "row_count": 202,
+            "column_count": 2,
+        }
+        assert too_large.status_code == 413
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    @pytest.mark.parametrize(
+        "filename, content, expected",
+        [
+            ("a.json", b'[{"a": 1}, {"b": 2}]', (True, [], 2, 2)),
+            (
+                "a.json",
+                b'[{"a": 1}, 2]',
+                (False, ["Item 2 must be an object"], 2, 1),
+            ),
+            (
+                "a.ndjson",
+                b'{"a": 1}\nnope\n',
+                (False, ["Invalid JSON on line 2"], 1, 1),
+            ),
+        ],
+    )
+    def test_validate_json_endpoint(self, client, filename, content, expected):
+        """Prueba la validación por streaming de JSON y JSON Lines"""
+        # Act
+        response = client.post(
+            "/api/v1/validate/json",
+            data={"file": (io.BytesIO(content), filename)},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        body = response.json
+        assert (
+            body["valid"],
+            body["errors"],
+            body["row_count"],
+            body["column_count"],
+        ) == expected
+
+    def test_inspect_endpoint(self, client, app):
+        """Prueba la inspección de cabeceras, muestra y número de filas"""
+        # Arrange
+        csv_content = "name;city\n" + "".join(
+            f'Person{i};"city\n{i}"\n' for i in range(50)
+        )
+        data = {"file": (io.BytesIO(csv_content.encode()), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/inspect?rows=2",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["headers"] == ["name", "city"]
+        assert response.json["sample"] == [
+            {"name": "Person0", "city": "City\n0"},
+            {"name": "Person1", "city": "City\n1"},
+        ]
+        assert response.json["row_count"] == 50
+        assert response.json["dialect"]["delimiter"] == ";"
+        assert response.json["file"]["size"] == len(csv_content)
+        assert response.json["file"]["mime_type"] == "text/csv"
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_inspect_utf16(self, client, app):
+        """El número de filas de un CSV en UTF-16 se cuenta sobre el texto"""
+        # Arrange: "ਊ" es U+0A0A, con el byte 0x0A de un salto de línea
+        csv_content = "name,city\nAna,Sevilla\nਊ,x\nLuis,Cádiz\n"
+        data = {"file": (io.BytesIO(csv_content.encode("utf-16")), "test.csv")}
+
+        # Act
+        response = client.post(
+            "/api/v1/inspect", data=data, content_type="multipart/form-data"
+        )
+
+        # Assert
+        assert response.json["encoding"] == "utf-16"
+        assert response.json["row_count"] == 3
+        assert response.json["sample"][1] == {"name": "ਊ", "city": "X"}
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    @pytest.mark.parametrize(
+        "filename, content",
+        [
+            ("data.csv", b"name,age\nJohn,30\nJane,40\nJohn,\n"),
+            (
+                "data.ndjson",
+                b'{"name": "John", "age": 30}\n{"name": "Jane", "age": 40}\n'
+                b'{"name": "John", "age": null}\n',
+            ),
+        ],
+    )
+    def test_profile_endpoint(self, client, filename, content):
+        """Prueba el perfil de columnas de un CSV y de un JSON Lines"""
+        # Act
+        response = client.post(
+            "/api/v1/profile?top_k=1",
+            data={"file": (io.BytesIO(content), filename)},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json["row_count"] == 3
+        name, age = (
+            response.json["columns"]["name"],
+            response.json["columns"]["age"],
+        )
+        assert name["distinct_count"] == 2
+        assert name["top_values"] == [{"value": "John", "count": 2}]
+        assert (age["min"], age["max"], age["mean"]) == (30, 40, 35)
+        assert list(response.json["columns"]) == ["name", "age"]
+
+    def test_json_lines_lenient_records(self, client, app):
+        """Perfil y agregación de JSON Lines en modo tolerante"""
+        # Arrange
+        content = b'{"city": "Sevilla"}\nnot json\n{"city": "Cadiz"}\n'
+
+        def post(url):
+            return client.post(
+                url,
+                data={"file": (io.BytesIO(content), "events.ndjson")},
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        profile = post("/api/v1/profile?lenient=true")
+        aggregated = post("/api/v1/aggregate?lenient=true&format=csv")
+        strict = post("/api/v1/profile")
+
+        # Assert
+        assert profile.status_code == 200
+        assert profile.json["row_count"] == 2
+        assert profile.json["accepted_rows"] == 2
+        assert profile.json["rejected_rows"] == 1
+        rejects = client.get(f"/api/v1/rejects/{profile.json['rejects_id']}")
+        assert json.loads(rejects.data)["line"] == 2
+        assert aggregated.headers["X-Accepted-Rows"] == "2"
+        assert aggregated.headers["X-Rejected-Rows"] == "1"
+        assert aggregated.data.decode() == "count\r\n2\r\n"
+        assert strict.status_code == 400
+        assert strict.json["error"].startswith("Invalid JSON on line 2")
+
+    def test_sampling_endpoints(self, client):
+        """Prueba el muestreo con semilla en ambas direcciones"""
+        # Arrange
+        csv_content = "id\n" + "".join(f"{i}\n" for i in range(1000))
+        ndjson_content = "".join(f'{{"id": {i}}}\n' for i in range(1000))
+
+        def post(url, content, filename):
+            return client.post(
+                url,
+                data={"file": (io.BytesIO(content.encode()), filename)},
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        first = post(
+            "/api/v1/convert/csv-to-json?sample=5&seed=3", csv_content, "a.csv"
+        )
+        second = post(
+            "/api/v1/convert/csv-to-json?sample=5&seed=3", csv_content, "a.csv"
+        )
+        sampled_csv = post(
+            "/api/v1/convert/json-to-csv?sample=5&seed=3",
+            ndjson_content,
+            "a.ndjson",
+        )
+
+        # Assert
+        ids = [int(row["id"]) for row in first.json["data"]]
+        assert len(ids) == 5
+        assert ids == sorted(ids)
+        assert second.json["data"] == first.json["data"]
+        rows = list(csv.DictReader(sampled_csv.data.decode().splitlines()))
+        assert [int(row["id"]) for row in rows] == ids
+
+    def test_sorted_conversions(self, client, app):
+        """Prueba la ordenación externa en ambas direcciones"""
+        # Arrange: tramos de 64 filas para forzar la mezcla desde disco
+        csv_content = "name,age\n" + "".join(
+            f"P{i},{(i * 37) % 100}\n" for i in range(300)
+        )
+        ndjson_content = "".join(
+            f'{{"name": "P{i}", "age": {(i * 37) % 100}}}\n'
+            for i in range(300)
+        )
+
+        def post(url, content, filename):
+            return client.post(
+                url,
+                data={"file": (io.BytesIO(content.encode()), filename)},
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        as_json = post(
+            "/api/v1/convert/csv-to-json?sort=-age,name&infer_types=true",
+            csv_content,
+            "data.csv",
+        )
+        as_csv = post(
+            "/api/v1/convert/json-to-csv?sort=-age,name",
+            ndjson_content,
+            "data.ndjson",
+        )
+        unknown = post(
+            "/api/v1/convert/csv-to-json?sort=email", csv_content, "data.csv"
+        )
+        unknown_json = [
+            post(url, ndjson_content, filename)
+            for url, filename in (
+                ("/api/v1/convert/json-to-csv?sort=-email", "data.ndjson"),
+                (
+                    "/api/v1/convert/json-to-csv?sort=email&tables=true",
+                    "a.jsonl",
+                ),
+                ("/api/v1/profile?sort=email", "data.ndjson"),
+            )
+        ]
+        unknown_document = post(
+            "/api/v1/profile?sort=-email",
+            json.dumps(
+                [json.loads(line) for line in ndjson_content.splitlines()]
+            ),
+            "data.json",
+        )
+
+        # Assert
+        expected = sorted(((i * 37) % 100, f"P{i}") for i in range(300))
+        expected.sort(key=lambda item: -item[0])
+        assert [
+            (r["age"], r["name"]) for r in as_json.json["data"]
+        ] == expected
+        rows = list(csv.DictReader(as_csv.data.decode().splitlines()))
+        assert [(int(r["age"]), r["name"]) for r in rows] == expected
+        assert unknown.status_code == 400
+        assert unknown.json["error"] == "Unknown column: email"
+        for response in unknown_json + [unknown_document]:
+            assert response.status_code == 400
+            assert response.json["error"] == "Unknown column: email"
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_deduplicated_conversions(self, client, app):
+        """Prueba la eliminación de duplicados en ambas direcciones"""
+        # Arrange: 200 filas distintas repetidas tres veces
+        csv_content = "id,name\n" + "".join(
+            f"{i % 200},P{i % 200}\n" for i in range(600)
+        )
+        ndjson_content = "".join(
+            f'{{"id": {i % 200}, "name": "P{i % 200}"}}\n' for i in range(600)
+        )
+
+        def post(url, content, filename):
+            return client.post(
+                url,
+                data={"file": (io.BytesIO(content.encode()), filename)},
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        as_json = post(
+            "/api/v1/convert/csv-to-json?dedupe_on=id", csv_content, "a.csv"
+        )
+        as_csv = post(
+            "/api/v1/convert/json-to-csv?dedupe=true",
+            ndjson_content,
+            "a.ndjson",
+        )
+        bloom = post(
+            "/api/v1/convert/csv-to-json?dedupe=bloom&orient=split",
+            csv_content,
+            "a.csv",
+        )
+        as_ndjson = post(
+            "/api/v1/convert/csv-to-json?dedupe=true&orient=ndjson",
+            csv_content,
+            "a.csv",
+        )
+        as_tables = post(
+            "/api/v1/convert/json-to-csv?dedupe=true&tables=true",
+            ndjson_content,
+            "a.ndjson",
+        )
+        unknown = post(
+            "/api/v1/convert/csv-to-json?dedupe_on=email", csv_content, "a.csv"
+        )
+        unknown_json = post(
+            "/api/v1/convert/json-to-csv?dedupe_on=email",
+            ndjson_content,
+            "a.ndjson",
+        )
+        bad_mode = post(
+            "/api/v1/convert/csv-to-json?dedupe=fuzzy", csv_content, "a.csv"
+        )
+
+        # Assert
+        assert [r["id"] for r in as_json.json["data"]] == [
+            str(i) for i in range(200)
+        ]
+        assert as_json.json["duplicates_removed"] == 400
+        rows = list(csv.DictReader(as_csv.data.decode().splitlines()))
+        assert [int(r["id"]) for r in rows] == list(range(200))
+        assert as_csv.headers["X-Duplicates-Removed"] == "400"
+        assert bloom.json["duplicates_removed"] == 600 - len(
+            bloom.json["data"]
+        )
+        lines = [json.loads(line) for line in as_ndjson.data.splitlines()]
+        assert len(lines) == 201
+        assert lines[-1] == {"trailer": {"duplicates_removed": 400}}
+        assert as_tables.headers["X-Duplicates-Removed"] == "400"
+        with zipfile.ZipFile(io.BytesIO(as_tables.data)) as zf:
+            assert len(zf.read("records.csv").splitlines()) == 201
+        assert unknown.status_code == 400
+        assert unknown.json["error"] == "Unknown column: email"
+        assert unknown_json.status_code == 400
+        assert unknown_json.json["error"] == "Unknown column: email"
+        assert bad_mode.status_code == 400
+        assert bad_mode.json["error"] == "Unsupported dedupe mode: fuzzy"
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_deduplicated_operations(self, client, app):
+        """Agregación, join y diff informan de los duplicados descartados"""
+        # Arrange: cada fila aparece dos veces en cada archivo
+        sales = "store,amount\n" + "".join(
+            f"S{i % 100},{i % 100}\n" for i in range(200)
+        )
+        stores = "".join(
+            f'{{"store": "S{i % 100}", "city": "C{i % 100}"}}\n'
+            for i in range(200)
+        )
+
+        def post(url, **files):
+            return client.post(
+                url,
+                data={
+                    name: (io.BytesIO(content.encode()), filename)
+                    for name, (content, filename) in files.items()
+                },
+                content_type="multipart/form-data",
+            )
+
+        left = (sales, "sales.csv")
+        right = (stores, "stores.ndjson")
+
+        # Act
+        aggregated = post(
+            "/api/v1/aggregate?dedupe=true&format=csv&agg=sum:amount",
+            file=left,
+        )
+        joined_csv = post(
+            "/api/v1/join?on=store&dedupe_on=store&format=csv",
+            left=left,
+            right=right,
+        )
+        joined_json = post(
+            "/api/v1/join?on=store&dedupe_on=store", left=left, right=right
+        )
+        diff_csv = post(
+            "/api/v1/diff?key=store&dedupe=true&format=csv",
+            old=left,
+            new=left,
+        )
+        diff_json = post(
+            "/api/v1/diff?key=store&dedupe=true", old=left, new=left
+        )
+
+        # Assert
+        assert aggregated.headers["X-Duplicates-Removed"] == "100"
+        assert aggregated.data.decode().splitlines()[1] == str(sum(range(100)))
+        assert joined_csv.headers["X-Duplicates-Removed"] == "200"
+        assert len(joined_csv.data.decode().splitlines()) == 101
+        assert joined_json.json["duplicates_removed"] == 200
+        assert len(joined_json.json["data"]) == 100
+        assert diff_csv.headers["X-Duplicates-Removed"] == "200"
+        assert diff_json.json["duplicates_removed"] == 200
+        assert diff_json.json["summary"]["unchanged"] == 100
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_aggregate(self, client, app):
+        """Prueba la agregación por grupos con salida JSON y CSV"""
+        # Arrange: 200 grupos, más de los 64 que caben en memoria
+        csv_content = "store,amount\n" + "".join(
+            f"S{i % 200},{i}\n" for i in range(1000)
+        )
+
+        def post(url, content=csv_content, filename="sales.csv"):
+            return client.post(
+                url,
+                data={"file": (io.BytesIO(content.encode()), filename)},
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        as_json = post(
+            "/api/v1/aggregate?group_by=store&agg=count,sum:amount"
+            "&agg=mean:amount&sort=-sum_amount"
+        )
+        as_csv = post(
+            "/api/v1/aggregate?agg=max:amount&format=csv",
+            '[{"amount": 3}, {"amount": 8}]',
+            "data.json",
+        )
+        unknown = post("/api/v1/aggregate?group_by=city")
+        unknown_json = post(
+            "/api/v1/aggregate?group_by=city&agg=sum:amount",
+            '[{"amount": 3}, {"amount": 8}]',
+            "data.json",
+        )
+        bad = post("/api/v1/aggregate?agg=median:amount")
+
+        # Assert
+        groups = as_json.json["data"]
+        assert len(groups) == 200
+        assert groups[0] == {
+            "store": "S199",
+            "count": 5,
+            "sum_amount": 199 * 5 + 2000,
+            "mean_amount": 599.0,
+        }
+        assert groups[-1]["store"] == "S0"
+        assert as_csv.data.decode() == "max_amount\r\n8\r\n"
+        assert unknown.json["error"] == "Unknown column: city"
+        assert unknown_json.status_code == 400
+        assert unknown_json.json["error"] == "Unknown column: city"
+        assert bad.status_code == 400
+        assert bad.json["error"] == "Unsupported aggregate: median"
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_join(self, client, app):
+        """Prueba el join de un CSV de pedidos con un JSON de clientes"""
+        # Arrange: 100 clientes, más de los 64 que caben en la tabla hash
+        orders = "order,customer\n" + "".join(
+            f"O{i},{i % 120}\n" for i in range(300)
+        )
+        customers = json.dumps(
+            [{"customer": i, "name": f"C{i}"} for i in range(100)]
+        )
+
+        def post(query, left="orders.csv", right="customers.json"):
+            contents = {
+                "orders.csv": orders,
+                "customers.json": customers,
+                "customers.ndjson": '{"customer": 1}\n{"customer": \n',
+                "empty.ndjson": "",
+            }
+            return client.post(
+                f"/api/v1/join?{query}",
+                data={
+                    "left": (io.BytesIO(contents[left].encode()), left),
+                    "right": (io.BytesIO(contents[right].encode()), right),
+                },
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        inner = post("on=customer&sort=order")
+        left = post("on=customer&how=left&format=csv")
+        both_csv = post("on=customer&format=csv", right="orders.csv")
+        unknown = post("on=name", right="orders.csv")
+        bad_lines = post("on=customer", right="customers.ndjson")
+        empty = post("on=customer", right="empty.ndjson")
+        missing = client.post(
+            "/api/v1/join",
+            data={"left": (io.BytesIO(orders.encode()), "orders.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        data = inner.json["data"]
+        assert len(data) == 260
+        assert data[0]["order"] == "O0"
+        assert data[0]["name"] == "C0"
+        assert data[0]["customer"] == "0"
+        rows = list(csv.DictReader(left.data.decode().splitlines()))
+        assert len(rows) == 300
+        assert sum(1 for row in rows if not row["name"]) == 40
+        assert both_csv.data.decode().splitlines()[0] == (
+            "order,customer,order_right"
+        )
+        assert len(both_csv.data.decode().splitlines()) == 1 + 60 * 9 + 60 * 4
+        assert unknown.json["error"] == "Unknown column: name"
+        assert bad_lines.status_code == empty.status_code == 400
+        assert bad_lines.json["error"].startswith("Invalid JSON on line 2")
+        assert empty.json["error"] == "Empty JSON Lines file"
+        assert missing.status_code == 400
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_join_files_with_the_same_name(self, client, app):
+        """Dos subidas con el mismo nombre no se pisan (no es un self-join)"""
+        # Arrange
+        orders = "id,order\n1,O1\n2,O2\n"
+        customers = "id,name\n1,Ana\n"
+
+        # Act
+        response = client.post(
+            "/api/v1/join?on=id",
+            data={
+                "left": (io.BytesIO(orders.encode()), "export.csv"),
+                "right": (io.BytesIO(customers.encode()), "export.csv"),
+            },
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        data = response.json["data"]
+        assert [(row["order"], row["name"]) for row in data] == [("O1", "Ana")]
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_diff(self, client, app):
+        """Prueba el diff entre dos exportaciones por columna clave"""
+        # Arrange: 200 filas antiguas, más de las 64 que caben en memoria
+        old = "sku,price\n" + "".join(f"A{i},{i}\n" for i in range(200))
+        new = "sku,price\n" + "".join(
+            f"A{i},{i + (i % 50 == 0)}\n" for i in range(100, 300)
+        )
+
+        def post(
+            query,
+            old_content=old,
+            old_name="export.csv",
+            new_content=new,
+            new_name="export.csv",
+        ):
+            # Las dos versiones se llaman igual, como en las exportaciones
+            return client.post(
+                f"/api/v1/diff?{query}",
+                data={
+                    "old": (io.BytesIO(old_content.encode()), old_name),
+                    "new": (io.BytesIO(new_content.encode()), new_name),
+                },
+                content_type="multipart/form-data",
+            )
+
+        # Act
+        as_json = post("key=sku&sort=change_type,sku")
+        as_csv = post("key=sku&format=csv")
+        as_ndjson = post("key=sku&orient=ndjson")
+        from_json = post(
+            "key=sku",
+            json.dumps([{"sku": f"A{i}", "price": i} for i in range(200)]),
+            "export.json",
+        )
+        no_key = post("")
+        bad_lines = post(
+            "key=sku",
+            new_content='{"sku": "A1", "price": 1}\n{"sku": \n',
+            new_name="export.ndjson",
+        )
+
+        # Assert
+        summary = {"added": 100, "removed": 100, "changed": 2, "unchanged": 98}
+        assert as_json.json["summary"] == summary
+        changes = as_json.json["data"]
+        assert len(changes) == 202
+        assert changes[0] == {
+            "change_type": "added",
+            "changed_columns": None,
+            "sku": "A200",
+            "price": "201",
+        }
+        changed = [c for c in changes if c["change_type"] == "changed"]
+        assert [(c["sku"], c["changed_columns"]) for c in changed] == [
+            ("A100", "price"),
+            ("A150", "price"),
+        ]
+        assert as_csv.headers["X-Changed-Rows"] == "2"
+        assert as_csv.headers["X-Removed-Rows"] == "100"
+        rows = list(csv.DictReader(as_csv.data.decode().splitlines()))
+        assert len(rows) == 202
+        lines = as_ndjson.data.decode().splitlines()
+        assert len(lines) == 203
+        assert json.loads(lines[-1]) == {"trailer": {"summary": summary}}
+        assert from_json.json["summary"] == summary
+        assert no_key.json["error"] == "A key column is required"
+        assert bad_lines.status_code == 400
+        assert bad_lines.json["error"].startswith("Invalid JSON on line 2")
+        assert list(Path(app.config["UPLOAD_FOLDER"]).iterdir()) == []
+
+    def test_dataset_versions(self, client, app):
+        """Prueba la reconversión incremental de versiones de un dataset"""
+        # Arrange: la segunda versión cambia una sola fila
+        rows = [f"A{i},{i}\n" for i in range(300)]
+        first = "sku,price\n" + "".join(rows)
+        rows[150] = "A150,999\n"
+        second = "sku,price\n" + "".join(rows)
+
+        def post(content, dataset_id="products", query="infer_types=true"):
+            return client.post(
+                f"/api/v1/datasets/{dataset_id}/versions?{query}",
+                data={"file": (io.BytesIO(content.encode()), "export.csv")},
+                content_type="multipart/form-data",
+            )
+
+        # Act: la versión se registra al terminar de leer la respuesta
+        v1 = post(first)
+        v1_body = v1.json
+        v2 = post(second)
+        v2_body = v2.json
+        listing = client.get("/api/v1/datasets/products")
+        missing = client.get("/api/v1/datasets/unknown")
+        invalid = post(first, "bad.id")
+        sorted_version = post(first, query="sort=sku")
+        unknown = post(first, query="where=city=Madrid")
+        as_ndjson = post(first, query="orient=ndjson")
+
+        # Assert
+        assert v1.status_code == v2.status_code == 201
+        assert v1_body["schema"] == {"sku": "string", "price": "int"}
+        assert len(v2_body["data"]) == 300
+        assert v2_body["data"][150] == {"sku": "A150", "price": 999}
+        dataset = v2_body["dataset"]
+        assert dataset["version"] == 2
+        assert dataset["converted_chunks"] == 1
+        assert dataset["reused_chunks"] == dataset["chunks"] - 1
+        assert [v["version"] for v in listing.json["versions"]] == [1, 2]
+        assert missing.status_code == 404
+        assert invalid.json["error"] == "Invalid dataset id: bad.id"
+        assert sorted_version.json["error"] == (
+            "sort_by is not supported for incremental conversion"
+        )
+        assert unknown.status_code == 400
+        assert unknown.json["error"] == "Unknown column: city"
+        assert as_ndjson.json["error"] == (
+            "Unsupported orient for dataset versions: ndjson"
+        )
+        # Solo queda la salida convertida de la última versión
+        upload_folder = Path(app.config["UPLOAD_FOLDER"])
+        assert [p.name for p in upload_folder.iterdir()] == ["datasets"]
@@ -0,0 +1,107 @@
+import pytest
+from services import FlattenService
+from services.flatten_service import _Flattener
+
+
+class TestFlattenService:
+    @pytest.fixture
+    def flatten_service(self):
+        return FlattenService()
+
+    @pytest.fixture
+    def record(self):
+        return {
+            "id": 1,
+            "address": {"city": "Madrid", "geo": {"lat": 40.4}},
+            "tags": ["a", "b"],
+        }
+
+    def test_flatten_join(self, flatten_service, record):
+        rows = list(flatten_service.flatten([record]))
+
+        assert rows == [
+            {
+                "id": 1,
+                "address.city": "Madrid",
+                "address.geo.lat": 40.4,
+                "tags": "a|b",
+            }
+        ]
+
+    def test_flatten_index(self, flatten_service, record):
+        rows = list(flatten_service.flatten([record], array_mode="index"))
+
+        assert rows[0]["tags.0"] == "a"
+        assert rows[0]["tags.1"] == "b"
+
+    def test_flatten_explode(self, flatten_service):
+        record = {"id": 1, "items": [{"sku": "X"}, {"sku": "Y", "qty": 2}]}
+
+        rows = list(flatten_service.flatten([record], array_mode="explode"))
+
+        assert rows == [
+            {"id": 1, "items.sku": "X"},
+            {"id": 1, "items.sku": "Y", "items.qty": 2},
+        ]
+
+    def test_plans_are_reused_per_shape(self, record):
+        flattener = _Flattener("join", ".", "|")
+        other = {"id": 2, "address": None, "tags": []}
+
+        for _ in range(100):
+            flattener.flatten(record, "")
+            flattener.flatten(other, "")
+
+        assert flattener.compiled == 2
+        assert flattener.flatten(other, "") == [
+            {"id": 2, "address": None, "tags": ""}
+        ]
+
+    def test_unsupported_array_mode(self, flatten_service, record):
+        with pytest.raises(ValueError):
+            list(flatten_service.flatten([record], array_mode="zip"))
+
+    def test_compile_unflatten(self, flatten_service):
+        build = flatten_service.compile_unflatten(
+            ["id", "address.city", "address.geo.lat", "tags.0", "tags.1"]
+        )
+
+        assert build(
+            {
+                "id": 1,
+                "address.city": "Madrid",
+                "address.geo.lat": 40.4,
+                "tags.0": "a",
+                "tags.1": "b",
+            }
+        ) == {
+            "id": 1,
+            "address": {"city": "Madrid", "geo": {"lat": 40.4}},
+            "tags": ["a", "b"],
+        }
+
+    def test_compile_unflatten_conflict(self, flatten_service):
+        with pytest.raises(ValueError, match="Conflicting columns"):
+            flatten_service.compile_unflatten(["address", "address.city"])
+
+    def test_flatten_unflatten_round_trip(self, flatten_service, record):
+        rows = list(flatten_service.flatten([record], array_mode="index"))
+        build = flatten_service.compile_unflatten(list(rows[0]))
+
+        assert build(rows[0]) == record
+
+    def test_split_children(self, flatten_service):
+        record = {
+            "id": 1,
+            "items": [{"sku": "X"}, {"sku": "Y"}],
+            "order": {"lines": [{"n": 1}], "total": 3},
+            "tags": ["a"],
+        }
+
+        parent, children = flatten_service.split_children(record)
+
+        assert parent == {"id": 1, "order": {"total": 3}, "tags": ["a"]}
+        assert children == {
+            "items": [{"sku": "X"}, {"sku": "Y"}],
+            "order.lines": [{"n": 1}],
+        }
@@ -154,6 +154,8 @@ class TestSystemIntegration:
                 content_type="multipart/form-data",
             )
             assert response.status_code == 200
+            # La subida se borra al terminar de enviar la respuesta
+            assert len(response.json["data"]) == 1
 
         # Assert
         final_files = set(upload_folder.glob("*"))
@@ -242,6 +244,37 @@ class TestSystemIntegration:
         )
         assert response_json.headers["Content-Type"] == "application/json"
 
+    def test_nested_json_round_trip(self, client: FlaskClient) -> None:
+        """
+        Prueba el ciclo JSON anidado -> CSV aplanado -> JSON anidado.
+        Verifica que la estructura y los tipos se recuperan sin pérdidas.
+        """
+        # Arrange
+        records = [
+            {"name": "John", "address": {"city": "Madrid", "zip": 28001}},
+            {"name": "Jane", "address": {"city": "Lima", "zip": 15001}},
+        ]
+
+        # Act
+        csv_response = client.post(
+            "/api/v1/convert/json-to-csv?flatten=true"
+            "&columns=name,address.city,address.zip",
+            data={
+                "file": (io.BytesIO(json.dumps(records).encode()), "n.json")
+            },
+            content_type="multipart/form-data",
+        )
+        json_response = client.post(
+            "/api/v1/convert/csv-to-json?unflatten=true&infer_types=true",
+            data={"file": (io.BytesIO(csv_response.data), "n.csv")},
+            content_type="multipart/form-data",
+        )
+
+        # Assert
+        assert csv_response.status_code == 200
+        assert json_response.status_code == 200
+        assert json_response.json["data"] == records
+
     def test_large_file_processing_integration(
         self, client: FlaskClient
     ) -> None:
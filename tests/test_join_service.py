@@ -0,0 +1,98 @@
+from unittest.mock import Mock
+import pytest
+from services import FileService, JoinService
+
+
+class TestJoinService:
+    @pytest.fixture
+    def join_service(self, tmp_path):
+        return JoinService(FileService(tmp_path), max_build_rows=4)
+
+    @pytest.fixture
+    def orders(self):
+        return [
+            {"id": "1", "customer": "10", "total": "5"},
+            {"id": "2", "customer": "20", "total": "7"},
+            {"id": "3", "customer": "99", "total": "1"},
+            {"id": "4", "customer": "", "total": "2"},
+        ]
+
+    @pytest.fixture
+    def customers(self):
+        return [
+            {"customer": 10, "name": "Ana"},
+            {"customer": 20, "name": "Luis"},
+            {"customer": 30, "name": "Eva"},
+        ]
+
+    @pytest.mark.parametrize("build", ["left", "right"])
+    @pytest.mark.parametrize(
+        "how, expected",
+        [
+            ("inner", {("1", "Ana"), ("2", "Luis")}),
+            ("left", {("1", "Ana"), ("2", "Luis"), ("3", None), ("4", None)}),
+            ("right", {("1", "Ana"), ("2", "Luis"), (None, "Eva")}),
+            (
+                "outer",
+                {
+                    ("1", "Ana"),
+                    ("2", "Luis"),
+                    ("3", None),
+                    ("4", None),
+                    (None, "Eva"),
+                },
+            ),
+        ],
+    )
+    def test_join_types(
+        self, join_service, orders, customers, how, expected, build
+    ):
+        joined = list(
+            join_service.join(
+                orders, customers, ["customer"], ["customer"], how, build
+            )
+        )
+
+        assert {(r.get("id"), r.get("name")) for r in joined} == expected
+        assert len(joined) == len(expected)
+
+    def test_grace_hash_join(self, tmp_path):
+        file_service = FileService(tmp_path)
+        file_service.create_partitions = Mock(
+            wraps=file_service.create_partitions
+        )
+        join_service = JoinService(file_service, max_build_rows=4)
+        left = [{"k": i % 30, "side": "L"} for i in range(90)]
+        right = [{"k": str(i), "v": i} for i in range(20)]
+
+        joined = list(join_service.join(left, right, ["k"], ["k"], "outer"))
+
+        # Lado de construcción y lado de sondeo, al menos
+        assert file_service.create_partitions.call_count >= 2
+        assert len(joined) == 20 * 3 + 10 * 3
+        assert sum(1 for r in joined if r.get("v") == 7) == 3
+        assert sum(1 for r in joined if "v" not in r) == 30
+        assert list(tmp_path.iterdir()) == []
+
+    def test_colliding_columns(self, join_service):
+        joined = join_service.join(
+            [{"id": 1, "name": "a"}],
+            [{"ref": "1", "name": "b"}],
+            ["id"],
+            ["ref"],
+        )
+
+        assert list(joined) == [
+            {"id": 1, "name": "a", "ref": "1", "name_right": "b"}
+        ]
+        assert join_service.output_columns(
+            ["id", "name"], ["ref", "name"], ["id"], ["ref"]
+        ) == ["id", "name", "ref", "name_right"]
+
+    def test_invalid_join(self, join_service):
+        with pytest.raises(ValueError, match="Unsupported join type: x"):
+            join_service.join([], [], ["a"], ["a"], "x")
+        with pytest.raises(ValueError, match="Unknown column: b"):
+            join_service.join([], [], ["b"], ["b"], left_columns=["a"])
+        with pytest.raises(ValueError, match="same number of keys"):
+            join_service.join([], [], ["a", "b"], ["a"])
@@ -0,0 +1,72 @@
+import pytest
+from services import ProfileService
+from services.profile_service import HeavyHitters, HyperLogLog
+
+
+class TestProfileService:
+    @pytest.fixture
+    def profile_service(self):
+        return ProfileService()
+
+    def test_profile(self, profile_service):
+        records = [
+            {"name": "John", "age": "30", "city": "Madrid"},
+            {"name": "", "age": "25.5", "city": "Madrid"},
+            {"name": "Jane", "age": None, "city": "Paris"},
+            {"name": "Ann", "age": "n/a"},
+        ]
+
+        profile = profile_service.profile(records, top_k=1)
+
+        assert profile["row_count"] == 4
+        name, age, city = (
+            profile["columns"][c] for c in ("name", "age", "city")
+        )
+        assert (
+            name["empty_count"],
+            name["min_length"],
+            name["max_length"],
+        ) == (
+            1,
+            0,
+            4,
+        )
+        assert (age["null_count"], age["numeric_count"]) == (1, 2)
+        assert (age["min"], age["max"], age["mean"]) == (25.5, 30.0, 27.75)
+        assert city["null_count"] == 1
+        assert city["distinct_count"] == 2
+        assert city["top_values"] == [{"value": "Madrid", "count": 2}]
+
+    def test_typed_values(self, profile_service):
+        records = [{"n": 1, "ok": True}, {"n": 2.5, "ok": False}]
+
+        profile = profile_service.profile(records)
+
+        assert profile["columns"]["n"]["mean"] == 1.75
+        assert profile["columns"]["ok"]["numeric_count"] == 0
+
+    def test_excluded_columns(self, profile_service):
+        records = [{"n": 1, "record_id": "REC-0001"}, {"n": 2}]
+
+        profile = profile_service.profile(records, exclude=["record_id"])
+
+        assert profile["row_count"] == 2
+        assert list(profile["columns"]) == ["n"]
+
+    def test_hyperloglog_estimate(self):
+        sketch = HyperLogLog()
+        for i in range(50000):
+            sketch.add(f"value-{i % 20000}")
+
+        assert abs(sketch.count() - 20000) / 20000 < 0.05
+        assert len(sketch.registers) == 4096
+
+    def test_heavy_hitters_keep_frequent_values(self):
+        hitters = HeavyHitters(capacity=4)
+        for i in range(1000):
+            hitters.add("common" if i % 3 == 0 else f"rare-{i}")
+
+        top = hitters.top(1)
+
+        assert top[0][0] == "common"
+        assert len(hitters.counters) <= 4
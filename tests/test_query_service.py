@@ -0,0 +1,85 @@
+from collections import Counter
+import pytest
+from services import QueryService, Predicate
+
+
+class TestQueryService:
+    @pytest.fixture
+    def query_service(self):
+        return QueryService()
+
+    @pytest.fixture
+    def headers(self):
+        return ["name", "age", "country"]
+
+    def test_parse_predicate(self, query_service):
+        assert query_service.parse_predicate("country=ES") == Predicate(
+            "country", "=", "ES"
+        )
+        assert query_service.parse_predicate("age >= 30") == Predicate(
+            "age", ">=", "30"
+        )
+        with pytest.raises(ValueError):
+            query_service.parse_predicate("country")
+
+    def test_compile_filter(self, query_service, headers):
+        row_filter = query_service.compile_filter(
+            headers,
+            [
+                query_service.parse_predicate("country=ES"),
+                query_service.parse_predicate("age>9"),
+            ],
+        )
+
+        assert row_filter(["Ana", "30", " ES "]) is True
+        assert row_filter(["Luis", "5", "ES"]) is False
+        assert row_filter(["John", "40", "US"]) is False
+
+    def test_compile_projection(self, query_service, headers):
+        columns, project = query_service.compile_projection(
+            headers, ["country", "name"]
+        )
+
+        assert columns == ["country", "name"]
+        assert project(["Ana", "30", "ES"]) == ("ES", "Ana")
+
+    def test_compile_projection_short_row(self, query_service, headers):
+        _, project = query_service.compile_projection(
+            headers, ["country", "name"]
+        )
+        _, project_one = query_service.compile_projection(headers, ["country"])
+
+        assert project(["Ana"]) == (None, "Ana")
+        assert project([]) == (None, None)
+        assert project_one(["Ana", "30"]) == (None,)
+
+    def test_unknown_column(self, query_service, headers):
+        with pytest.raises(ValueError, match="Unknown column: city"):
+            query_service.compile_projection(headers, ["city"])
+
+    def test_sample(self, query_service):
+        sample = query_service.sample(range(1000), 10, seed=7)
+
+        assert len(sample) == 10
+        assert sample == sorted(sample)
+        assert query_service.sample(range(1000), 10, seed=7) == sample
+        assert query_service.sample(range(3), 10) == [0, 1, 2]
+
+    def test_sample_is_uniform(self, query_service):
+        counts = Counter()
+        for seed in range(5000):
+            counts.update(query_service.sample(range(10), 2, seed))
+
+        # Cada elemento debería salir unas 1000 veces
+        assert all(800 < count < 1200 for count in counts.values())
+
+    def test_require_columns(self, query_service):
+        records = [{"name": "Ana"}, {"name": "Luis", "age": 30}]
+
+        checked = query_service.require_columns(records, ["name", "age"])
+        unknown = query_service.require_columns(records, ["city", "age"])
+
+        assert list(checked) == records
+        with pytest.raises(ValueError, match="Unknown column: city"):
+            list(unknown)
+        assert list(query_service.require_columns([], ["city"])) == []
@@ -0,0 +1,152 @@
+from datetime import date
+import pytest
+from services import SchemaService
+
+
+class TestSchemaService:
+    @pytest.fixture
+    def schema_service(self):
+        return SchemaService()
+
+    def test_infer_schema(self, schema_service):
+        sample = [
+            {
+                "id": "1",
+                "price": "9.5",
+                "active": "true",
+                "day": "2024-01-31",
+                "zip": "01234",
+                "notes": "",
+            },
+            {
+                "id": "2",
+                "price": "10",
+                "active": "False",
+                "day": "2024-02-01",
+                "zip": "28001",
+                "notes": "",
+            },
+        ]
+
+        schema = schema_service.infer_schema(sample)
+
+        assert schema == {
+            "id": "int",
+            "price": "float",
+            "active": "bool",
+            "day": "date",
+            "zip": "string",
+            "notes": "null",
+        }
+
+    def test_compiled_parsers(self, schema_service):
+        parsers = schema_service.compile_parsers(
+            {"id": "int", "active": "bool", "day": "date", "name": "string"}
+        )
+
+        row = schema_service.apply_parsers(
+            parsers,
+            {"id": "7", "active": "TRUE", "day": "2024-01-31", "name": ""},
+        )
+
+        assert row == {
+            "id": 7,
+            "active": True,
+            "day": date(2024, 1, 31),
+            "name": "",
+        }
+
+    def test_parsers_keep_values_outside_sample_type(self, schema_service):
+        parsers = schema_service.compile_parsers({"id": "int", "x": "float"})
+
+        row = schema_service.apply_parsers(parsers, {"id": "n/a", "x": "nan"})
+
+        assert row == {"id": "n/a", "x": "nan"}
+        assert schema_service.apply_parsers(parsers, {"id": ""}) == {
+            "id": None
+        }
+
+    def test_register_schema(self, schema_service):
+        definition = {
+            "columns": [
+                {"name": "id", "type": "int", "required": True},
+                {"name": "status", "allowed": ["open", "closed"]},
+                {"name": "active", "type": "bool", "allowed": [True]},
+            ]
+        }
+
+        schema = schema_service.register_schema(definition)
+        check_row = schema.bind(["status", "id", "active"])
+
+        assert schema_service.register_schema(definition) is schema
+        assert schema_service.get_schema(schema.schema_id) is schema
+        assert schema.types == {
+            "id": "int",
+            "status": "string",
+            "active": "bool",
+        }
+        assert check_row(["open", " 7 ", "true"]) is None
+        assert check_row(["open", "", ""]) == (
+            "Falta el valor obligatorio de la columna id"
+        )
+        assert check_row(["open", "7.5", ""]) == (
+            "Valor no válido en la columna id (int)"
+        )
+        assert check_row(["done", "7", ""]) == (
+            "Valor no permitido en la columna status"
+        )
+
+    def test_allowed_values_compared_by_type(self, schema_service):
+        schema = schema_service.register_schema(
+            {
+                "columns": [
+                    {"name": "active", "type": "bool", "allowed": [True]},
+                    {"name": "size", "type": "int", "allowed": [1, "2"]},
+                    {"name": "ratio", "type": "float", "allowed": [0.5]},
+                ]
+            }
+        )
+        check_row = schema.bind(["active", "size", "ratio"])
+
+        assert check_row(["TRUE", " 2 ", "0.50"]) is None
+        assert check_row(["False", "1", "0.5"]) == (
+            "Valor no permitido en la columna active"
+        )
+        assert check_row(["true", "3", ".5"]) == (
+            "Valor no permitido en la columna size"
+        )
+
+    def test_schema_header_errors(self, schema_service):
+        schema = schema_service.register_schema(
+            {"columns": [{"name": "id"}, {"name": "name"}]}
+        )
+
+        errors = schema.header_errors(["id", "email"])
+
+        assert errors == [
+            "Falta la columna name del esquema",
+            "La columna email no está en el esquema",
+        ]
+
+    @pytest.mark.parametrize(
+        "definition, message",
+        [
+            (None, "non-empty list of columns"),
+            ({"columns": [{"type": "int"}]}, "needs a name"),
+            ({"columns": [{"name": "a"}, {"name": "a"}]}, "Duplicate"),
+            ({"columns": [{"name": "a", "type": "money"}]}, "Unsupported"),
+            (
+                {"columns": [{"name": "a", "type": "int", "allowed": ["x"]}]},
+                "Invalid allowed value for a: x",
+            ),
+        ],
+    )
+    def test_register_invalid_schema(
+        self, schema_service, definition, message
+    ):
+        with pytest.raises(ValueError, match=message):
+            schema_service.register_schema(definition)
+
+    def test_unknown_schema(self, schema_service):
+        with pytest.raises(KeyError):
+            schema_service.get_schema("missing")
@@ -0,0 +1,97 @@
+import json
+import pytest
+from datetime import date
+from services import SerializerService
+
+
+class TestSerializerService:
+    def test_iter_csv(self):
+        service = SerializerService()
+        records = [{"id": i, "extra": "x"} for i in range(5)]
+
+        chunks = list(service.iter_csv(records, ["id"], chunk_size=2))
+
+        assert len(chunks) == 3
+        assert "".join(chunks) == "id\r\n0\r\n1\r\n2\r\n3\r\n4\r\n"
+        assert list(service.iter_csv(records, [])) == []
+
+    def test_iter_json(self):
+        service = SerializerService()
+        records = ({"id": i, "day": date(2024, 1, i)} for i in range(1, 4))
+
+        output = "".join(service.iter_json(records, message="ok"))
+
+        assert json.loads(output) == {
+            "data": [
+                {"id": 1, "day": "2024-01-01"},
+                {"id": 2, "day": "2024-01-02"},
+                {"id": 3, "day": "2024-01-03"},
+            ],
+            "message": "ok",
+        }
+
+    def test_iter_json_fragments(self):
+        service = SerializerService()
+        fragments = ['{"id": 1}, {"id": 2}', '{"id": 3}']
+
+        output = "".join(
+            service.iter_json_fragments(fragments, total=lambda: 3)
+        )
+
+        assert json.loads(output) == {
+            "data": [{"id": 1}, {"id": 2}, {"id": 3}],
+            "total": 3,
+        }
+        assert json.loads("".join(service.iter_json_fragments([]))) == {
+            "data": []
+        }
+
+    def test_iter_json_empty(self):
+        output = "".join(SerializerService().iter_json([]))
+
+        assert json.loads(output) == {"data": []}
+
+    def test_iter_json_split(self):
+        service = SerializerService()
+        records = [{"id": 1, "name": "Ana"}, {"id": 2, "name": "Luis"}]
+
+        output = "".join(
+            service.iter_json(records, "split", ["id", "name"], message="ok")
+        )
+
+        assert json.loads(output) == {
+            "columns": ["id", "name"],
+            "data": [[1, "Ana"], [2, "Luis"]],
+            "message": "ok",
+        }
+
+    def test_iter_json_split_without_columns(self):
+        output = "".join(
+            SerializerService().iter_json(iter([{"a": 1, "b": 2}]), "split")
+        )
+
+        assert json.loads(output) == {"columns": ["a", "b"], "data": [[1, 2]]}
+
+    def test_iter_ndjson(self):
+        service = SerializerService()
+        records = [{"id": 1}, {"id": 2}]
+
+        output = "".join(service.iter_json(records, "ndjson", message="ok"))
+
+        assert output == '{"id": 1}\n{"id": 2}\n'
+
+    def test_iter_ndjson_trailer(self):
+        service = SerializerService()
+        records = [{"id": 1}]
+
+        output = "".join(
+            service.iter_json(
+                records, "ndjson", message="ok", removed=lambda: 3
+            )
+        )
+
+        assert output == '{"id": 1}\n{"trailer": {"removed": 3}}\n'
+
+    def test_unsupported_orient(self):
+        with pytest.raises(ValueError):
+            list(SerializerService().iter_json([], "table"))
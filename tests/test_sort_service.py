@@ -0,0 +1,49 @@
+import random
+import pytest
+from services import FileService, SortService
+
+
+class TestSortService:
+    @pytest.fixture
+    def sort_service(self, tmp_path):
+        return SortService(FileService(tmp_path), run_size=10)
+
+    def test_external_sort(self, sort_service, tmp_path):
+        records = [{"n": random.randint(0, 50), "i": i} for i in range(95)]
+
+        merged = sort_service.sort(records, ["n"])
+        first = next(merged)
+        spilled = list(tmp_path.iterdir())
+        rest = list(merged)
+
+        assert len(spilled) == 10
+        assert [first] + rest == sorted(records, key=lambda r: r["n"])
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sort_descending_with_nulls_last(self, sort_service):
+        records = [
+            {"name": "b", "age": 30},
+            {"name": "a", "age": None},
+            {"name": "c", "age": 30},
+            {"name": "d", "age": "n/a"},
+            {"name": "e", "age": 41},
+        ]
+
+        ordered = sort_service.sort(records, ["-age", "name"])
+
+        assert [r["name"] for r in ordered] == ["d", "e", "b", "c", "a"]
+
+    def test_abandoned_sort_removes_runs(self, sort_service, tmp_path):
+        merged = sort_service.sort(({"n": -i} for i in range(50)), ["n"])
+
+        assert next(merged) == {"n": -49}
+        merged.close()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unknown_sort_column(self, sort_service):
+        with pytest.raises(ValueError, match="Unknown column: age"):
+            sort_service.sort([], ["-age"], columns=["name"])
+
+    def test_parse_sort(self, sort_service):
+        assert sort_service.parse_sort(" -age, name,,") == ["-age", "name"]
@@ -51,3 +51,38 @@ class TestTransformationService:
         assert "processed_at" in enriched_data[1]
         assert datetime.fromisoformat(enriched_data[0]["processed_at"])
         assert datetime.fromisoformat(enriched_data[1]["processed_at"])
+
+    def test_normalize_csv_batches_matches_row_loop(self, sample_data):
+        service = TransformationService()
+        headers = list(sample_data[0].keys())
+        rows = [list(row.values()) for row in sample_data * 3]
+
+        batches = list(service.normalize_csv_batches(headers, rows, 4))
+
+        # numpy está en requirements: se prueba el camino vectorizado
+        assert service.use_numpy
+        assert [len(batch) for batch in batches] == [4, 2]
+        assert [row for batch in batches for row in batch] == (
+            service.normalize_csv_data(sample_data * 3)
+        )
+
+    def test_normalize_csv_batch_without_numpy(self):
+        service = TransformationService(use_numpy=False)
+        headers = ["name", "city", "age"]
+        rows = [[" ana ", " madrid", "30"], ["luis", "paris "]]
+
+        assert service.normalize_csv_batch(headers, rows) == [
+            {"name": "ana", "city": "Madrid", "age": "30"},
+            {"name": "luis", "city": "Paris", "age": None},
+        ]
+
+    def test_normalize_csv_batch_keeps_missing_values(self):
+        service = TransformationService()
+        headers = ["name", "city"]
+        # Filas proyectadas de una fila corta: la columna que falta es None
+        rows = [(" ana ", " madrid"), ("luis", None)]
+
+        assert service.normalize_csv_batch(headers, rows) == [
+            {"name": "ana", "city": "Madrid"},
+            {"name": "luis", "city": None},
+        ]
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 from services.validator_service import ValidatorService
 import pytest
 
@@ -35,3 +38,105 @@ class TestValidatorService:
         assert result.is_valid is False
         assert len(result.errors) == 1
         assert "columnas" in result.errors[0]
+
+    def test_validate_csv_reports_physical_lines(
+        self, validator: ValidatorService
+    ) -> None:
+        # Arrange: el campo entre comillas ocupa las líneas 2 y 3
+        content = 'name,note\nJohn,"two\nlines"\nJane\nAnn,x\n\nBob,y,z'
+
+        # Act
+        result = validator.validate_csv_structure(content, max_errors=None)
+
+        # Assert
+        assert result.is_valid is False
+        assert result.errors == [
+            "Número inconsistente de columnas en la línea 4",
+            "Número inconsistente de columnas en la línea 6",
+            "Número inconsistente de columnas en la línea 7",
+        ]
+
+    def test_validate_csv_error_cap(self, validator: ValidatorService) -> None:
+        # Arrange
+        rows = iter(["name,age"] + ["John"] * 1000)
+
+        # Act
+        result = validator.validate_csv_rows(csv.reader(rows), max_errors=2)
+
+        # Assert
+        assert len(result.errors) == 2
+        assert "línea 3" in result.errors[1]
+        assert len(list(rows)) == 998
+
+    def test_parse_json_lines(self, validator: ValidatorService) -> None:
+        # Arrange
+        lines = ['{"name": "John"}\n', "\n", "{bad\n", "[1, 2]\n"]
+
+        # Act
+        records, errors = validator.parse_json_lines(lines, first_line=10)
+
+        # Assert
+        assert records == [{"name": "John"}]
+        assert errors == [
+            "Invalid JSON on line 12",
+            "Line 13 must be a JSON object",
+        ]
+
+    @pytest.mark.parametrize("read_size", [1, 7, 4096])
+    def test_validate_json_stream(
+        self, validator: ValidatorService, read_size: int
+    ) -> None:
+        # Arrange
+        content = (
+            ' [{"a": 12345, "b": "x,]"}, {"c": [1, {"d": 2}]},'
+            ' {"e": "q\\"}{\\\\", "f": [[], {}]}] '
+        )
+
+        # Act
+        result = validator.validate_json_stream(
+            io.StringIO(content), read_size=read_size
+        )
+
+        # Assert
+        assert result.is_valid is True
+        assert (result.row_count, result.column_count) == (3, 5)
+
+    def test_validate_json_stream_large_item(
+        self, validator: ValidatorService
+    ) -> None:
+        # Arrange: un elemento que ocupa miles de lecturas
+        item = {"text": 'x\\"' * 50000, "nested": [[{"n": 1}]] * 1000}
+        content = json.dumps([item, {"b": 2}])
+
+        # Act
+        result = validator.validate_json_stream(
+            io.StringIO(content), read_size=64
+        )
+
+        # Assert
+        assert result.is_valid is True
+        assert (result.row_count, result.column_count) == (2, 3)
+
+    @pytest.mark.parametrize(
+        "content, error",
+        [
+            ("", "Invalid JSON format"),
+            ("[]", "Empty JSON list"),
+            ('{"a": 1}', "JSON must be a list of objects"),
+            ('[{"a": 1},]', "Invalid JSON format"),
+            ('[{"a": 1}', "Invalid JSON format"),
+            ('[{"a": 1} {"b": 2}]', "Invalid JSON format"),
+            ('[{"a": 1]}]', "Invalid JSON format"),
+            ('[{"a": "1}]', "Invalid JSON format"),
+            ("[12x]", "Invalid JSON format"),
+            ('[7, "s", true]', "Item 1 must be an object"),
+        ],
+    )
+    def test_validate_invalid_json_stream(
+        self, validator: ValidatorService, content: str, error: str
+    ) -> None:
+        # Act
+        result = validator.validate_json_stream(io.StringIO(content))
+
+        # Assert
+        assert result.errors == [error]